@@ -25,7 +25,7 @@ apt-get -qq -y upgrade
 echo "2. Try to install required packages..."
 ln -snf /usr/share/zoneinfo/${TZ} /etc/localtime && echo ${TZ} > /etc/timezone
 
-PACKAGES=('nginx' 'libpq-dev' 'postgresql' 'python3' 'python3-pip')
+PACKAGES=('nginx' 'libpq-dev' 'postgresql' 'memcached' 'python3' 'python3-pip')
 for pkg in "${PACKAGES[@]}"
 do
     echo "Installing '$pkg'..."
@@ -50,6 +50,9 @@ su postgres -c "psql -c \"CREATE USER ${DB_USER} PASSWORD '${DB_PASSWORD}'\""
 su postgres -c "psql -c \"CREATE DATABASE ${DB_NAME} OWNER ${DB_USER}\""
 
 
+service memcached start
+
+
 echo "5. Configure uwsgi..."
 mkdir -p /run/uwsgi
 mkdir -p /usr/local/etc
@@ -110,7 +113,7 @@ service nginx restart
 
 
 echo "6. Prepare Django..."
-COMMANDS=('collectstatic' 'makemigrations' 'migrate')
+COMMANDS=('check --deploy' 'collectstatic' 'makemigrations' 'migrate')
 for COMMAND in "${COMMANDS[@]}"
 do
     DJANGO_SETTINGS_MODULE=${CONFIG} \
@@ -119,6 +122,10 @@ do
     DB_USER=${DB_USER} \
     DB_PASSWORD=${DB_PASSWORD} \
     python3 manage.py ${COMMAND}
+    if [ $? -ne 0 ]; then
+        echo "Error running '${COMMAND}'"
+        exit 1
+    fi
 done
 
 
@@ -0,0 +1,176 @@
+"""
+Content-addressed avatar storage.
+
+Avatar file name is derived from its content, users with identical
+avatars share one stored file. AvatarBlob counts references to the file,
+which is deleted when the last user drops it.
+
+Existence of stored files is cached for AVATAR_EXISTS_CACHE_TIMEOUT,
+so rendering avatar URL does not touch the storage. Pages with many
+authors preload it by `load_exists` with single cache request.
+
+Thumbnails of AVATAR_THUMBNAIL_SIZES are created once after the file is
+stored and committed, so resizing does not hold the upload transaction.
+Without Pillow original files are served.
+"""
+import hashlib
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+CHUNK_SIZE = 65536
+EXISTS_KEY_PREFIX = 'avatar_exists'
+
+
+def get_content_hash(file):
+    """
+    Return MD5 hex digest of file content, computed by
+    the upload handler or read from the file as fallback.
+    """
+    content_hash = getattr(file, 'content_hash', None)
+    if content_hash:
+        return content_hash
+    hasher = hashlib.md5()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+def store(storage, name, content):
+    """
+    Add reference to the file `name`, content is saved only
+    if the file is not stored yet.
+    """
+    AvatarBlob = apps.get_model('account', 'AvatarBlob')
+    with transaction.atomic():
+        blob, _ = AvatarBlob.objects.select_for_update().get_or_create(name=name)
+        if not storage.exists(name):
+            storage.save(name, content)
+            transaction.on_commit(lambda: create_thumbnails(storage, name))
+        AvatarBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+    transaction.on_commit(lambda: set_exists(name, True))
+
+
+def release(storage, name):
+    """
+    Drop reference to the file `name`, the file is deleted
+    after commit if it is not referenced anymore.
+    """
+    AvatarBlob = apps.get_model('account', 'AvatarBlob')
+    AvatarBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    transaction.on_commit(lambda: delete_unused(storage, name))
+
+
+def delete_unused(storage, name):
+    AvatarBlob = apps.get_model('account', 'AvatarBlob')
+    with transaction.atomic():
+        deleted, _ = AvatarBlob.objects.filter(name=name, ref_count=0).delete()
+        if deleted:
+            for file_name in [name] + get_thumbnail_names(name):
+                storage.delete(file_name)
+                set_exists(file_name, False)
+
+
+def get_thumbnail_name(name, size):
+    root, ext = os.path.splitext(name)
+    return '{}{}_{}.jpg'.format(root, ext.replace('.', '_'), size)
+
+
+def get_thumbnail_names(name):
+    return [get_thumbnail_name(name, size) for size in settings.AVATAR_THUMBNAIL_SIZES]
+
+
+def get_thumbnail_size(size):
+    """
+    Return the smallest thumbnail size not less than `size`.
+    """
+    sizes = sorted(settings.AVATAR_THUMBNAIL_SIZES)
+    if not sizes:
+        return None
+    return next((thumbnail_size for thumbnail_size in sizes if thumbnail_size >= size), sizes[-1])
+
+
+def create_thumbnails(storage, name, overwrite=False):
+    """
+    Save JPEG thumbnails of the stored image, return list of created names.
+    """
+    if Image is None:
+        return []
+    try:
+        with storage.open(name) as file:
+            image = Image.open(file)
+            image.load()
+    except (IOError, SyntaxError, Image.DecompressionBombError):
+        # Not an image, not supported format or too large image
+        return []
+    if image.mode != 'RGB':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1])
+        image = background
+
+    created = []
+    for size in settings.AVATAR_THUMBNAIL_SIZES:
+        thumbnail_name = get_thumbnail_name(name, size)
+        if storage.exists(thumbnail_name):
+            if not overwrite:
+                continue
+            storage.delete(thumbnail_name)
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        thumbnail.save(buffer, 'JPEG', quality=settings.AVATAR_THUMBNAIL_QUALITY, optimize=True)
+        storage.save(thumbnail_name, ContentFile(buffer.getvalue()))
+        set_exists(thumbnail_name, True)
+        created.append(thumbnail_name)
+    return created
+
+
+def get_exists_key(name):
+    return '{}:{}'.format(EXISTS_KEY_PREFIX, hashlib.md5(name.encode()).hexdigest())
+
+
+def set_exists(name, exists):
+    cache.set(get_exists_key(name), exists, settings.AVATAR_EXISTS_CACHE_TIMEOUT)
+
+
+def exists(storage, name):
+    """
+    Check if file is stored, storage is checked once per cache timeout.
+    """
+    result = cache.get(get_exists_key(name))
+    if result is None:
+        result = storage.exists(name)
+        set_exists(name, result)
+    return result
+
+
+def load_exists(users, sizes=()):
+    """
+    Preload existence of avatars of users and their thumbnails fitting
+    `sizes` with single cache request, missing entries are checked on render.
+    """
+    users = list(users)
+    thumbnail_sizes = {get_thumbnail_size(size) for size in sizes} - {None}
+    names = set()
+    for user in users:
+        if user.avatar:
+            names.add(user.avatar.name)
+            names.update(get_thumbnail_name(user.avatar.name, size) for size in thumbnail_sizes)
+    keys = {get_exists_key(name): name for name in names}
+    loaded = {keys[key]: result for key, result in cache.get_many(list(keys)).items()}
+    for user in users:
+        user._avatar_exists = loaded
@@ -1,9 +1,12 @@
 from django.core.files.uploadedfile import UploadedFile
 from django.db.models import FileField
+from django.db.models.signals import post_delete
 from django.forms import forms
 from django.template.defaultfilters import filesizeformat
 from django.utils.translation import ugettext_lazy as _
 
+from . import avatars
+
 
 class AvatarImageField(FileField):
     """
@@ -14,27 +17,47 @@ class AvatarImageField(FileField):
             1MB - 1048576
             5MB - 5242880
             10MB - 10485760
+    Files are content-addressed (see avatars module): identical uploads
+    share one stored file, which is deleted with its last reference.
     """
 
     def __init__(self, *args, **kwargs):
         self.content_types = kwargs.pop('content_types') if 'content_types' in kwargs else []
         self.max_upload_size = kwargs.pop('max_upload_size') if 'max_upload_size' in kwargs else 0
-        self._old_file = None
         super().__init__(*args, **kwargs)
 
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if not cls._meta.abstract:
+            post_delete.connect(self.release_file, sender=cls)
+
+    @property
+    def old_file_attname(self):
+        return '_{}_old_file'.format(self.attname)
+
     def save_form_data(self, instance, data):
         if data is not None:
             file = getattr(instance, self.attname)
-            if file != data:
-                self._old_file = file
+            if file != data and self.old_file_attname not in instance.__dict__:
+                setattr(instance, self.old_file_attname, file)
         super().save_form_data(instance, data)
 
     def pre_save(self, model_instance, add):
-        file = super().pre_save(model_instance, add)
-        if self._old_file and self._old_file != file:
-            self._old_file.delete(save=False)
+        file = getattr(model_instance, self.attname)
+        if file and not file._committed:
+            file.name = self.generate_filename(model_instance, file.name)
+            avatars.store(file.storage, file.name, file.file)
+            file._committed = True
+        old_file = model_instance.__dict__.pop(self.old_file_attname, None)
+        if old_file:
+            avatars.release(old_file.storage, old_file.name)
         return file
 
+    def release_file(self, sender, instance, **kwargs):
+        file = getattr(instance, self.attname)
+        if file:
+            avatars.release(file.storage, file.name)
+
     def clean(self, *args, **kwargs):
         data = super().clean(*args, **kwargs)
         file = data.file
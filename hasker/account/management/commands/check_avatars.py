@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from hasker.account import avatars
+from hasker.account.models import AvatarBlob, User
+
+
+class Command(BaseCommand):
+    help = 'Find avatars missing in storage and clear references to them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of avatar files checked per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report broken avatars',
+        )
+
+    def handle(self, *args, **options):
+        storage = User._meta.get_field('avatar').storage
+        names = (User.objects.exclude(avatar__isnull=True).exclude(avatar='')
+                 .order_by('avatar').values_list('avatar', flat=True).distinct())
+        chunk_size = options['chunk_size']
+        missing = []
+        cleared = 0
+        last = ''
+        while True:
+            chunk = list(names.filter(avatar__gt=last)[:chunk_size])
+            if not chunk:
+                break
+            last = chunk[-1]
+            broken = [name for name in chunk if not storage.exists(name)]
+            for name in chunk:
+                avatars.set_exists(name, name not in broken)
+            missing.extend(broken)
+            if broken and not options['dry_run']:
+                cleared += User.objects.filter(avatar__in=broken).update(avatar=None)
+                AvatarBlob.objects.filter(name__in=broken).delete()
+
+        for name in missing:
+            self.stdout.write('Missing avatar file {}'.format(name))
+        self.stdout.write('{} missing avatar files, {} users cleared'.format(len(missing), cleared))
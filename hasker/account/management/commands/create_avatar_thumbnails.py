@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hasker.account import avatars
+from hasker.account.models import User
+
+
+class Command(BaseCommand):
+    help = 'Create missing avatar thumbnails of existing users'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of avatar files processed per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--overwrite', action='store_true',
+            help='Recreate existing thumbnails',
+        )
+
+    def handle(self, *args, **options):
+        if avatars.Image is None:
+            raise CommandError('Pillow is required to create thumbnails')
+        storage = User._meta.get_field('avatar').storage
+        names = (User.objects.exclude(avatar__isnull=True).exclude(avatar='')
+                 .order_by('avatar').values_list('avatar', flat=True).distinct())
+        created = 0
+        last = ''
+        while True:
+            chunk = list(names.filter(avatar__gt=last)[:options['chunk_size']])
+            if not chunk:
+                break
+            last = chunk[-1]
+            for name in chunk:
+                if storage.exists(name):
+                    created += len(avatars.create_thumbnails(
+                        storage, name, overwrite=options['overwrite']))
+        self.stdout.write('{} thumbnails created'.format(created))
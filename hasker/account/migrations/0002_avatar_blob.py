@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_avatar_references(apps, schema_editor):
+    User = apps.get_model('account', 'User')
+    AvatarBlob = apps.get_model('account', 'AvatarBlob')
+    references = (User.objects.exclude(avatar__isnull=True).exclude(avatar='')
+                  .order_by().values('avatar').annotate(count=Count('pk')))
+    AvatarBlob.objects.bulk_create([
+        AvatarBlob(name=row['avatar'], ref_count=row['count']) for row in references
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvatarBlob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_avatar_references, migrations.RunPython.noop),
+    ]
@@ -1,28 +1,20 @@
 import os
-import hashlib
 
 from django.conf import settings
 from django.db import models
 from django.urls import reverse
 from django.contrib.auth.models import AbstractUser
 from django.contrib.staticfiles.storage import staticfiles_storage
-from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 
+from . import avatars
 from .fields import AvatarImageField
 
 
 def unique_avatar_filename(instance, filename):
     file_path = settings.AVATAR_FILE_PATH
-    chunk_size = 65536
-    hasher = hashlib.md5()
-    instance.avatar.open()
-    buf = instance.avatar.read(chunk_size)
-    while len(buf) > 0:
-        hasher.update(buf)
-        buf = instance.avatar.read(chunk_size)
     _, ext = os.path.splitext(filename)
-    filename = '{}{}'.format(hasher.hexdigest(), ext)
+    filename = '{}{}'.format(avatars.get_content_hash(instance.avatar.file), ext)
     return os.path.join(file_path, filename)
 
 
@@ -39,13 +31,39 @@ class User(AbstractUser):
     def get_absolute_url(self):
         return reverse('account:profile', kwargs={'username': self.username})
 
-    def get_avatar_url(self):
-        if self.avatar:
-            if self.avatar.storage.exists(self.avatar.name):
-                return self.avatar.url
-            self.avatar.delete()
+    def get_avatar_url(self, size=None):
+        """
+        Return URL of avatar thumbnail fitting `size` pixels
+        or original avatar if thumbnail is not created.
+        """
+        # Broken references are cleared by `check_avatars` command
+        if self.avatar and self._avatar_file_exists(self.avatar.name):
+            thumbnail_size = avatars.get_thumbnail_size(size) if size else None
+            if thumbnail_size:
+                name = avatars.get_thumbnail_name(self.avatar.name, thumbnail_size)
+                if self._avatar_file_exists(name):
+                    return self.avatar.storage.url(name)
+            return self.avatar.url
         return staticfiles_storage.url('img/avatar.png')
 
+    def _avatar_file_exists(self, name):
+        # Existence preloaded by `avatars.load_exists`
+        loaded = getattr(self, '_avatar_exists', {})
+        if name in loaded:
+            return loaded[name]
+        return avatars.exists(self.avatar.storage, name)
+
     @property
     def url(self):
         return self.get_absolute_url()
+
+
+class AvatarBlob(models.Model):
+    """
+    Stored avatar file and number of users referencing it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,11 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def avatar_url(user, size):
+    """
+    Usage: {{ user|avatar_url:100 }}
+    """
+    return user.get_avatar_url(size=int(size))
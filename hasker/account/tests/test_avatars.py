@@ -0,0 +1,183 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock, skipIf, skipUnless
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .. import avatars
+from ..models import AvatarBlob, User
+
+GIF = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04'
+       b'\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+OTHER_GIF = GIF[:-1] + b'\x00;'
+
+
+class AvatarTestCase(TransactionTestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.addCleanup(cache.clear)
+        self.users = [User.objects.create(username='test{}'.format(i),
+                                          email='test{}@example.com'.format(i))
+                      for i in range(2)]
+
+    def upload_avatar(self, user, content, clear=False):
+        self.client.force_login(user)
+        data = {'email': user.email}
+        if clear:
+            data['avatar-clear'] = 'on'
+        else:
+            data['avatar'] = SimpleUploadedFile('avatar.gif', content, content_type='image/gif')
+        self.client.post(reverse('account:edit'), data)
+        user.refresh_from_db()
+        return user.avatar.name
+
+
+class TestAvatarStorage(AvatarTestCase):
+
+    def test_avatar_name_is_content_hash(self):
+        name = self.upload_avatar(self.users[0], GIF)
+        self.assertEqual(os.path.basename(name), hashlib.md5(GIF).hexdigest() + '.gif')
+        self.assertTrue(default_storage.exists(name))
+
+    def test_identical_avatars_share_one_file(self):
+        name = self.upload_avatar(self.users[0], GIF)
+        self.assertEqual(self.upload_avatar(self.users[1], GIF), name)
+        self.assertEqual(AvatarBlob.objects.get(name=name).ref_count, 2)
+        stored = [name] + [thumbnail_name for thumbnail_name in avatars.get_thumbnail_names(name)
+                           if default_storage.exists(thumbnail_name)]
+        self.assertEqual(sorted(os.listdir(os.path.dirname(default_storage.path(name)))),
+                         sorted(os.path.basename(file_name) for file_name in stored))
+
+    def test_shared_file_is_deleted_with_last_reference(self):
+        name = self.upload_avatar(self.users[0], GIF)
+        self.upload_avatar(self.users[1], GIF)
+
+        self.upload_avatar(self.users[0], OTHER_GIF)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(AvatarBlob.objects.get(name=name).ref_count, 1)
+
+        self.upload_avatar(self.users[1], None, clear=True)
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(AvatarBlob.objects.filter(name=name).exists())
+
+    def test_reupload_of_the_same_avatar_keeps_file(self):
+        name = self.upload_avatar(self.users[0], GIF)
+        self.upload_avatar(self.users[0], GIF)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(AvatarBlob.objects.get(name=name).ref_count, 1)
+
+    def test_user_delete_releases_avatar(self):
+        name = self.upload_avatar(self.users[0], GIF)
+        self.users[0].delete()
+        self.assertFalse(default_storage.exists(name))
+
+    def test_avatar_url_does_not_check_storage_on_render(self):
+        name = self.upload_avatar(self.users[0], GIF)
+        os.remove(default_storage.path(name))
+        self.assertEqual(self.users[0].get_avatar_url(), default_storage.url(name))
+
+        cache.clear()
+        self.assertEqual(self.users[0].get_avatar_url(), '/static/img/avatar.png')
+        self.users[0].refresh_from_db()
+        self.assertEqual(self.users[0].avatar.name, name)
+
+    def test_avatar_existence_is_preloaded_with_single_request(self):
+        self.upload_avatar(self.users[0], GIF)
+        self.upload_avatar(self.users[1], GIF)
+        urls = [user.get_avatar_url(size=100) for user in self.users]
+        self.assertEqual(urls[0], urls[1])
+
+        users = list(User.objects.order_by('pk'))
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many, \
+                mock.patch.object(avatars, 'exists', side_effect=AssertionError('Not preloaded')):
+            avatars.load_exists(users, sizes=(100,))
+            self.assertEqual([user.get_avatar_url(size=100) for user in users], urls)
+        self.assertEqual(get_many.call_count, 1)
+
+    def test_check_avatars_clears_broken_references(self):
+        name = self.upload_avatar(self.users[0], GIF)
+        self.upload_avatar(self.users[1], GIF)
+        other_name = self.upload_avatar(User.objects.create(username='test2'), OTHER_GIF)
+        os.remove(default_storage.path(name))
+
+        call_command('check_avatars', '--chunk-size=1', stdout=StringIO())
+        self.assertEqual(User.objects.filter(avatar=name).count(), 0)
+        self.assertEqual(User.objects.filter(avatar=other_name).count(), 1)
+        self.assertFalse(AvatarBlob.objects.filter(name=name).exists())
+        self.assertEqual(self.users[0].get_avatar_url(), '/static/img/avatar.png')
+
+
+@override_settings(AVATAR_THUMBNAIL_SIZES=(100, 150))
+class TestAvatarThumbnails(AvatarTestCase):
+
+    def make_image(self, size=(400, 300)):
+        buffer = BytesIO()
+        avatars.Image.new('RGBA', size, (255, 0, 0, 128)).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def test_thumbnail_size_fits_requested_size(self):
+        self.assertEqual(avatars.get_thumbnail_size(40), 100)
+        self.assertEqual(avatars.get_thumbnail_size(120), 150)
+        self.assertEqual(avatars.get_thumbnail_size(250), 150)
+
+    @skipIf(avatars.Image, 'Pillow is installed')
+    def test_original_is_served_without_pillow(self):
+        name = self.upload_avatar(self.users[0], GIF)
+        self.assertEqual(self.users[0].get_avatar_url(size=100), default_storage.url(name))
+
+    @skipUnless(avatars.Image, 'Pillow is not installed')
+    def test_thumbnails_are_created_on_upload(self):
+        self.client.force_login(self.users[0])
+        self.client.post(reverse('account:edit'), {
+            'email': self.users[0].email,
+            'avatar': SimpleUploadedFile('avatar.png', self.make_image(), content_type='image/png'),
+        })
+        self.users[0].refresh_from_db()
+        name = self.users[0].avatar.name
+        thumbnail_name = avatars.get_thumbnail_name(name, 150)
+        self.assertEqual(self.users[0].get_avatar_url(size=120), default_storage.url(thumbnail_name))
+        with default_storage.open(thumbnail_name) as file:
+            self.assertEqual(avatars.Image.open(file).size, (150, 113))
+
+        self.upload_avatar(self.users[0], None, clear=True)
+        self.assertFalse(default_storage.exists(thumbnail_name))
+
+    @skipUnless(avatars.Image, 'Pillow is not installed')
+    def test_thumbnails_are_created_after_commit(self):
+        name = 'uploads/avatars/new.png'
+        with transaction.atomic():
+            avatars.store(default_storage, name, ContentFile(self.make_image()))
+            self.assertFalse(default_storage.exists(avatars.get_thumbnail_name(name, 100)))
+        self.assertTrue(default_storage.exists(avatars.get_thumbnail_name(name, 100)))
+
+    @skipUnless(avatars.Image, 'Pillow is not installed')
+    def test_decompression_bomb_is_not_resized(self):
+        with mock.patch.object(avatars.Image, 'MAX_IMAGE_PIXELS', 1000):
+            name = self.upload_avatar(self.users[0], self.make_image())
+        self.assertTrue(default_storage.exists(name))
+        for thumbnail_name in avatars.get_thumbnail_names(name):
+            self.assertFalse(default_storage.exists(thumbnail_name))
+
+    @skipUnless(avatars.Image, 'Pillow is not installed')
+    def test_backfill_command_creates_missing_thumbnails(self):
+        name = default_storage.save('uploads/avatars/old.png', BytesIO(self.make_image()))
+        User.objects.filter(pk=self.users[0].pk).update(avatar=name)
+
+        call_command('create_avatar_thumbnails', stdout=StringIO())
+        for size in (100, 150):
+            self.assertTrue(default_storage.exists(avatars.get_thumbnail_name(name, size)))
@@ -0,0 +1,50 @@
+from django.urls import reverse
+
+from hasker.core.testing import query_budget
+from hasker.question.testing import QuestionRowsTestCase
+
+
+class AccountRowsTestCase(QuestionRowsTestCase):
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+
+class TestAccountViewsQueryBudget(AccountRowsTestCase):
+
+    @query_budget(1)
+    def test_sing_up(self):
+        self.get(reverse('account:singup'))
+
+    @query_budget(1)
+    def test_login(self):
+        self.get(reverse('account:login'))
+
+    @query_budget(4)
+    def test_profile(self):
+        self.get(self.users[-1].get_absolute_url())
+
+
+class TestUserEditViewQueryBudget(AccountRowsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    @query_budget(3)
+    def test_edit(self):
+        self.get(reverse('account:edit'))
+
+
+class TestLogoutViewQueryBudget(AccountRowsTestCase):
+
+    def create_rows(self, size):
+        # Every run logs out
+        super().create_rows(size)
+        self.client.force_login(self.user)
+
+    @query_budget(4)
+    def test_logout(self):
+        self.assertRedirects(self.client.get(reverse('account:logout')), '/',
+                             fetch_redirect_response=False)
@@ -0,0 +1,38 @@
+import hashlib
+
+from django.core.files.uploadhandler import (MemoryFileUploadHandler,
+                                             TemporaryFileUploadHandler)
+
+
+class HashingUploadHandlerMixin:
+    """
+    Compute MD5 digest of uploaded file while it is streamed in,
+    the hex digest is set to `content_hash` attribute of the uploaded file.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # Set before super() call, which raises StopFutureHandlers
+        # if this handler takes the file
+        self.hasher = hashlib.md5()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        data = super().receive_data_chunk(raw_data, start)
+        if data is None:
+            # Chunk is stored by this handler
+            self.hasher.update(raw_data)
+        return data
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_hash = self.hasher.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
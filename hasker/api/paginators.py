@@ -1,5 +1,12 @@
+from collections import OrderedDict
+
 from django.conf import settings
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from hasker.core.pagination import CURSOR_QUERY_PARAM, InvalidCursor, KeysetPaginator
 
 
 class QuestionListPagination(PageNumberPagination):
@@ -18,3 +25,53 @@ class TagListPagination(PageNumberPagination):
     page_size = settings.PAGINATE_TAGS
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination by ordering of the queryset,
+    page is seeked by opaque `cursor` instead of OFFSET.
+    """
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = CURSOR_QUERY_PARAM
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        paginator = KeysetPaginator(queryset, self.get_page_size(request))
+        try:
+            self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor as e:
+            raise NotFound(e)
+        return list(self.page)
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_cursor_link(self.page.next_cursor)),
+            ('previous', self.get_cursor_link(self.page.previous_cursor)),
+            ('results', data),
+        ]))
+
+
+class QuestionListKeysetPagination(KeysetPagination):
+    page_size = settings.PAGINATE_QUESTIONS
+
+
+class AnswerListKeysetPagination(KeysetPagination):
+    page_size = settings.PAGINATE_ANSWERS
@@ -1,20 +1,23 @@
 from rest_framework import serializers
 
 from hasker.question.models import Answer, Question, Tag
+from hasker.question.votes import VOTE_MODELS
 
 
 class QuestionsListSerializer(serializers.ModelSerializer):
     url = serializers.HyperlinkedIdentityField(view_name="api:question-detail")
+    answer_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Question
-        fields = ('pk', 'title', 'url',)
+        fields = ('pk', 'title', 'answer_count', 'url',)
 
 
 class QuestionSerializer(serializers.HyperlinkedModelSerializer):
     pk = serializers.IntegerField(read_only=True)
     author = serializers.ReadOnlyField(source='author.username')
-    rating = serializers.IntegerField(read_only=True)
+    rating = serializers.IntegerField(source='current_rating', read_only=True)
+    answer_count = serializers.IntegerField(read_only=True)
     pub_date = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%S', read_only=True)
     tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
     answers = serializers.HyperlinkedIdentityField(view_name="api:question-answers-list")
@@ -22,13 +25,13 @@ class QuestionSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Question
         fields = ('pk', 'title', 'text', 'author', 'slug', 'rating',
-                  'pub_date', 'tags', 'has_answer', 'answers',)
+                  'answer_count', 'pub_date', 'tags', 'has_answer', 'answers',)
 
 
 class AnswerSerializer(serializers.HyperlinkedModelSerializer):
     pk = serializers.IntegerField(read_only=True)
     author = serializers.ReadOnlyField(source='author.username')
-    rating = serializers.IntegerField(read_only=True)
+    rating = serializers.IntegerField(source='current_rating', read_only=True)
     pub_date = serializers.DateTimeField(format='%Y-%m-%dT%H:%M:%S', read_only=True)
 
     class Meta:
@@ -46,3 +49,9 @@ class TagSerializer(serializers.HyperlinkedModelSerializer):
 
 class VoteSerializer(serializers.Serializer):
     value = serializers.BooleanField()
+
+
+class VoteBatchItemSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=sorted(VOTE_MODELS))
+    pk = serializers.IntegerField()
+    value = serializers.BooleanField()
@@ -0,0 +1,118 @@
+import json
+
+from django.urls import reverse
+
+from hasker.core.testing import query_budget
+from hasker.question.models import Answer, Question
+from hasker.question.testing import QuestionRowsTestCase
+
+
+class TestApiViewsQueryBudget(QuestionRowsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def get(self, name, query='', **kwargs):
+        response = self.client.get(reverse(name, kwargs=kwargs) + query)
+        self.assertEqual(response.status_code, 200)
+
+    def post(self, url, data):
+        response = self.client.post(url, data=json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+    @query_budget(2)
+    def test_root(self):
+        self.get('api:api-root')
+
+    @query_budget(5)
+    def test_questions_list(self):
+        self.get('api:questions-list')
+
+    @query_budget(5)
+    def test_questions_list_popular(self):
+        self.get('api:questions-list', '?sort=popular')
+
+    @query_budget(4)
+    def test_questions_list_cursor(self):
+        self.get('api:questions-list', '?cursor=')
+
+    @query_budget(5)
+    def test_question_detail(self):
+        self.get('api:question-detail', pk=self.question.pk)
+
+    @query_budget(6)
+    def test_question_answers_list(self):
+        self.get('api:question-answers-list', pk=self.question.pk)
+
+    @query_budget(5)
+    def test_question_answers_list_cursor(self):
+        self.get('api:question-answers-list', '?cursor=', pk=self.question.pk)
+
+    @query_budget(3)
+    def test_answer_detail(self):
+        self.get('api:answer-detail', pk=self.answers[-1].pk)
+
+    @query_budget(5)
+    def test_tags_list(self):
+        self.get('api:tags-list')
+
+    @query_budget(6)
+    def test_tag_questions_list(self):
+        self.get('api:tag-questions-list', pk=self.tags[0].pk)
+
+    @query_budget(5)
+    def test_search(self):
+        self.get('api:search', '?q=question')
+
+    @query_budget(3)
+    def test_trending_questions(self):
+        self.get('api:trending-questions')
+
+    @query_budget(11)
+    def test_question_vote(self):
+        self.post(reverse('api:question-vote', kwargs={'pk': self.questions[-1].pk}),
+                  {'value': 'true'})
+
+    @query_budget(9)
+    def test_answer_vote(self):
+        self.post(reverse('api:answer-vote', kwargs={'pk': self.answers[-1].pk}),
+                  {'value': 'false'})
+
+    @query_budget(12)
+    def test_votes_batch(self):
+        self.post(reverse('api:votes-batch'), [
+            {'type': 'question', 'pk': self.questions[-1].pk, 'value': False},
+            {'type': 'answer', 'pk': self.answers[-1].pk, 'value': True},
+        ])
+
+
+class TestApiDeleteQueryBudget(QuestionRowsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def create_rows(self, size):
+        # Own question and answer of the user with answers and votes of every row
+        super().create_rows(size)
+        self.own_question = Question.objects.create(title='Own question', author=self.user)
+        self.own_question.tags.add(*self.tags)
+        self.own_answer = Answer.objects.create(text='Own answer', author=self.user,
+                                                question=self.questions[-1])
+        for user in self.users:
+            Answer.objects.create(text='Answer', author=user, question=self.own_question)
+            self.own_question.vote(user, True)
+            self.own_answer.vote(user, False)
+
+    def delete(self, name, pk):
+        response = self.client.delete(reverse(name, kwargs={'pk': pk}))
+        self.assertEqual(response.status_code, 204)
+
+    @query_budget(15)
+    def test_question_delete(self):
+        self.delete('api:question-detail', self.own_question.pk)
+
+    @query_budget(8)
+    def test_answer_delete(self):
+        self.delete('api:answer-detail', self.own_answer.pk)
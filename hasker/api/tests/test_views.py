@@ -2,6 +2,7 @@ import json
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status
@@ -52,6 +53,39 @@ class TestQuestionListView(TestCase):
         for i, item in enumerate(response.data['results']):
             self.assertEqual(item['pk'], questions[i].pk)
 
+    def test_cursor_pagination_walks_all_questions(self):
+        self.client.force_login(self.user)
+        for sort, questions in (('new', Question.objects.new()),
+                                ('popular', Question.objects.popular())):
+            url = reverse('api:questions-list') + '?sort={}&cursor='.format(sort)
+            pks = []
+            while url:
+                response = self.client.get(url, format="json")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotIn('count', response.data)
+                pks.extend(item['pk'] for item in response.data['results'])
+                url = response.data['next']
+            self.assertEqual(pks, [question.pk for question in questions])
+
+    def test_cursor_pagination_is_stable_under_inserts(self):
+        self.client.force_login(self.user)
+        url = reverse('api:questions-list') + '?cursor='
+        first = self.client.get(url, format="json").data
+        Question.objects.create(title='New question', text='Text', author=self.user)
+        second = self.client.get(first['next'], format="json").data
+        expected = Question.objects.new()[1:][settings.PAGINATE_QUESTIONS:]
+        self.assertEqual([item['pk'] for item in second['results']],
+                         [question.pk for question in expected])
+
+        previous = self.client.get(second['previous'], format="json").data
+        self.assertEqual(previous['results'], first['results'])
+
+    def test_invalid_cursor_return_404(self):
+        self.client.force_login(self.user)
+        url = reverse('api:questions-list') + '?cursor=invalid'
+        response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
 
 class TestQuestionDetailView(TestCase):
     def setUp(self):
@@ -149,6 +183,19 @@ class TestAnswersListView(TestCase):
         for i, item in enumerate(response.data['results']):
             self.assertEqual(item['pk'], answers[i].pk)
 
+    def test_cursor_pagination_for_question(self):
+        self.client.force_login(self.user)
+        question = self.question1
+        url = reverse('api:question-answers-list', kwargs={'pk': question.id}) + '?cursor='
+        pks = []
+        while url:
+            response = self.client.get(url, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pks.extend(item['pk'] for item in response.data['results'])
+            url = response.data['next']
+        answers = Answer.objects.popular().filter(question=question)
+        self.assertEqual(pks, [answer.pk for answer in answers])
+
     def test_if_question_does_not_exist_return_404(self):
         question_pk = 22
         self.client.force_login(self.user)
@@ -200,6 +247,7 @@ class TestAnswerDetailView(TestCase):
         response = self.client.delete(reverse('api:answer-detail', kwargs={'pk': answer.id}), format="json")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(len(Answer.objects.all()), 0)
+        self.assertEqual(Question.objects.get(pk=self.question.pk).answer_count, 0)
 
     def test_other_user_cannot_delete_answer(self):
         answer = self.answer
@@ -568,3 +616,134 @@ class TestVoteViews(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED, 'after second vote')
         self.assertEqual(Answer.objects.get(pk=self.answer.pk).rating, 0, 'after second vote')
         self.assertEqual(response.data.get('rating'), 0, 'after second vote')
+
+
+class TestVoteBatchView(TestCase):
+    def setUp(self):
+        self.question_author = User.objects.create(username='test1', email='test1@example.com')
+        self.answer_author = User.objects.create(username='test2', email='test2@example.com')
+        self.question = Question.objects.create(
+            title='question1',
+            text='text1',
+            author=self.question_author,
+        )
+        self.answer = Answer.objects.create(
+            text='answer1',
+            author=self.answer_author,
+            question=self.question,
+        )
+        self.url = reverse('api:votes-batch')
+
+    def make_request(self, user, votes):
+        self.client.force_login(user)
+        return self.client.post(self.url, data=json.dumps(votes),
+                                content_type='application/json')
+
+    def test_unauthorized_user_cannot_vote(self):
+        response = self.client.post(self.url, data='[]', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_votes_are_applied_in_order(self):
+        response = self.make_request(self.answer_author, [
+            {'type': 'question', 'pk': self.question.pk, 'value': True},
+            {'type': 'question', 'pk': self.question.pk, 'value': True},
+            {'type': 'question', 'pk': self.question.pk, 'value': False},
+            {'type': 'question', 'pk': self.question.pk, 'value': False},
+            {'type': 'answer', 'pk': self.answer.pk, 'value': True},
+            {'type': 'answer', 'pk': 0, 'value': True},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, [
+            {'rating': 1, 'vote': True},
+            {'rating': 1, 'vote': False},
+            {'rating': 0, 'vote': True},
+            {'rating': -1, 'vote': True},
+            # author cannot vote for own answer
+            {'rating': 0, 'vote': False},
+            {'detail': 'Not found.'},
+        ])
+        self.assertEqual(Question.objects.get(pk=self.question.pk).rating, -1)
+        self.assertEqual(Answer.objects.get(pk=self.answer.pk).rating, 0)
+        self.assertEqual(self.question.votes.get().vote, False)
+
+    def test_batch_toggles_existing_votes(self):
+        self.question.vote(self.answer_author, True)
+        response = self.make_request(self.answer_author, [
+            {'type': 'question', 'pk': self.question.pk, 'value': False},
+        ])
+        self.assertEqual(response.data, [{'rating': 0, 'vote': True}])
+        self.assertFalse(self.question.votes.exists())
+
+    def test_invalid_item_is_rejected(self):
+        response = self.make_request(self.answer_author, [
+            {'type': 'tag', 'pk': self.question.pk, 'value': True},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Question.objects.get(pk=self.question.pk).rating, 0)
+
+
+class TestConditionalGet(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='test1', email='test1@example.com')
+        self.other_user = User.objects.create(username='test2', email='test2@example.com')
+        self.question = Question.objects.create(title='Question', author=self.user)
+        self.answer = Answer.objects.create(text='Answer', author=self.other_user,
+                                            question=self.question)
+        Tag.objects.create(name='python')
+        self.client.force_login(self.user)
+
+    def get(self, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, format="json", **headers)
+
+    def assertNotModified(self, url):
+        etag = self.get(url)['ETag']
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        return etag
+
+    def test_question_detail_is_not_modified(self):
+        url = reverse('api:question-detail', kwargs={'pk': self.question.pk})
+        response = self.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        # Session, user and question version
+        with self.assertNumQueries(3):
+            response = self.get(url, response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_question_etag_follows_answers_and_votes(self):
+        url = reverse('api:question-detail', kwargs={'pk': self.question.pk})
+        answers_url = reverse('api:question-answers-list', kwargs={'pk': self.question.pk})
+        etags = [self.assertNotModified(url), self.assertNotModified(answers_url)]
+
+        self.answer.vote(self.user, True)
+        self.assertEqual(self.get(answers_url, etags[1]).status_code, status.HTTP_200_OK)
+        etags = [self.get(url)['ETag'], self.get(answers_url)['ETag']]
+
+        self.answer.text = 'Edited answer'
+        self.answer.save()
+        self.assertEqual(self.get(url, etags[0]).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get(answers_url, etags[1]).status_code, status.HTTP_200_OK)
+
+    def test_tags_etag_follows_new_tags(self):
+        url = reverse('api:tags-list')
+        etag = self.assertNotModified(url)
+        Tag.objects.create(name='django')
+        self.assertEqual(self.get(url, etag).status_code, status.HTTP_200_OK)
+
+    def test_tags_etag_follows_renamed_tags(self):
+        url = reverse('api:tags-list')
+        etag = self.assertNotModified(url)
+        tag = Tag.objects.get(name='python')
+        tag.name = 'python3'
+        tag.save()
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['name'], 'python3')
+
+    def test_trending_etag_follows_listed_questions(self):
+        url = reverse('api:trending-questions')
+        etag = self.assertNotModified(url)
+        self.question.vote(self.other_user, True)
+        self.assertEqual(self.get(url, etag).status_code, status.HTTP_200_OK)
@@ -19,6 +19,9 @@ urlpatterns = [
     path('answers/<int:pk>/', views.AnswerDetailView.as_view(), name='answer-detail'),
     path('answers/<int:pk>/vote/', views.AnswerVoteView.as_view(), name='answer-vote'),
 
+    # Vote
+    path('votes/batch/', views.VoteBatchView.as_view(), name='votes-batch'),
+
     # Tag
     path('tags/', views.TagsListView.as_view(), name='tags-list'),
     path('tags/<int:pk>/questions', views.TagQuestionsListView.as_view(), name='tag-questions-list'),
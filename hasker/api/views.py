@@ -1,20 +1,29 @@
+import hashlib
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models import Count, Max
+from django.views.decorators.http import condition
 from rest_framework import status
 from rest_framework import generics
 from rest_framework import permissions
 from rest_framework.views import APIView
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 
+from hasker.core.pagination import CURSOR_QUERY_PARAM
 from hasker.question.models import Answer, Question, Tag
+from hasker.question.search import search_questions
+from hasker.question.trending import get_trending_questions
+from hasker.question.votes import vote_batch
 from .serializers import (AnswerSerializer, QuestionSerializer,
                           QuestionsListSerializer, TagSerializer,
-                          VoteSerializer)
-from .paginators import (AnswerListPagination,
+                          VoteBatchItemSerializer, VoteSerializer)
+from .paginators import (AnswerListKeysetPagination,
+                         AnswerListPagination,
+                         QuestionListKeysetPagination,
                          QuestionListPagination,
                          TagListPagination)
 from .permissions import IsAuthorOrReadOnly
@@ -30,60 +39,133 @@ def api_root(request, format=None):
     })
 
 
-class QuestionsListView(generics.ListAPIView):
+class CursorPaginationMixin:
+    """
+    Paginate with `cursor_pagination_class` when request
+    has `cursor` query parameter (empty for the first page).
+    """
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if (self.cursor_pagination_class is not None
+                    and CURSOR_QUERY_PARAM in self.request.query_params):
+                self._paginator = self.cursor_pagination_class()
+        return super().paginator
+
+
+def make_etag(request, *parts):
+    """
+    ETag of resource state `parts` for the requested URL and media type.
+    """
+    token = repr((parts, request.get_full_path(), request.META.get('HTTP_ACCEPT')))
+    return hashlib.md5(token.encode()).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET with 304 Not Modified if client has current ETag
+    or Last-Modified, without querying and serializing the resource.
+    """
+
+    def get_etag(self, request, *args, **kwargs):
+        return None
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        view = condition(etag_func=self.get_etag,
+                         last_modified_func=self.get_last_modified)(super().get)
+        return view(request, *args, **kwargs)
+
+
+class QuestionVersionMixin(ConditionalGetMixin):
+    """
+    Conditional GET by version of question with `pk` from URL,
+    which is changed with the question, its answers and votes.
+    """
+
+    def get_question_version(self):
+        if not hasattr(self, '_question_version'):
+            self._question_version = (
+                Question.objects.filter(pk=self.kwargs.get('pk'))
+                .values_list('version', 'updated_at').first())
+        return self._question_version
+
+    def get_etag(self, request, *args, **kwargs):
+        version = self.get_question_version()
+        return version and make_etag(request, version[0])
+
+    def get_last_modified(self, request, *args, **kwargs):
+        version = self.get_question_version()
+        return version and version[1]
+
+
+class QuestionsListView(CursorPaginationMixin, generics.ListAPIView):
     serializer_class = QuestionsListSerializer
     model = Question
     pagination_class = QuestionListPagination
+    cursor_pagination_class = QuestionListKeysetPagination
 
     def get_queryset(self):
         sort = self.request.GET.get('sort')
         if sort == 'popular':
-            return self.model.objects.popular()
-        return self.model.objects.new()
+            return self.model.objects.popular().feed()
+        return self.model.objects.new().feed()
 
 
-class QuestionDetailView(generics.RetrieveDestroyAPIView):
+class QuestionDetailView(QuestionVersionMixin, generics.RetrieveDestroyAPIView):
     serializer_class = QuestionSerializer
-    queryset = Question.objects.all()
+    queryset = Question.objects.feed()
     permission_classes = (permissions.IsAuthenticated, IsAuthorOrReadOnly,)
 
 
-class AnswersListView(generics.ListAPIView):
+class AnswersListView(QuestionVersionMixin, CursorPaginationMixin, generics.ListAPIView):
     serializer_class = AnswerSerializer
     model = Answer
     pagination_class = AnswerListPagination
+    cursor_pagination_class = AnswerListKeysetPagination
 
     def get_queryset(self):
         try:
             question = Question.objects.get(id=self.kwargs.get('pk'))
         except Question.DoesNotExist:
             raise NotFound()
-        return question.answer_set.popular()
+        return question.answer_set.popular().feed()
 
 
 class AnswerDetailView(generics.RetrieveDestroyAPIView):
     serializer_class = AnswerSerializer
-    queryset = Answer.objects.all()
+    queryset = Answer.objects.feed()
     permission_classes = (permissions.IsAuthenticated, IsAuthorOrReadOnly,)
 
 
-class TagsListView(generics.ListAPIView):
+class TagsListView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = TagSerializer
     queryset = Tag.objects.all().order_by('id')
     pagination_class = TagListPagination
 
+    def get_etag(self, request, *args, **kwargs):
+        # Count and last id follow deleted and added tags, time follows renamed
+        state = Tag.objects.aggregate(count=Count('pk'), last=Max('pk'),
+                                      updated_at=Max('updated_at'))
+        return make_etag(request, state['count'], state['last'], state['updated_at'])
+
 
-class TagQuestionsListView(generics.ListAPIView):
+class TagQuestionsListView(CursorPaginationMixin, generics.ListAPIView):
     serializer_class = QuestionsListSerializer
     model = Tag
     pagination_class = QuestionListPagination
+    cursor_pagination_class = QuestionListKeysetPagination
 
     def get_queryset(self):
         try:
             tag = self.model.objects.get(id=self.kwargs.get('pk'))
         except self.model.DoesNotExist:
             raise NotFound()
-        return tag.question_tags.popular()
+        return tag.question_tags.popular().feed()
 
 
 class SearchListView(generics.ListAPIView):
@@ -92,29 +174,18 @@ class SearchListView(generics.ListAPIView):
     pagination_class = QuestionListPagination
 
     def get_queryset(self):
-        search_query = self.request.GET.get('q')
-        if not search_query:
-            return self.model.objects.none()
-        search_query = search_query[:255]
-
-        if search_query.startswith('tag:'):
-            # search tags
-            search_tag_query = search_query[len('tag:'):]
-            if not search_tag_query:
-                return self.model.objects.none()
-            query = Q(tags__name__icontains=search_tag_query)
-        else:
-            query = Q(title__icontains=search_query) | Q(text__icontains=search_query)
-            words = search_query.split()
-            if words:
-                for word in words:
-                    query |= Q(title__icontains=word) | Q(text__icontains=word)
-        return self.model.objects.filter(query).distinct().order_by('-rating', '-pub_date')
-
-
-class TrendingQuestionsListView(generics.ListAPIView):
+        return search_questions(self.request.GET.get('q')).feed()
+
+
+class TrendingQuestionsListView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = QuestionsListSerializer
-    queryset = Question.objects.popular()[:settings.TRENDING_QUESTIONS_LIMIT]
+
+    def get_queryset(self):
+        return get_trending_questions()
+
+    def get_etag(self, request, *args, **kwargs):
+        return make_etag(request, [(question.pk, question.version)
+                                   for question in get_trending_questions()])
 
 
 class BaseVoteView(APIView):
@@ -133,7 +204,7 @@ class BaseVoteView(APIView):
         except model.DoesNotExist:
             raise NotFound()
         vote = instance.vote(request.user, value)
-        return Response({'rating': instance.rating, 'vote': vote}, status=status.HTTP_201_CREATED)
+        return Response({'rating': instance.current_rating, 'vote': vote}, status=status.HTTP_201_CREATED)
 
 
 class QuestionVoteView(BaseVoteView):
@@ -142,3 +213,31 @@ class QuestionVoteView(BaseVoteView):
 
 class AnswerVoteView(BaseVoteView):
     model = Answer
+
+
+class VoteBatchView(APIView):
+    """
+    Apply list of votes `[{"type": "question", "pk": 1, "value": true}, ...]`
+    in one transaction. Response has result of every vote in the same order.
+    """
+    serializer_class = VoteBatchItemSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        if len(serializer.validated_data) > settings.MAX_VOTES_BATCH_SIZE:
+            raise ValidationError('The maximum number of votes is {}'.format(
+                settings.MAX_VOTES_BATCH_SIZE))
+
+        items = vote_batch(request.user, [
+            (item['type'], item['pk'], item['value'])
+            for item in serializer.validated_data
+        ])
+        results = []
+        for item in items:
+            if item.instance is None:
+                results.append({'detail': NotFound.default_detail})
+            else:
+                results.append({'rating': item.rating, 'vote': item.voted})
+        return Response(results, status=status.HTTP_201_CREATED)
@@ -0,0 +1,83 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hasker.benchmarks.runner import BenchmarkError, compare, run_suite
+from hasker.benchmarks.suite import NoData, get_benchmarks
+
+ROW_FORMAT = '{:<30} {:>9} {:>9} {:>9} {:>8} {:>8}'
+
+
+class Command(BaseCommand):
+    help = ('Measure latency and SQL queries of site and API endpoints '
+            'on the current database, compare with a saved baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help='Run only benchmarks with these names (default: all)',
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=50,
+            help='Number of measured requests per endpoint (default: 50)',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Number of requests per endpoint before measuring (default: 5)',
+        )
+        parser.add_argument(
+            '--output', default=None,
+            help='Save results as JSON to the file',
+        )
+        parser.add_argument(
+            '--compare', default=None,
+            help='JSON file with baseline results, fail on regressions',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=20,
+            help='Allowed increase of p50 and p95 latency in percent (default: 20)',
+        )
+
+    def print_result(self, name, result):
+        self.stdout.write(ROW_FORMAT.format(
+            name, result['p50'], result['p95'], result['p99'], result['rps'], result['queries']))
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        try:
+            benchmarks = get_benchmarks()
+        except NoData as e:
+            raise CommandError(e)
+        if options['names']:
+            unknown = set(options['names']) - {benchmark.name for benchmark in benchmarks}
+            if unknown:
+                raise CommandError('Unknown benchmarks: {}'.format(', '.join(sorted(unknown))))
+            benchmarks = [benchmark for benchmark in benchmarks
+                          if benchmark.name in options['names']]
+
+        self.stdout.write(ROW_FORMAT.format('endpoint', 'p50 ms', 'p95 ms', 'p99 ms', 'rps', 'queries'))
+        try:
+            report = run_suite(benchmarks, options['iterations'], options['warmup'],
+                               callback=self.print_result)
+        except BenchmarkError as e:
+            raise CommandError(e)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write('Results saved to {}'.format(options['output']))
+
+        if baseline is not None:
+            regressions = compare(baseline, report, options['threshold'] / 100)
+            for name, metric, base, value in regressions:
+                self.stdout.write(self.style.ERROR(
+                    '{}: {} {} -> {}'.format(name, metric, base, value)))
+            if regressions:
+                raise CommandError('{} regressions against {}'.format(
+                    len(regressions), options['compare']))
+            self.stdout.write(self.style.SUCCESS(
+                'No regressions against {}'.format(options['compare'])))
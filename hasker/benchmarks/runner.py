@@ -0,0 +1,134 @@
+"""
+In-process runner of endpoint benchmarks with the Django test client.
+
+Every benchmark is repeated sequentially, latency of each request and
+the number of its SQL queries are collected. Report is a JSON-serializable
+dict which can be saved and compared with a later run.
+"""
+import math
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import (CaptureQueriesContext, setup_test_environment,
+                               teardown_test_environment)
+from django.utils import timezone
+
+from .suite import get_benchmark_user
+
+# Metrics compared with baseline by relative change
+LATENCY_METRICS = ('p50', 'p95')
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@contextmanager
+def test_environment():
+    """
+    Allow `testserver` host and disable DEBUG (and debug toolbar)
+    unless the test runner has already done it.
+    """
+    try:
+        setup_test_environment(debug=False)
+    except RuntimeError:
+        yield
+        return
+    try:
+        yield
+    finally:
+        teardown_test_environment()
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of sorted values.
+    """
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+def summarize(latencies, queries):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'p50': round(percentile(latencies, 50) * 1000, 3),
+        'p95': round(percentile(latencies, 95) * 1000, 3),
+        'p99': round(percentile(latencies, 99) * 1000, 3),
+        'mean': round(statistics.mean(latencies) * 1000, 3),
+        'rps': round(len(latencies) / sum(latencies), 1),
+        'queries': int(statistics.median_low(queries)),
+        'max_queries': max(queries),
+    }
+
+
+def request(client, benchmark, i):
+    method = getattr(client, benchmark.method)
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        response = method(benchmark.url, benchmark.get_data(i))
+        elapsed = time.perf_counter() - started
+    if response.status_code not in (200, 201):
+        raise BenchmarkError('{} {} returned status {}'.format(
+            benchmark.method.upper(), benchmark.url, response.status_code))
+    return elapsed, len(context.captured_queries)
+
+
+def run_benchmark(client, benchmark, iterations, warmup=0):
+    latencies = []
+    queries = []
+    total = warmup + iterations
+    for i in range(total):
+        elapsed, count = request(client, benchmark, i)
+        if i >= warmup:
+            latencies.append(elapsed)
+            queries.append(count)
+    if benchmark.data and total % 2:
+        # Cancel the last vote
+        request(client, benchmark, total)
+    return summarize(latencies, queries)
+
+
+def run_suite(benchmarks, iterations, warmup=0, callback=None):
+    """
+    Run benchmarks and return report, `callback(name, result)`
+    is called after every benchmark.
+    """
+    results = {}
+    with test_environment():
+        user_client = Client()
+        user_client.force_login(get_benchmark_user())
+        anonymous_client = Client()
+        for benchmark in benchmarks:
+            client = user_client if benchmark.login else anonymous_client
+            results[benchmark.name] = run_benchmark(client, benchmark, iterations, warmup)
+            if callback:
+                callback(benchmark.name, results[benchmark.name])
+    return {
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'iterations': iterations,
+        'warmup': warmup,
+        'results': results,
+    }
+
+
+def compare(baseline, report, threshold):
+    """
+    Return list of (name, metric, baseline value, value) regressions:
+    latency increased by more than `threshold` (0.2 is 20%)
+    or any increase of the query count.
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if result[metric] > base[metric] * (1 + threshold):
+                regressions.append((name, metric, base[metric], result[metric]))
+        if result['queries'] > base['queries']:
+            regressions.append((name, 'queries', base['queries'], result['queries']))
+    return regressions
@@ -0,0 +1,100 @@
+"""
+Endpoints measured by `run_benchmarks` command.
+
+Targets are taken from the seeded database: the question with most
+answers, its best answer, the most used tag and a word of the question
+title. Requests are sent by a dedicated user which does not vote
+otherwise, votes of every benchmark are alternated so they cancel out.
+"""
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.urls import reverse
+
+from hasker.question.models import Question, Tag
+
+BENCHMARK_USERNAME = 'benchmark'
+
+
+class NoData(Exception):
+    pass
+
+
+class Benchmark:
+    """
+    Request to `url` repeated by the runner. Data of POST request
+    is returned by `data(i)` for i-th repetition.
+    """
+
+    def __init__(self, name, url, method='get', data=None, login=True):
+        self.name = name
+        self.url = url
+        self.method = method
+        self.data = data
+        self.login = login
+
+    def get_data(self, i):
+        return self.data(i) if self.data else None
+
+
+def alternate_vote(i):
+    return {'value': 'true' if i % 2 == 0 else 'false'}
+
+
+def with_query(url, **params):
+    return '{}?{}'.format(url, urlencode(params))
+
+
+def get_benchmark_user():
+    User = get_user_model()
+    user, _ = User.objects.get_or_create(
+        username=BENCHMARK_USERNAME, defaults={'email': 'benchmark@example.com'})
+    return user
+
+
+def get_benchmarks():
+    question = Question.objects.order_by('-answer_count', 'pk').first()
+    tag = (Tag.objects.annotate(questions=Count('question_tags'))
+           .order_by('-questions', 'pk').first())
+    if question is None or tag is None:
+        raise NoData('Database has no questions or tags, '
+                     'seed it with `generate_fake_data` command')
+    answer = question.answer_set.popular().first()
+    term = question.title.split()[0].strip('?')
+
+    question_url = question.get_absolute_url()
+    api_question = {'pk': question.pk}
+    benchmarks = [
+        Benchmark('index', reverse('question:index')),
+        Benchmark('index:anonymous', reverse('question:index'), login=False),
+        Benchmark('popular', with_query(reverse('question:index'), sort='popular')),
+        Benchmark('question', question_url),
+        Benchmark('question:anonymous', question_url, login=False),
+        Benchmark('search', with_query(reverse('question:search'), q=term)),
+        Benchmark('tag', tag.get_search_url()),
+        Benchmark('question-vote', question.get_vote_url(), 'post', alternate_vote),
+
+        Benchmark('api:questions-list', reverse('api:questions-list')),
+        Benchmark('api:questions-list:popular',
+                  with_query(reverse('api:questions-list'), sort='popular')),
+        Benchmark('api:questions-list:cursor',
+                  with_query(reverse('api:questions-list'), cursor='')),
+        Benchmark('api:question-detail', reverse('api:question-detail', kwargs=api_question)),
+        Benchmark('api:question-answers-list',
+                  reverse('api:question-answers-list', kwargs=api_question)),
+        Benchmark('api:tags-list', reverse('api:tags-list')),
+        Benchmark('api:tag-questions-list',
+                  reverse('api:tag-questions-list', kwargs={'pk': tag.pk})),
+        Benchmark('api:search', with_query(reverse('api:search'), q=term)),
+        Benchmark('api:trending-questions', reverse('api:trending-questions')),
+        Benchmark('api:question-vote', reverse('api:question-vote', kwargs=api_question),
+                  'post', alternate_vote),
+    ]
+    if answer is not None:
+        benchmarks += [
+            Benchmark('answer-vote', answer.get_vote_url(), 'post', alternate_vote),
+            Benchmark('api:answer-vote', reverse('api:answer-vote', kwargs={'pk': answer.pk}),
+                      'post', alternate_vote),
+        ]
+    return benchmarks
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from hasker.question.fakedata import FakeDataGenerator
+from hasker.question.models import Vote
+from ..runner import compare, percentile, run_suite
+from ..suite import BENCHMARK_USERNAME, get_benchmarks
+
+
+class TestStatistics(TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([5], 95), 5)
+
+    def test_compare(self):
+        baseline = {'results': {
+            'index': {'p50': 10, 'p95': 20, 'queries': 5},
+            'removed': {'p50': 10, 'p95': 20, 'queries': 5},
+        }}
+        report = {'results': {
+            'index': {'p50': 11, 'p95': 30, 'queries': 6},
+            'added': {'p50': 100, 'p95': 100, 'queries': 100},
+        }}
+        self.assertEqual(compare(baseline, report, 0.2), [
+            ('index', 'p95', 20, 30),
+            ('index', 'queries', 5, 6),
+        ])
+        self.assertEqual(compare(baseline, report, 1), [('index', 'queries', 5, 6)])
+
+
+class TestBenchmarkSuite(TestCase):
+
+    def setUp(self):
+        list(FakeDataGenerator(users=5, tags=3, questions=5, answers=10, votes=20).generate())
+
+    def test_all_benchmarks_run_and_votes_are_cancelled(self):
+        benchmarks = get_benchmarks()
+        report = run_suite(benchmarks, iterations=3, warmup=0)
+        self.assertEqual(set(report['results']), {benchmark.name for benchmark in benchmarks})
+        for result in report['results'].values():
+            self.assertEqual(result['requests'], 3)
+            self.assertLessEqual(result['p50'], result['p95'])
+        self.assertFalse(Vote.objects.filter(user__username=BENCHMARK_USERNAME).exists())
+
+    def test_command_saves_and_compares_results(self):
+        with tempfile.TemporaryDirectory() as path:
+            output = os.path.join(path, 'results.json')
+            call_command('run_benchmarks', 'index', 'api:tags-list', iterations=2,
+                         output=output, stdout=StringIO())
+            with open(output) as f:
+                baseline = json.load(f)
+            self.assertEqual(set(baseline['results']), {'index', 'api:tags-list'})
+
+            baseline['results']['index']['queries'] -= 1
+            with open(output, 'w') as f:
+                json.dump(baseline, f)
+            with self.assertRaisesMessage(CommandError, '1 regressions'):
+                call_command('run_benchmarks', 'index', iterations=2, threshold=10000,
+                             compare=output, stdout=StringIO())
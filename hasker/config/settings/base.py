@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 from django.urls import reverse_lazy
 
 
@@ -33,17 +34,22 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'hasker.core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'hasker.core.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'hasker.core.middleware.NPlusOneMiddleware',
 ]
 
 ROOT_URLCONF = 'hasker.config.urls'
 
+TEST_RUNNER = 'hasker.core.testing.TestRunner'
+
 FORM_RENDERER = 'django.forms.renderers.TemplatesSetting'
 
 TEMPLATES = [
@@ -123,6 +129,16 @@ AVATAR_CONTENT_TYPES = (
     'image/gif',
 )
 AVATAR_FILE_PATH = 'uploads/avatars'
+AVATAR_EXISTS_CACHE_TIMEOUT = 3600
+# Square bounding boxes of avatar thumbnails in pixels, requires Pillow
+AVATAR_THUMBNAIL_SIZES = (40, 100, 150, 250)
+AVATAR_THUMBNAIL_QUALITY = 85
+
+# Upload handlers compute file digest used for content-addressed avatars
+FILE_UPLOAD_HANDLERS = [
+    'hasker.account.uploadhandlers.HashingMemoryFileUploadHandler',
+    'hasker.account.uploadhandlers.HashingTemporaryFileUploadHandler',
+]
 
 
 # Questions
@@ -131,7 +147,64 @@ PAGINATE_QUESTIONS = 20
 PAGINATE_ANSWERS = 30
 PAGINATE_TAGS = 20
 TRENDING_QUESTIONS_LIMIT = 20
+TRENDING_QUESTIONS_CACHE_TIMEOUT = 60
+# Hot questions: ten times more votes are worth the time (seconds) of publication
+HOT_SCORE_TIME_CONSTANT = 45000
 MAX_TAGS_LIMIT = 3
+MAX_VOTES_BATCH_SIZE = 100
+# Question list items and answers are cached by version of the object
+FRAGMENT_CACHE_TIMEOUT = 300
+# Pages of anonymous users are cached until their questions change
+PAGE_CACHE_TIMEOUT = 60
+
+# Write-behind rating buffer: votes are applied to rating by
+# `flush_rating_buffer` command, requires cache shared between workers
+RATING_BUFFER_ENABLED = False
+RATING_BUFFER_CACHE = 'default'
+# Pending counters and logged votes expire after the timeout (seconds)
+RATING_BUFFER_TIMEOUT = 24 * 3600
+
+# New answer emails are queued and sent by `send_notifications` command,
+# answers to the same question received within the delay (seconds) go to one email
+ANSWER_NOTIFICATION_DIGEST_DELAY = 0
+# Failed email is retried after the delay (seconds) doubled on every attempt,
+# notification stays in outbox unsent after the maximum number of attempts
+ANSWER_NOTIFICATION_RETRY_DELAY = 60
+ANSWER_NOTIFICATION_MAX_ATTEMPTS = 5
+# Notifications claimed by a worker are not sent by others for the lease (seconds)
+ANSWER_NOTIFICATION_LEASE = 300
+
+# Search backend class path,
+# if None it is selected by DATABASES['default']['ENGINE']
+SEARCH_BACKEND = None
+
+
+# Metrics
+
+# Request metrics of every worker are saved to the directory every
+# METRICS_FLUSH_INTERVAL seconds and merged by /metrics endpoint
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'hasker-metrics')
+METRICS_FLUSH_INTERVAL = 10
+
+
+# Profiling
+
+# Staff users profile a request with `?profile=1` or `X-Profile: 1` header,
+# profiles are saved to the directory and listed by `list_profiles` command
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'hasker-profiles')
+PROFILE_MAX_COUNT = 100
+# Share of all requests which are profiled and saved
+# if slower than the threshold (seconds)
+PROFILE_SAMPLE_RATE = 0
+PROFILE_SLOW_REQUEST_THRESHOLD = 1.0
+
+
+# N+1 queries
+
+# Report queries of the same shape repeated by a template tag or variable:
+# None (disabled), 'log' or 'raise'
+NPLUSONE_ACTION = None
+NPLUSONE_THRESHOLD = 2
 
 
 # Django REST framework
@@ -32,6 +32,9 @@ if DEBUG:
             'INTERCEPT_REDIRECTS': False,
         }
 
+# N+1 queries in templates are logged by dev server (and raised by test runner)
+NPLUSONE_ACTION = 'log'
+
 STATIC_ROOT = root('public/static/')
 MEDIA_ROOT = root('public/media/')
 
@@ -41,3 +44,6 @@ MEDIA_ROOT = root('public/media/')
 PAGINATE_QUESTIONS = 5
 PAGINATE_ANSWERS = 6
 PAGINATE_TAGS = 7
+
+# Endpoint benchmarks (`run_benchmarks` command)
+INSTALLED_APPS.append('hasker.benchmarks')
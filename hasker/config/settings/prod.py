@@ -22,6 +22,15 @@ DATABASES = {
     }
 }
 
+# Page cache invalidation, trending list, fragment versions and rating buffer
+# need cache shared between uwsgi workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get('MEMCACHED_LOCATION', '127.0.0.1:11211'),
+    }
+}
+
 STATIC_URL = '/static/'
 STATIC_ROOT = '/var/www/static/'
 
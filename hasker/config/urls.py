@@ -12,6 +12,7 @@ urlpatterns = [
     path('', include('hasker.question.urls')),
     path('api/v1/', include('hasker.api.urls')),
     path('admin/', admin.site.urls),
+    path('metrics', core_views.MetricsView.as_view(), name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -5,4 +5,5 @@ def metadata(request):
     """
     Add some generally useful metadata to the template context
     """
-    return {'homepage_url': settings.HOMEPAGE_URL,}
+    return {'homepage_url': settings.HOMEPAGE_URL,
+            'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT}
@@ -0,0 +1,52 @@
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hasker.core.profiling import get_path, list_profiles
+
+ROW_FORMAT = '{:<30} {:>7} {:>10} {:>8}  {} {}'
+
+
+class Command(BaseCommand):
+    help = 'List captured request profiles or summarize one of them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'name', nargs='?',
+            help='Name of profile to summarize (default: list all profiles)',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=30,
+            help='Number of profiles listed or functions shown (default: 30)',
+        )
+        parser.add_argument(
+            '--sort', default='cumulative',
+            help='pstats sort key of functions (default: cumulative)',
+        )
+
+    def handle(self, *args, **options):
+        profiles = list_profiles()
+        if not options['name']:
+            self.stdout.write(ROW_FORMAT.format('name', 'status', 'time ms', 'queries', 'method', 'path'))
+            for profile in profiles[:options['limit']]:
+                self.stdout.write(ROW_FORMAT.format(
+                    profile['name'] + (' *' if profile['sampled'] else ''), profile['status'],
+                    round(profile['duration'] * 1000, 1), profile['queries'],
+                    profile['method'], profile['path']))
+            self.stdout.write('{} profiles, * sampled slow requests'.format(len(profiles)))
+            return
+
+        profile = next((profile for profile in profiles if profile['name'] == options['name']), None)
+        if profile is None:
+            raise CommandError('Profile {} not found'.format(options['name']))
+
+        self.stdout.write('{method} {path} ({view}): status {status}'.format(**profile))
+        self.stdout.write('Time {:.1f} ms, {} SQL queries in {:.1f} ms'.format(
+            profile['duration'] * 1000, profile['queries'], profile['db_time'] * 1000))
+        self.stdout.write('\nSQL by call site (log: {}):'.format(get_path(profile['name'], '.sql')))
+        for site, count, total in profile['sql_sites']:
+            self.stdout.write('  {:>8.1f} ms {:>4} x {}'.format(total * 1000, count, site))
+
+        self.stdout.write('\nFunctions (dump: {}):'.format(get_path(profile['name'], '.prof')))
+        stats = pstats.Stats(get_path(profile['name'], '.prof'), stream=self.stdout)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
@@ -0,0 +1,226 @@
+"""
+Per-view request metrics in Prometheus text format.
+
+Every worker process collects request count, latency histogram, number
+of SQL queries and time spent in database per URL name in memory and
+saves them to its own file in METRICS_DIR every METRICS_FLUSH_INTERVAL
+seconds. The metrics endpoint merges files of all workers, so totals
+do not depend on the worker which serves the scrape. Files of exited
+workers are merged once into the file of dead workers, so totals never
+decrease and the directory does not grow.
+"""
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+# Upper bounds of latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UNRESOLVED_VIEW = '<unresolved>'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Worker file name has random token, so a worker with reused PID
+# does not overwrite metrics of the previous one
+WORKER_FILE_RE = re.compile(r'^(\d+)-\w+\.json$')
+DEAD_WORKERS_FILE = 'dead.json'
+LOCK_FILE = '.lock'
+
+
+def empty_metrics():
+    return {'requests': {}, 'latency': {}, 'queries': {}, 'db_time': {}}
+
+
+def empty_histogram():
+    return {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0, 'count': 0}
+
+
+def merge_metrics(target, source):
+    for key, count in source['requests'].items():
+        target['requests'][key] = target['requests'].get(key, 0) + count
+    for view, histogram in source['latency'].items():
+        total = target['latency'].setdefault(view, empty_histogram())
+        total['buckets'] = [a + b for a, b in zip(total['buckets'], histogram['buckets'])]
+        total['sum'] += histogram['sum']
+        total['count'] += histogram['count']
+    for name in ('queries', 'db_time'):
+        for view, value in source[name].items():
+            target[name][view] = target[name].get(view, 0) + value
+    return target
+
+
+class MetricsRegistry:
+    """
+    Metrics of the current process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = empty_metrics()
+        self.flushed_at = time.monotonic()
+        self.token = uuid.uuid4().hex[:12]
+
+    def record(self, view, method, status, duration, queries, db_time):
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if duration <= bound),
+                      len(LATENCY_BUCKETS))
+        key = '{} {} {}'.format(view, method, status)
+        with self.lock:
+            metrics = self.metrics
+            metrics['requests'][key] = metrics['requests'].get(key, 0) + 1
+            histogram = metrics['latency'].setdefault(view, empty_histogram())
+            histogram['buckets'][bucket] += 1
+            histogram['sum'] += duration
+            histogram['count'] += 1
+            metrics['queries'][view] = metrics['queries'].get(view, 0) + queries
+            metrics['db_time'][view] = metrics['db_time'].get(view, 0) + db_time
+        if time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def get_path(self):
+        return os.path.join(settings.METRICS_DIR, '{}-{}.json'.format(os.getpid(), self.token))
+
+    def flush(self):
+        """
+        Save metrics of the process to its file, replaced atomically.
+        """
+        with self.lock:
+            data = json.dumps(self.metrics)
+            self.flushed_at = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        write_file(self.get_path(), data)
+
+    def collect(self):
+        """
+        Return metrics merged from files of all workers.
+        """
+        self.flush()
+        merge_dead_workers()
+        total = empty_metrics()
+        for name in os.listdir(settings.METRICS_DIR):
+            if WORKER_FILE_RE.match(name):
+                metrics = read_file(name)
+            elif name == DEAD_WORKERS_FILE:
+                metrics = (read_file(name) or {}).get('metrics')
+            else:
+                continue
+            if metrics:
+                merge_metrics(total, metrics)
+        return total
+
+
+def write_file(path, data):
+    tmp_path = '{}.{}.tmp'.format(path, threading.get_ident())
+    with open(tmp_path, 'w') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_file(name):
+    try:
+        with open(os.path.join(settings.METRICS_DIR, name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def merge_dead_workers():
+    """
+    Add metrics of exited workers to the file of dead workers and remove
+    their files. Names of merged files are saved with the sum, so files
+    left by interrupted merge are not counted twice.
+    """
+    with open(os.path.join(settings.METRICS_DIR, LOCK_FILE), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        names = os.listdir(settings.METRICS_DIR)
+        dead = [name for name in names if WORKER_FILE_RE.match(name)
+                and not is_alive(int(WORKER_FILE_RE.match(name).group(1)))]
+        if not dead:
+            return
+        data = read_file(DEAD_WORKERS_FILE) or {'metrics': empty_metrics(), 'merged': []}
+        merged = set(data['merged']) & set(names)
+        for name in dead:
+            metrics = read_file(name)
+            if name not in merged and metrics:
+                merge_metrics(data['metrics'], metrics)
+            merged.add(name)
+        data['merged'] = sorted(merged)
+        write_file(os.path.join(settings.METRICS_DIR, DEAD_WORKERS_FILE), json.dumps(data))
+        for name in dead:
+            os.remove(os.path.join(settings.METRICS_DIR, name))
+
+
+registry = MetricsRegistry()
+
+
+def format_labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    return '{{{}}}'.format(','.join('{}="{}"'.format(name, escape(value))
+                                    for name, value in labels.items()))
+
+
+def render_metrics(metrics):
+    lines = [
+        '# HELP hasker_http_requests_total Number of HTTP requests.',
+        '# TYPE hasker_http_requests_total counter',
+    ]
+    for key, count in sorted(metrics['requests'].items()):
+        view, method, status = key.split(' ')
+        lines.append('hasker_http_requests_total{} {}'.format(
+            format_labels(view=view, method=method, status=status), count))
+
+    lines += [
+        '# HELP hasker_http_request_duration_seconds Latency of HTTP requests.',
+        '# TYPE hasker_http_request_duration_seconds histogram',
+    ]
+    for view, histogram in sorted(metrics['latency'].items()):
+        cumulative = 0
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+        for bound, count in zip(bounds, histogram['buckets']):
+            cumulative += count
+            lines.append('hasker_http_request_duration_seconds_bucket{} {}'.format(
+                format_labels(view=view, le=bound), cumulative))
+        lines.append('hasker_http_request_duration_seconds_sum{} {}'.format(
+            format_labels(view=view), histogram['sum']))
+        lines.append('hasker_http_request_duration_seconds_count{} {}'.format(
+            format_labels(view=view), histogram['count']))
+
+    for name, metric, help_text in (
+            ('queries', 'hasker_db_queries_total', 'Number of SQL queries.'),
+            ('db_time', 'hasker_db_query_duration_seconds_total', 'Time of SQL queries.')):
+        lines += ['# HELP {} {}'.format(metric, help_text),
+                  '# TYPE {} counter'.format(metric)]
+        for view, value in sorted(metrics[name].items()):
+            lines.append('{}{} {}'.format(metric, format_labels(view=view), value))
+    return '\n'.join(lines) + '\n'
+
+
+class QueryTimer:
+    """
+    Execute wrapper which counts queries and their time.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
@@ -0,0 +1,70 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, nplusone, profiling
+
+
+class MetricsMiddleware:
+    """
+    Record latency and SQL queries of request by its URL name.
+    Should be the first middleware to measure the others too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = metrics.QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else metrics.UNRESOLVED_VIEW
+        metrics.registry.record(view, request.method, response.status_code,
+                                duration, timer.count, timer.duration)
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Run request under cProfile if it is requested by staff user
+    or sampled for capture of slow requests.
+    Should follow AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if profiling.is_requested(request) and profiling.is_staff(request):
+            return profiling.profile_request(self.get_response, request)
+        if profiling.is_sampled():
+            return profiling.profile_request(self.get_response, request, sampled=True)
+        return self.get_response(request)
+
+
+class NPlusOneMiddleware:
+    """
+    Report N+1 queries made while rendering templates of the request,
+    enabled by NPLUSONE_ACTION setting.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_ACTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        detector = nplusone.NPlusOneDetector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(detector))
+            return self.get_response(request)
@@ -0,0 +1,59 @@
+"""
+Detection of N+1 queries made while rendering templates.
+
+Lazy loads of relations in a loop (`question.author`, `question.tags.all`,
+`answer.author.get_avatar_url`) make the same query with other parameters
+for every object. Detector counts queries by their shape (SQL without
+parameters) and template tag or variable which made them and reports
+the shape repeated NPLUSONE_THRESHOLD times: logs a warning or, if
+NPLUSONE_ACTION is 'raise', raises NPlusOneError.
+"""
+import logging
+import re
+
+from django.conf import settings
+
+from .queries import get_call_sites
+
+logger = logging.getLogger(__name__)
+
+# Lists of parameters differ in length for different objects
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def get_shape(sql):
+    return IN_LIST_RE.sub('IN (...)', sql)
+
+
+class NPlusOneDetector:
+    """
+    Execute wrapper (`connection.execute_wrapper`) which reports
+    queries repeated by the same template tag or variable.
+    """
+
+    def __init__(self, action=None, threshold=None):
+        self.action = action or settings.NPLUSONE_ACTION
+        self.threshold = threshold or settings.NPLUSONE_THRESHOLD
+        self.counts = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        library_site, code_site, template_site = get_call_sites(ignore=[__file__])
+        if template_site is not None and not many:
+            key = (template_site, get_shape(sql))
+            self.counts[key] = self.counts.get(key, 0) + 1
+            if self.counts[key] == self.threshold:
+                sites = ' <- '.join(site for site in (library_site, code_site) if site)
+                self.report('{} queries of the same shape at {}{}, use select_related() '
+                            'or prefetch_related() in the view:\n    {}'.format(
+                                self.threshold, template_site,
+                                ' ({})'.format(sites) if sites else '', sql))
+        return execute(sql, params, many, context)
+
+    def report(self, message):
+        if self.action == 'raise':
+            raise NPlusOneError(message)
+        logger.warning(message)
@@ -0,0 +1,141 @@
+"""
+Keyset (cursor) pagination.
+
+Page is selected by values of ordering fields of the last (or first) row of
+the previous page instead of OFFSET, so every page costs the same
+and pages stay stable when new rows are inserted.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.translation import ugettext_lazy as _
+
+CURSOR_QUERY_PARAM = 'cursor'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def get_keyset_ordering(queryset):
+    """
+    Ordering of queryset with primary key as the last (unique) field.
+    """
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    if not any(field.lstrip('-') in ('pk', queryset.model._meta.pk.name) for field in ordering):
+        descending = bool(ordering) and ordering[-1].startswith('-')
+        ordering.append('-pk' if descending else 'pk')
+    return ordering
+
+
+class KeysetPage:
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.ordering = ordering or get_keyset_ordering(queryset)
+        self.queryset = queryset.order_by(*self.ordering)
+        self.per_page = per_page
+        self.fields = [self.get_field(name.lstrip('-')) for name in self.ordering]
+
+    def get_field(self, name):
+        opts = self.queryset.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def encode_cursor(self, obj, reverse=False):
+        values = [field.value_to_string(obj) for field in self.fields]
+        data = json.dumps({'v': values, 'r': reverse}).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(cursor + padding).decode())
+            values = [field.to_python(value) for field, value in zip(self.fields, data['v'])]
+            if len(values) != len(self.fields):
+                raise ValueError
+            return values, bool(data['r'])
+        except Exception:
+            raise InvalidCursor(_('Invalid cursor'))
+
+    def get_seek_filter(self, values, reverse):
+        """
+        Rows after (or before, if reverse) the row with given values:
+        f1 >= v1 AND ((f1 > v1) OR (f1 = v1 AND f2 > v2) OR ...),
+        the range of the leading field lets the database seek in the index.
+        """
+        query = Q()
+        equal = {}
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') != reverse else 'gt'
+            query |= Q(**equal, **{'{}__{}'.format(field, lookup): value})
+            equal[field] = value
+        name, value = self.ordering[0], values[0]
+        lookup = 'lte' if name.startswith('-') != reverse else 'gte'
+        return Q(**{'{}__{}'.format(name.lstrip('-'), lookup): value}) & query
+
+    def page(self, cursor=None):
+        queryset = self.queryset
+        reverse = False
+        if cursor:
+            values, reverse = self.decode_cursor(cursor)
+            queryset = queryset.filter(self.get_seek_filter(values, reverse))
+        if reverse:
+            queryset = queryset.reverse()
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or reverse:
+                next_cursor = self.encode_cursor(rows[-1])
+            if cursor and (has_more or not reverse):
+                previous_cursor = self.encode_cursor(rows[0], reverse=True)
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin: paginate with keyset pagination
+    when request has `cursor` query parameter (empty for the first page).
+    """
+    cursor_query_param = CURSOR_QUERY_PARAM
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.cursor_query_param not in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_query_param))
+        except InvalidCursor as e:
+            raise Http404(e)
+        return (paginator, page, page.object_list, page.has_other_pages())
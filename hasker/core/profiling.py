@@ -0,0 +1,170 @@
+"""
+Profiling of single requests with cProfile.
+
+Staff user profiles a request by adding `profile=1` query parameter or
+`X-Profile: 1` header, with PROFILE_SAMPLE_RATE a share of all requests
+is profiled and saved if it is slower than PROFILE_SLOW_REQUEST_THRESHOLD.
+Every profile is saved to PROFILE_DIR as pstats dump (.prof), log of SQL
+queries with their time and call site (.sql) and summary (.json),
+profiles are listed by `list_profiles` command.
+"""
+import cProfile
+import json
+import os
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .queries import get_call_site
+
+PROFILE_QUERY_PARAM = 'profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+# Number of call sites with the longest SQL time in summary
+SUMMARY_SQL_SITES = 10
+
+
+def is_requested(request):
+    value = request.GET.get(PROFILE_QUERY_PARAM) or request.META.get(PROFILE_HEADER)
+    return value not in (None, '', '0')
+
+
+def is_staff(request):
+    """
+    Staff user authenticated by session or API token.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        result = TokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return bool(result and result[0].is_staff)
+
+
+def is_sampled():
+    return settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE
+
+
+class SQLLog:
+    """
+    Execute wrapper which records time, call site and SQL of queries.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started, get_call_site(), sql))
+
+    def get_sites(self):
+        """
+        Return list of (call site, number of queries, time) by time.
+        """
+        sites = {}
+        for duration, site, _ in self.queries:
+            count, total = sites.get(site, (0, 0))
+            sites[site] = (count + 1, total + duration)
+        return sorted(((site, count, total) for site, (count, total) in sites.items()),
+                      key=lambda item: item[2], reverse=True)
+
+    def format(self):
+        return '\n'.join('{:.2f} ms  {}\n    {}'.format(duration * 1000, site, sql)
+                         for duration, site, sql in self.queries) + '\n'
+
+
+def get_path(name, ext):
+    return os.path.join(settings.PROFILE_DIR, name + ext)
+
+
+def remove_old_profiles():
+    for name in [profile['name'] for profile in list_profiles()][settings.PROFILE_MAX_COUNT:]:
+        for ext in ('.json', '.prof', '.sql'):
+            try:
+                os.remove(get_path(name, ext))
+            except FileNotFoundError:
+                pass
+
+
+def save_profile(profiler, sql_log, request, response, duration, sampled):
+    """
+    Save profile of request and return its name.
+    """
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    now = timezone.now()
+    name = '{}-{}'.format(now.strftime('%Y%m%d-%H%M%S-%f'), os.getpid())
+    profiler.dump_stats(get_path(name, '.prof'))
+    with open(get_path(name, '.sql'), 'w') as f:
+        f.write(sql_log.format())
+    match = getattr(request, 'resolver_match', None)
+    summary = {
+        'name': name,
+        'created': now.isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view': match.view_name if match else None,
+        'status': response.status_code,
+        'duration': duration,
+        'sampled': sampled,
+        'queries': len(sql_log.queries),
+        'db_time': sum(query[0] for query in sql_log.queries),
+        'sql_sites': sql_log.get_sites()[:SUMMARY_SQL_SITES],
+    }
+    with open(get_path(name, '.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+    remove_old_profiles()
+    return name
+
+
+def profile_request(get_response, request, sampled=False):
+    """
+    Return response of request processed under cProfile. Requested profile
+    is always saved and its name is returned in X-Profile-Id header,
+    sampled one only if the request is slow.
+    """
+    profiler = cProfile.Profile()
+    sql_log = SQLLog()
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(sql_log))
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+    duration = time.perf_counter() - started
+
+    if not sampled or duration >= settings.PROFILE_SLOW_REQUEST_THRESHOLD:
+        name = save_profile(profiler, sql_log, request, response, duration, sampled)
+        if not sampled:
+            response[PROFILE_ID_HEADER] = name
+    return response
+
+
+def list_profiles():
+    """
+    Return summaries of saved profiles, the newest first.
+    """
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for filename in sorted(os.listdir(settings.PROFILE_DIR), reverse=True):
+        if filename.endswith('.json'):
+            try:
+                with open(os.path.join(settings.PROFILE_DIR, filename)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return profiles
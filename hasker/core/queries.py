@@ -0,0 +1,113 @@
+"""
+Recording of SQL queries with the code which executed them.
+
+Call site of a query is the chain of the innermost library frame,
+the innermost frame of project code and, if the query was made while
+rendering a template, the template tag or variable with its line.
+"""
+import os
+import sys
+from collections import OrderedDict
+
+import django
+from django.db.backends.utils import CursorWrapper
+from django.template.base import Node
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIBRARY_ROOT = os.path.dirname(os.path.dirname(django.__file__))
+# Internals of ORM and templates are not reported as call sites
+INTERNAL_ROOTS = tuple(os.path.join(os.path.dirname(django.__file__), name, '')
+                       for name in ('db', 'template', 'utils'))
+RENDER_CODE = Node.render_annotated.__code__
+# Frames inside of it are execute wrappers, which are not call sites
+EXECUTE_CODE = CursorWrapper._execute_with_wrappers.__code__
+
+
+def format_frame(frame, root):
+    return '{}:{} in {}'.format(os.path.relpath(frame.f_code.co_filename, root),
+                                frame.f_lineno, frame.f_code.co_name)
+
+
+def get_call_sites(ignore=()):
+    """
+    Return (library site, project site, template site) of the current call
+    as "path:line in function" or "template:line", None if not found:
+    the innermost frame of project code, the innermost library frame called
+    by it and the template tag or variable being rendered. Only frames called
+    by the template are reported, frames of execute wrappers, iterators and
+    of files from `ignore` are skipped.
+    """
+    ignore = {os.path.abspath(__file__)} | {os.path.abspath(path) for path in ignore}
+    library_site = code_site = template_site = None
+    frame = sys._getframe(1)
+    while frame and frame.f_code is not EXECUTE_CODE:
+        frame = frame.f_back
+    frame = frame or sys._getframe(1)
+    while frame and template_site is None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if frame.f_code is RENDER_CODE:
+            node = frame.f_locals['self']
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template_site = '{}:{}'.format(origin.template_name or origin.name, token.lineno)
+        elif frame.f_code.co_name == '__iter__' or filename in ignore:
+            pass
+        elif filename.startswith(PROJECT_ROOT):
+            if code_site is None:
+                code_site = format_frame(frame, os.path.dirname(PROJECT_ROOT))
+        elif (library_site is None and code_site is None
+                and not filename.startswith(INTERNAL_ROOTS)):
+            library_site = format_frame(frame, LIBRARY_ROOT)
+        frame = frame.f_back
+    return library_site, code_site, template_site
+
+
+def get_call_site(ignore=()):
+    """
+    Return "library:line in function <- path:line in function <- template:line"
+    of the current call, see `get_call_sites`.
+    """
+    return ' <- '.join(site for site in get_call_sites(ignore) if site) or 'unknown'
+
+
+class QueryRecorder:
+    """
+    Execute wrapper (`connection.execute_wrapper`) which records
+    SQL and call site of every query.
+    """
+
+    def __init__(self, ignore=()):
+        self.ignore = ignore
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, get_call_site(self.ignore)))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def by_call_site(self):
+        """
+        Return OrderedDict of call site to list of its SQL queries.
+        """
+        groups = OrderedDict()
+        for sql, site in self.queries:
+            groups.setdefault(site, []).append(sql)
+        return groups
+
+
+def format_queries(*recorders):
+    """
+    Queries of recorders grouped by call site, with the number of
+    queries of every recorder and the first SQL of the group.
+    """
+    groups = [recorder.by_call_site() for recorder in recorders]
+    lines = []
+    for site in OrderedDict.fromkeys(site for group in groups for site in group):
+        counts = [len(group.get(site, ())) for group in groups]
+        sql = next(group[site][0] for group in groups if site in group)
+        lines.append('  {} x {}'.format(' -> '.join(map(str, counts)), site))
+        lines.append('      {}'.format(sql))
+    return '\n'.join(lines)
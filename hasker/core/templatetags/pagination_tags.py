@@ -1,6 +1,8 @@
 from urllib.parse import urlencode
 from django import template
 
+from hasker.core.pagination import CURSOR_QUERY_PARAM
+
 register = template.Library()
 
 
@@ -15,3 +17,13 @@ def get_pagination_page_url(context , page=None):
         params.pop('page', None)
 
     return '{}?{}'.format(path, urlencode(params))
+
+
+@register.simple_tag(takes_context=True)
+def get_pagination_cursor_url(context, cursor):
+    path = context['request'].path
+    params = context['request'].GET.copy()
+    params.pop('page', None)
+    params[CURSOR_QUERY_PARAM] = cursor
+
+    return '{}?{}'.format(path, urlencode(params))
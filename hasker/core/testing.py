@@ -0,0 +1,78 @@
+"""
+Test runner and query count budgets of views for the test suite.
+"""
+import os
+import shutil
+import tempfile
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.runner import DiscoverRunner
+
+from .queries import QueryRecorder, format_queries
+
+# Numbers of rows the budget is checked with
+QUERY_BUDGET_SIZES = (2, 10)
+
+
+def query_budget(budget, sizes=QUERY_BUDGET_SIZES):
+    """
+    Decorator of QueryBudgetTestCase test: run the test with data of every
+    size from `sizes` and fail if it makes more than `budget` queries or
+    the number of queries depends on the size. Cache is cleared before
+    each run, so queries of cached pages and fragments are counted too.
+    """
+    def decorator(test):
+        @wraps(test)
+        def wrapper(self):
+            recorders = []
+            for size in sizes:
+                self.create_rows(size)
+                cache.clear()
+                recorder = QueryRecorder(ignore=[__file__])
+                with connection.execute_wrapper(recorder):
+                    test(self)
+                recorders.append(recorder)
+                if len(recorder) > budget:
+                    self.fail('{} queries with {} rows, budget is {}:\n{}'.format(
+                        len(recorder), size, budget, format_queries(recorder)))
+            if len({len(recorder) for recorder in recorders}) > 1:
+                self.fail('Number of queries depends on rows count {}:\n{}'.format(
+                    ' -> '.join(map(str, sizes)), format_queries(*recorders)))
+        return wrapper
+    return decorator
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Test case of views decorated with `query_budget`,
+    `create_rows(size)` adds rows up to `size`.
+    """
+
+    def create_rows(self, size):
+        raise NotImplementedError('Subclasses of QueryBudgetTestCase must provide a create_rows() method')
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runner which fails tests on N+1 queries in templates and saves
+    metrics and profiles of test requests to a temporary directory
+    removed after tests.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.tmp_dir = tempfile.mkdtemp(prefix='hasker-tests-')
+        self.settings_override = override_settings(
+            NPLUSONE_ACTION='raise',
+            METRICS_DIR=os.path.join(self.tmp_dir, 'metrics'),
+            PROFILE_DIR=os.path.join(self.tmp_dir, 'profiles'),
+        )
+        self.settings_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.settings_override.disable()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import metrics
+
+User = get_user_model()
+
+
+class TestMetrics(TestCase):
+
+    def setUp(self):
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+        settings_override = override_settings(METRICS_DIR=self.metrics_dir,
+                                              METRICS_FLUSH_INTERVAL=3600)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        metrics.registry.metrics = metrics.empty_metrics()
+        cache.clear()
+
+        self.admin = User.objects.create(username='admin', is_staff=True)
+        self.user = User.objects.create(username='user')
+
+    def get_metrics(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_requests_are_recorded_by_url_name(self):
+        self.client.get(reverse('question:index'))
+        self.client.get(reverse('question:index'))
+        self.client.get('/missing/page/')
+
+        text = self.get_metrics()
+        self.assertIn(
+            'hasker_http_requests_total{view="question:index",method="GET",status="200"} 2', text)
+        self.assertIn(
+            'hasker_http_requests_total{view="<unresolved>",method="GET",status="404"} 1', text)
+        self.assertIn(
+            'hasker_http_request_duration_seconds_bucket{view="question:index",le="+Inf"} 2', text)
+        self.assertIn('hasker_http_request_duration_seconds_count{view="question:index"} 2', text)
+        queries = metrics.registry.metrics['queries']['question:index']
+        self.assertGreater(queries, 0)
+        self.assertIn('hasker_db_queries_total{{view="question:index"}} {}'.format(queries), text)
+        self.assertIn('hasker_db_query_duration_seconds_total{view="question:index"}', text)
+
+    def test_metrics_of_all_workers_are_merged(self):
+        self.client.get(reverse('question:index'))
+        worker = metrics.empty_metrics()
+        worker['requests']['question:index GET 200'] = 5
+        # Worker with PID 1 is alive
+        with open(os.path.join(self.metrics_dir, '1-abc.json'), 'w') as f:
+            json.dump(worker, f)
+
+        self.assertIn(
+            'hasker_http_requests_total{view="question:index",method="GET",status="200"} 6',
+            self.get_metrics())
+
+    def test_metrics_of_dead_workers_are_merged_once(self):
+        process = subprocess.Popen(['true'])
+        process.wait()
+        worker = metrics.empty_metrics()
+        worker['requests']['question:index GET 200'] = 5
+        dead_path = os.path.join(self.metrics_dir, '{}-abc.json'.format(process.pid))
+        with open(dead_path, 'w') as f:
+            json.dump(worker, f)
+
+        for _ in range(2):
+            self.assertEqual(
+                metrics.registry.collect()['requests'], {'question:index GET 200': 5})
+        self.assertFalse(os.path.exists(dead_path))
+        self.assertEqual(sorted(name for name in os.listdir(self.metrics_dir)
+                                if name.endswith('.json')),
+                         sorted([metrics.DEAD_WORKERS_FILE,
+                                 os.path.basename(metrics.registry.get_path())]))
+
+    def test_worker_with_reused_pid_keeps_metrics_of_previous_one(self):
+        previous, current = metrics.MetricsRegistry(), metrics.MetricsRegistry()
+        previous.record('view', 'GET', 200, 0.01, 1, 0.001)
+        previous.flush()
+        current.record('view', 'GET', 200, 0.01, 1, 0.001)
+        self.assertEqual(current.collect()['requests'], {'view GET 200': 2})
+
+    def test_metrics_are_admin_only(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = metrics.MetricsRegistry()
+        for duration in (0.001, 0.02, 0.02, 20):
+            registry.record('view', 'GET', 200, duration, 1, 0.001)
+        text = metrics.render_metrics(registry.metrics)
+        self.assertIn('hasker_http_request_duration_seconds_bucket{view="view",le="0.005"} 1', text)
+        self.assertIn('hasker_http_request_duration_seconds_bucket{view="view",le="0.025"} 3', text)
+        self.assertIn('hasker_http_request_duration_seconds_bucket{view="view",le="10"} 3', text)
+        self.assertIn('hasker_http_request_duration_seconds_bucket{view="view",le="+Inf"} 4', text)
@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase
+from django.urls import reverse
+
+from hasker.question.models import Answer, Question, Tag
+from hasker.question.views import QuestionListItemsMixin
+
+from ..nplusone import NPlusOneDetector, NPlusOneError, get_shape
+
+User = get_user_model()
+
+QUESTION_LIST = Template(
+    "{% for question in questions %}"
+    "{% include 'question/partials/question_list_item.html' %}"
+    "{% endfor %}")
+ANSWER_LIST = Template(
+    "{% for answer in answers %}"
+    "{% include 'question/partials/answer.html' %}"
+    "{% endfor %}")
+
+
+class TestNPlusOneDetector(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tag = Tag.objects.create(name='tag')
+        self.question = Question.objects.create(
+            title='Question', author=User.objects.create(username='author'))
+        for i in range(3):
+            user = User.objects.create(username='user{}'.format(i))
+            question = Question.objects.create(title='Question {}'.format(i), author=user)
+            question.tags.add(tag)
+            Answer.objects.create(text='Answer', author=user, question=self.question)
+
+    def render(self, template, action='raise', **context):
+        context['fragment_cache_timeout'] = 0
+        with connection.execute_wrapper(NPlusOneDetector(action)):
+            return template.render(Context(context))
+
+    def test_lazy_relations_in_question_list(self):
+        with self.assertRaisesRegex(
+                NPlusOneError, r'at question/partials/question_list_item\.html:\d+'):
+            self.render(QUESTION_LIST, questions=Question.objects.select_related('author'))
+        with self.assertRaisesRegex(
+                NPlusOneError, r'at question/partials/question_list_item\.html:\d+'):
+            self.render(QUESTION_LIST, questions=Question.objects.prefetch_related('tags'))
+
+        self.render(QUESTION_LIST, questions=Question.objects.select_related('author')
+                    .prefetch_related('tags'))
+
+    def test_lazy_author_in_answers(self):
+        with self.assertRaisesRegex(NPlusOneError, r'at question/partials/answer\.html:\d+'):
+            self.render(ANSWER_LIST, question=self.question,
+                        answers=self.question.answer_set.all())
+
+        self.render(ANSWER_LIST, question=self.question,
+                    answers=self.question.answer_set.select_related('author'))
+
+    def test_log(self):
+        with self.assertLogs('hasker.core.nplusone', 'WARNING') as logs:
+            self.render(ANSWER_LIST, action='log', question=self.question,
+                        answers=self.question.answer_set.all())
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('question/partials/answer.html', logs.output[0])
+
+    def test_queries_outside_of_templates_are_ignored(self):
+        with connection.execute_wrapper(NPlusOneDetector('raise')):
+            for answer in self.question.answer_set.all():
+                answer.author
+
+    def test_view_with_lazy_relations_fails_in_tests(self):
+        with mock.patch.object(QuestionListItemsMixin, 'prefetch_uncached_items',
+                               lambda view, questions, tags_version: None):
+            with self.assertRaisesRegex(
+                    NPlusOneError, r'at question/partials/question_list_item\.html:\d+'):
+                self.client.get(reverse('question:index'))
+
+    def test_shape(self):
+        self.assertEqual(get_shape('SELECT 1 WHERE "id" IN (%s, %s) AND "a" IN (%s)'),
+                         'SELECT 1 WHERE "id" IN (...) AND "a" IN (...)')
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from hasker.question.models import Answer, Question
+
+from ..pagination import KeysetPaginator
+
+User = get_user_model()
+
+
+class TestKeysetPaginator(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        self.question = Question.objects.create(title='Question', author=self.user)
+        for i in range(5):
+            Question.objects.create(title='Question {}'.format(i), author=self.user)
+            Answer.objects.create(text='Answer', author=self.user, question=self.question)
+
+    def get_plan(self, queryset, reverse=False):
+        paginator = KeysetPaginator(queryset, 2)
+        cursor = paginator.encode_cursor(queryset.order_by(*paginator.ordering)[2], reverse)
+        values, reverse = paginator.decode_cursor(cursor)
+        page_queryset = paginator.queryset.filter(paginator.get_seek_filter(values, reverse))
+        if reverse:
+            page_queryset = page_queryset.reverse()
+        sql, params = page_queryset[:3].query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def assertIndexRangeSearch(self, queryset, index):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Query plan is checked on SQLite')
+        for reverse in (False, True):
+            plan = self.get_plan(queryset, reverse)
+            self.assertIn('SEARCH', plan)
+            self.assertIn('USING INDEX {}'.format(index), plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_new_questions_seek_in_index(self):
+        self.assertIndexRangeSearch(Question.objects.new(), 'question_pub_date_idx')
+
+    def test_popular_questions_seek_in_index(self):
+        self.assertIndexRangeSearch(Question.objects.popular(), 'question_hot_score_idx')
+
+    def test_answers_seek_in_index(self):
+        self.assertIndexRangeSearch(
+            Answer.objects.filter(question=self.question).popular(), 'answer_rating_idx')
+
+    def test_pages_cover_all_rows_once(self):
+        queryset = Question.objects.popular()
+        paginator = KeysetPaginator(queryset, 2)
+        rows, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            rows += page.object_list
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(rows, list(queryset.order_by(*paginator.ordering)))
+
+        page = paginator.page(paginator.encode_cursor(rows[-1], reverse=True))
+        self.assertEqual(page.object_list, rows[-3:-1])
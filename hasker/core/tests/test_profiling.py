@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from .. import profiling
+
+User = get_user_model()
+
+
+class TestProfiling(TestCase):
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+        settings_override = override_settings(PROFILE_DIR=self.profile_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+        self.admin = User.objects.create(username='admin', is_staff=True)
+        self.user = User.objects.create(username='user')
+
+    def test_staff_request_is_profiled(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('question:index'), {'profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        name = response[profiling.PROFILE_ID_HEADER]
+        for ext in ('.json', '.prof', '.sql'):
+            self.assertTrue(os.path.exists(profiling.get_path(name, ext)))
+
+        profile, = profiling.list_profiles()
+        self.assertEqual(profile['name'], name)
+        self.assertEqual(profile['view'], 'question:index')
+        self.assertEqual(profile['status'], 200)
+        self.assertFalse(profile['sampled'])
+        self.assertGreater(profile['queries'], 0)
+        self.assertTrue(profile['sql_sites'])
+
+    def test_api_token_and_header(self):
+        token = Token.objects.create(user=self.admin)
+        response = self.client.get(reverse('api:questions-list'), HTTP_X_PROFILE='1',
+                                   HTTP_AUTHORIZATION='Token {}'.format(token.key))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(profiling.PROFILE_ID_HEADER, response)
+
+    def test_not_staff_request_is_not_profiled(self):
+        response = self.client.get(reverse('question:index'), {'profile': '1'})
+        self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('question:index'), {'profile': '1'})
+        self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_slow_sampled_request_is_saved(self):
+        with override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_SLOW_REQUEST_THRESHOLD=3600):
+            self.client.get(reverse('question:index'))
+        self.assertEqual(profiling.list_profiles(), [])
+
+        with override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_SLOW_REQUEST_THRESHOLD=0):
+            response = self.client.get(reverse('question:index'))
+        self.assertNotIn(profiling.PROFILE_ID_HEADER, response)
+        profile, = profiling.list_profiles()
+        self.assertTrue(profile['sampled'])
+
+    def test_old_profiles_are_removed(self):
+        self.client.force_login(self.admin)
+        with override_settings(PROFILE_MAX_COUNT=2):
+            names = [self.client.get(reverse('question:index'), {'profile': '1'})
+                     [profiling.PROFILE_ID_HEADER] for _ in range(3)]
+        self.assertEqual([profile['name'] for profile in profiling.list_profiles()],
+                         names[:0:-1])
+        self.assertEqual(len(os.listdir(self.profile_dir)), 6)
+
+    def test_list_profiles_command(self):
+        self.client.force_login(self.admin)
+        name = self.client.get(reverse('question:index'), {'profile': '1'})[
+            profiling.PROFILE_ID_HEADER]
+
+        out = StringIO()
+        call_command('list_profiles', stdout=out)
+        self.assertIn(name, out.getvalue())
+        self.assertIn('/?profile=1', out.getvalue())
+
+        out = StringIO()
+        call_command('list_profiles', name, '--limit', '5', stdout=out)
+        self.assertIn('GET /?profile=1 (question:index): status 200', out.getvalue())
+        self.assertIn('SQL by call site', out.getvalue())
+        self.assertIn('function calls', out.getvalue())
@@ -0,0 +1,68 @@
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.template import engines
+from django.test import TestCase
+
+from ..queries import QueryRecorder, format_queries
+from ..testing import QueryBudgetTestCase, query_budget
+
+User = get_user_model()
+
+
+class TestQueryRecorder(TestCase):
+
+    def test_queries_are_grouped_by_template_line(self):
+        User.objects.create(username='user1')
+        User.objects.create(username='user2')
+        template = engines['django'].from_string(
+            '{% for user in users %}\n{{ user.groups.count }}\n{% endfor %}')
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            template.render({'users': User.objects.all()})
+
+        groups = recorder.by_call_site()
+        self.assertEqual([len(queries) for queries in groups.values()], [1, 2])
+        site = list(groups)[1]
+        self.assertTrue(site.endswith('<unknown source>:2'), site)
+        self.assertIn('2 x ' + site, format_queries(recorder))
+
+
+class TestQueryBudget(TestCase):
+
+    class UserListTestCase(QueryBudgetTestCase):
+
+        def create_rows(self, size):
+            for i in range(User.objects.count(), size):
+                User.objects.create(username='user{}'.format(i))
+
+        @query_budget(20)
+        def test_n_plus_one(self):
+            for user in User.objects.all():
+                user.groups.count()
+
+        @query_budget(1)
+        def test_over_budget(self):
+            list(User.objects.all())
+            list(User.objects.all())
+
+        @query_budget(1)
+        def test_constant(self):
+            list(User.objects.all())
+
+    def run_test(self, name):
+        result = unittest.TestResult()
+        self.UserListTestCase(name).run(result)
+        return result.failures[0][1] if result.failures else None
+
+    def test_number_of_queries_must_not_depend_on_rows(self):
+        failure = self.run_test('test_n_plus_one')
+        self.assertIn('depends on rows count 2 -> 10', failure)
+        self.assertIn('2 -> 10 x hasker/core/tests/test_queries.py', failure)
+
+    def test_budget_must_not_be_exceeded(self):
+        self.assertIn('2 queries with 2 rows, budget is 1', self.run_test('test_over_budget'))
+
+    def test_budget(self):
+        self.assertIsNone(self.run_test('test_constant'))
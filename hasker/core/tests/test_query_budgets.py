@@ -0,0 +1,34 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+
+from .. import metrics
+from ..testing import QueryBudgetTestCase, query_budget
+
+User = get_user_model()
+
+
+class TestMetricsViewQueryBudget(QueryBudgetTestCase):
+
+    def setUp(self):
+        metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, metrics_dir)
+        settings_override = override_settings(METRICS_DIR=metrics_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(setattr, metrics.registry, 'metrics', metrics.registry.metrics)
+        self.client.force_login(User.objects.create(username='admin', is_staff=True))
+
+    def create_rows(self, size):
+        # Metrics of `size` views
+        metrics.registry.metrics = metrics.empty_metrics()
+        for i in range(size):
+            metrics.registry.record('view{}'.format(i), 'GET', 200, 0.01, 2, 0.001)
+
+    @query_budget(2)
+    def test_metrics(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
@@ -1,5 +1,10 @@
 from django.shortcuts import render
 from django.views.decorators.csrf import requires_csrf_token
+from rest_framework import permissions, renderers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import metrics
 
 
 @requires_csrf_token
@@ -15,3 +20,28 @@ def handler404(request, exception=None):
 @requires_csrf_token
 def handler500(request):
     return render(request, 'errors/500.html', status=500)
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Error responses
+            data = '{}\n'.format(data.get('detail', data))
+        return data.encode(self.charset)
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of all workers in Prometheus text format, admin only.
+    Scraper can authenticate with `Authorization: Token <token>` header.
+    """
+    permission_classes = (permissions.IsAdminUser,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request):
+        return Response(metrics.render_metrics(metrics.registry.collect()),
+                        content_type=metrics.CONTENT_TYPE)
@@ -11,6 +11,7 @@ class QuestionAdmin(admin.ModelAdmin):
     inlines = [
         AnsweraInline
     ]
+    readonly_fields = ('answer_count', 'hot_score',)
 
 
 admin.site.register(Question, QuestionAdmin)
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class QuestionConfig(AppConfig):
-    name = 'question'
+    name = 'hasker.question'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Page cache invalidation, trending questions, fragment versions and
+    rating buffer keep state in cache, which must be shared between workers.
+    """
+    errors = []
+    aliases = {'default'}
+    if settings.RATING_BUFFER_ENABLED:
+        aliases.add(settings.RATING_BUFFER_CACHE)
+    for alias in sorted(aliases):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend in LOCAL_CACHE_BACKENDS:
+            errors.append(Error(
+                'Cache {!r} uses {}, which is not shared between worker processes.'.format(
+                    alias, backend),
+                hint='Configure memcached, redis or database cache in CACHES.',
+                id='question.E001',
+            ))
+    return errors
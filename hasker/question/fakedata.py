@@ -0,0 +1,262 @@
+"""
+Generator of a large fake dataset for local load testing.
+
+Rows are inserted with bulk_create in batches of questions. Votes and
+answers of a batch are generated before its questions are inserted,
+so denormalized fields (rating, hot_score, answer_count, updated_at,
+correct_answer) are consistent without recounting.
+"""
+import itertools
+import random
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.functions import Length
+from django.utils import lorem_ipsum, timezone
+from django.utils.text import slugify
+
+from . import pagecache, trending
+from .models import Answer, Question, Vote, get_hot_score
+from .search import get_search_backend
+from .tagging import get_or_create_tags
+
+# Share of positive votes
+UPVOTE_RATIO = 0.7
+# Share of answered questions with a correct answer
+CORRECT_ANSWER_RATIO = 0.3
+# Tag of rank r is used with weight 1 / r ^ exponent
+TAG_ZIPF_EXPONENT = 1.1
+# Activity of users and popularity of questions follow Pareto distribution
+PARETO_ALPHA = 1.5
+# Inserted answers are found by versions starting from the marker
+# when primary keys are not returned by bulk insert (SQLite)
+ANSWER_VERSION_MARKER = 10 ** 9
+
+
+def make_tag_names(count):
+    words = list(lorem_ipsum.WORDS)
+    names = itertools.chain(words, ('{}-{}'.format(a, b)
+                                    for a, b in itertools.permutations(words, 2)))
+    return list(itertools.islice(names, count))
+
+
+def make_text(min_sentences, max_sentences):
+    return ' '.join(lorem_ipsum.sentence()
+                    for _ in range(random.randint(min_sentences, max_sentences)))
+
+
+def pareto_weights(count):
+    return list(itertools.accumulate(random.paretovariate(PARETO_ALPHA)
+                                     for _ in range(count)))
+
+
+class FakeDataGenerator:
+    """
+    Generate `users`, `tags`, `questions` and about `answers` and `votes` rows
+    (votes of a post are limited by the number of users),
+    questions are published within the last `days` days.
+    """
+
+    def __init__(self, users=0, tags=0, questions=0, answers=0, votes=0,
+                 days=365, batch_size=500, password='password', username_prefix='fake'):
+        self.users = users
+        self.tags = tags
+        self.questions = questions
+        self.answers = answers
+        self.votes = votes
+        self.days = days
+        self.batch_size = batch_size
+        self.password = password
+        self.username_prefix = username_prefix
+        self.counts = dict.fromkeys(['users', 'tags', 'questions', 'answers', 'votes'], 0)
+
+    def create_users(self):
+        User = get_user_model()
+        password = make_password(self.password)
+        # Numbering continues after the highest existing suffix
+        last = (User.objects.filter(username__regex=r'^{}[0-9]+$'.format(
+                    re.escape(self.username_prefix)))
+                .order_by(Length('username').desc(), '-username')
+                .values_list('username', flat=True).first())
+        start = int(last[len(self.username_prefix):]) + 1 if last else 0
+        for offset in range(0, self.users, self.batch_size):
+            names = ['{}{}'.format(self.username_prefix, start + i) for i in
+                     range(offset, min(offset + self.batch_size, self.users))]
+            User.objects.bulk_create([
+                User(username=name, email='{}@example.com'.format(name), password=password)
+                for name in names
+            ])
+            self.counts['users'] += len(names)
+        self.user_pks = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        self.user_weights = pareto_weights(len(self.user_pks))
+
+    def create_tags(self):
+        self.tag_pks = [tag.pk for tag in get_or_create_tags(make_tag_names(self.tags))]
+        self.tag_weights = list(itertools.accumulate(
+            1 / rank ** TAG_ZIPF_EXPONENT for rank in range(1, len(self.tag_pks) + 1)))
+        self.counts['tags'] = len(self.tag_pks)
+
+    def plan_answers(self):
+        """
+        Distribute answers between questions by popularity of questions.
+        """
+        self.popularity = [random.paretovariate(PARETO_ALPHA) for _ in range(self.questions)]
+        self.answer_counts = [0] * self.questions
+        if self.questions:
+            for i in random.choices(range(self.questions),
+                                    cum_weights=list(itertools.accumulate(self.popularity)),
+                                    k=self.answers):
+                self.answer_counts[i] += 1
+        # Answers get votes by popularity of their question
+        total = sum(p * (1 + n) for p, n in zip(self.popularity, self.answer_counts))
+        self.votes_per_popularity = self.votes / total if total else 0
+
+    def choose_author(self):
+        return random.choices(self.user_pks, cum_weights=self.user_weights)[0]
+
+    def choose_tags(self):
+        count = min(random.randint(1, settings.MAX_TAGS_LIMIT), len(self.tag_pks))
+        tags = set()
+        while len(tags) < count:
+            tags.update(random.choices(self.tag_pks, cum_weights=self.tag_weights,
+                                       k=count - len(tags)))
+        return tags
+
+    def make_votes(self, popularity, author_pk):
+        """
+        Return list of (user pk, value) votes of a post.
+        """
+        expected = popularity * self.votes_per_popularity
+        count = int(expected) + (random.random() < expected % 1)
+        count = min(count, len(self.user_pks) - 1)
+        voters = random.sample(self.user_pks, count + 1) if count else []
+        voters = [pk for pk in voters if pk != author_pk][:count]
+        return [(pk, random.random() < UPVOTE_RATIO) for pk in voters]
+
+    def make_post(self, post, popularity, author_pk):
+        post.author_id = author_pk
+        post.fake_votes = self.make_votes(popularity, author_pk)
+        post.rating = sum(1 if value else -1 for _, value in post.fake_votes)
+        return post
+
+    def make_question(self, i, now):
+        start = now - timedelta(days=self.days)
+        # Dates increase with primary keys as on the real site
+        pub_date = start + (now - start) * (i + random.random()) / max(self.questions, 1)
+        title = lorem_ipsum.words(random.randint(4, 10), common=False).capitalize() + '?'
+        question = self.make_post(Question(title=title, text=make_text(2, 8)),
+                                  self.popularity[i], self.choose_author())
+        # Insert sets the current time, the date is updated after it
+        question.fake_pub_date = pub_date
+        suffix = '-{}'.format(self.slug_start + i)
+        question.slug = slugify(title)[:self.slug_max_length - len(suffix)] + suffix
+        question.hot_score = get_hot_score(question.rating, pub_date)
+
+        answers = []
+        for _ in range(self.answer_counts[i]):
+            answer_date = pub_date + (now - pub_date) * random.random() ** 3
+            answer = self.make_post(Answer(text=make_text(1, 5)),
+                                    self.popularity[i], self.choose_author())
+            answer.fake_pub_date = answer_date
+            answers.append(answer)
+        answers.sort(key=lambda answer: answer.fake_pub_date)
+        question.fake_answers = answers
+        question.answer_count = len(answers)
+        question.updated_at = answers[-1].fake_pub_date if answers else pub_date
+
+        candidates = [answer for answer in answers if answer.author_id != question.author_id]
+        if candidates and random.random() < CORRECT_ANSWER_RATIO:
+            question.fake_correct_answer = max(candidates, key=lambda answer: answer.rating)
+        else:
+            question.fake_correct_answer = None
+        question.fake_tags = self.choose_tags()
+        return question
+
+    def make_vote_rows(self, posts):
+        if not posts:
+            return []
+        content_type = ContentType.objects.get_for_model(type(posts[0]))
+        return [Vote(user_id=user_pk, vote=value, content_type_id=content_type.pk, object_id=post.pk)
+                for post in posts for user_pk, value in post.fake_votes]
+
+    def create_questions_batch(self, indexes, now):
+        questions = [self.make_question(i, now) for i in indexes]
+        Question.objects.bulk_create(questions, batch_size=self.batch_size)
+        if questions and questions[0].pk is None:
+            # Primary keys are not returned by bulk insert on SQLite, slugs are unique
+            pks = dict(Question.objects.filter(slug__in=[question.slug for question in questions])
+                       .values_list('slug', 'pk'))
+            for question in questions:
+                question.pk = pks[question.slug]
+
+        Through = Question.tags.through
+        Through.objects.bulk_create([
+            Through(question_id=question.pk, tag_id=tag_pk)
+            for question in questions for tag_pk in question.fake_tags
+        ], batch_size=self.batch_size)
+
+        answers = []
+        for question in questions:
+            for answer in question.fake_answers:
+                answer.question_id = question.pk
+                answer.version = ANSWER_VERSION_MARKER + len(answers)
+                answers.append(answer)
+        Answer.objects.bulk_create(answers, batch_size=self.batch_size)
+        if answers and answers[0].pk is None:
+            pks = dict(Answer.objects.filter(
+                question_id__in=[question.pk for question in questions],
+                version__gte=ANSWER_VERSION_MARKER).values_list('version', 'pk'))
+            for answer in answers:
+                answer.pk = pks[answer.version]
+        for answer in answers:
+            answer.version = 1
+            answer.pub_date = answer.fake_pub_date
+        Answer.objects.bulk_update(answers, ['pub_date', 'version'], batch_size=self.batch_size)
+
+        for question in questions:
+            question.pub_date = question.fake_pub_date
+            if question.fake_correct_answer:
+                question.correct_answer_id = question.fake_correct_answer.pk
+        Question.objects.bulk_update(questions, ['pub_date', 'correct_answer'],
+                                     batch_size=self.batch_size)
+
+        votes = self.make_vote_rows(questions) + self.make_vote_rows(answers)
+        Vote.objects.bulk_create(votes, batch_size=self.batch_size)
+
+        get_search_backend().index_questions([question.pk for question in questions])
+        self.counts['questions'] += len(questions)
+        self.counts['answers'] += len(answers)
+        self.counts['votes'] += len(votes)
+
+    def create_questions(self):
+        """
+        Insert questions with their answers and votes in batches,
+        yields the number of questions created after every batch.
+        """
+        self.plan_answers()
+        self.slug_max_length = Question._meta.get_field('slug').max_length
+        self.slug_start = (Question.objects.order_by('-pk')
+                           .values_list('pk', flat=True).first() or 0) + 1
+        now = timezone.now()
+        for offset in range(0, self.questions, self.batch_size):
+            with transaction.atomic():
+                self.create_questions_batch(
+                    range(offset, min(offset + self.batch_size, self.questions)), now)
+            yield self.counts['questions']
+        trending.invalidate()
+        pagecache.invalidate([pagecache.LISTS])
+
+    def generate(self):
+        """
+        Create all rows, yields the number of questions created after every batch.
+        """
+        self.create_users()
+        if self.questions and not self.user_pks:
+            raise ValueError('At least one user is required to create questions')
+        self.create_tags()
+        yield from self.create_questions()
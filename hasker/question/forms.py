@@ -21,6 +21,7 @@ class QuestionCreateForm(forms.ModelForm):
     def clean_tags(self):
         tags = self.cleaned_data.get('tags')
         tags = [t.strip() for t in tags.split(',')] if tags else []
+        tags = list(dict.fromkeys(tags))
 
         if len(tags) > settings.MAX_TAGS_LIMIT:
             raise ValidationError(_('The maximum number of tags is {}'.format(settings.MAX_TAGS_LIMIT)))
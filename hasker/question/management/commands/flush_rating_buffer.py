@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hasker.question.ratings import get_rating_buffer
+
+
+class Command(BaseCommand):
+    help = 'Apply buffered vote rating deltas to questions and answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of buffered votes applied per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Repeat flush every INTERVAL seconds (default: flush once)',
+        )
+        parser.add_argument(
+            '--reconcile', action='store_true',
+            help='Flush, recompute ratings from votes and reset pending counters',
+        )
+
+    def handle(self, *args, **options):
+        buffer = get_rating_buffer()
+        if options['reconcile']:
+            fixed = buffer.reconcile(batch_size=options['batch_size'])
+            self.stdout.write('{} ratings fixed'.format(fixed))
+            return
+        while True:
+            processed = buffer.flush(batch_size=options['batch_size'])
+            self.stdout.write('{} buffered votes applied'.format(processed))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,64 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hasker.question.fakedata import FakeDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Create fake users, tags, questions, answers and votes for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=1000,
+            help='Number of users created (default: 1000)',
+        )
+        parser.add_argument(
+            '--tags', type=int, default=200,
+            help='Number of tags used by questions (default: 200)',
+        )
+        parser.add_argument(
+            '--questions', type=int, default=10000,
+            help='Number of questions created (default: 10000)',
+        )
+        parser.add_argument(
+            '--answers', type=int, default=50000,
+            help='Number of answers created (default: 50000)',
+        )
+        parser.add_argument(
+            '--votes', type=int, default=500000,
+            help='Approximate number of votes created (default: 500000)',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Questions are published within the last DAYS days (default: 365)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of questions inserted per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='Seed of random generator to reproduce the dataset',
+        )
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        generator = FakeDataGenerator(
+            users=options['users'], tags=options['tags'],
+            questions=options['questions'], answers=options['answers'],
+            votes=options['votes'], days=options['days'],
+            batch_size=options['batch_size'],
+        )
+        started = time.monotonic()
+        try:
+            for total in generator.generate():
+                self.stdout.write('  {} questions created'.format(total))
+        except ValueError as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(
+            'Fake data created in {:.1f}s: {}'.format(
+                time.monotonic() - started,
+                ', '.join('{} {}'.format(count, name)
+                          for name, count in generator.counts.items()))))
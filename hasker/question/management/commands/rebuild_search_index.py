@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from hasker.question.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild search index of questions for the current search backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Number of questions reindexed per query (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write('Rebuilding search index with {}...'.format(
+            type(backend).__name__))
+        total = 0
+        for total in backend.rebuild(chunk_size=options['chunk_size']):
+            self.stdout.write('  {} questions indexed'.format(total))
+        self.stdout.write(self.style.SUCCESS(
+            'Search index rebuilt: {} questions'.format(total)))
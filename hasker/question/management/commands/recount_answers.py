@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from hasker.question.models import Question
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized answers count of questions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of questions updated per query (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        total = 0
+        last_pk = 0
+        while True:
+            pks = list(Question.objects.filter(pk__gt=last_pk).order_by('pk')
+                       .values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            total += Question.recount_answers(
+                Question.objects.filter(pk__gte=pks[0], pk__lte=pks[-1]))
+            last_pk = pks[-1]
+            self.stdout.write('  {} questions updated'.format(total))
+        self.stdout.write(self.style.SUCCESS(
+            'Answers recounted: {} questions'.format(total)))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hasker.question.notifications import send_notifications
+
+
+class Command(BaseCommand):
+    help = 'Send queued new answer emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of queued notifications claimed per transaction (default: 100)',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Repeat sending every INTERVAL seconds (default: send once)',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent = send_notifications(batch_size=options['batch_size'])
+            except Exception as e:
+                # Worker keeps running, outbox is retried on the next run
+                if not options['interval']:
+                    raise
+                self.stderr.write('Sending failed: {!r}'.format(e))
+            else:
+                self.stdout.write('{} emails sent'.format(sent))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:01
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Copy of hasker.question.search.tokenize at the time of this migration
+TERM_MAX_LENGTH = 50
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    terms = []
+    for word in WORD_RE.findall(text.lower()):
+        term = word[:TERM_MAX_LENGTH]
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def build_search_index(apps, schema_editor):
+    Question = apps.get_model('question', 'Question')
+    SearchIndexEntry = apps.get_model('question', 'SearchIndexEntry')
+    for question in Question.objects.iterator():
+        terms = tokenize('{} {}'.format(question.title, question.text))
+        SearchIndexEntry.objects.bulk_create([
+            SearchIndexEntry(term=term, question_id=question.pk)
+            for term in terms
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=50)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='question.Question')),
+            ],
+            options={
+                'unique_together': {('term', 'question')},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARD_SQL = [
+    "ALTER TABLE question_question ADD COLUMN search_vector tsvector",
+    "CREATE INDEX question_question_search_vector_gin "
+    "ON question_question USING gin(search_vector)",
+    "UPDATE question_question SET search_vector = "
+    "setweight(to_tsvector('english', title), 'A') || "
+    "setweight(to_tsvector('english', text), 'B')",
+]
+POSTGRES_BACKWARD_SQL = [
+    "DROP INDEX IF EXISTS question_question_search_vector_gin",
+    "ALTER TABLE question_question DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD_SQL = [
+    "CREATE VIRTUAL TABLE question_question_fts USING fts5(title, text)",
+    "INSERT INTO question_question_fts (rowid, title, text) "
+    "SELECT id, title, text FROM question_question",
+]
+SQLITE_BACKWARD_SQL = [
+    "DROP TABLE IF EXISTS question_question_fts",
+]
+
+
+def run_vendor_sql(postgres_sql, sqlite_sql):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        statements = {'postgresql': postgres_sql, 'sqlite': sqlite_sql}.get(vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_vendor_sql(POSTGRES_FORWARD_SQL, SQLITE_FORWARD_SQL),
+            run_vendor_sql(POSTGRES_BACKWARD_SQL, SQLITE_BACKWARD_SQL),
+        ),
+    ]
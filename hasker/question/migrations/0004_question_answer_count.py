@@ -0,0 +1,30 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:03
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_answers(apps, schema_editor):
+    Question = apps.get_model('question', 'Question')
+    Answer = apps.get_model('question', 'Answer')
+    answers = (Answer.objects.filter(question=OuterRef('pk'))
+               .order_by().values('question')
+               .annotate(count=Count('pk')).values('count'))
+    Question.objects.update(answer_count=Coalesce(Subquery(answers), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0003_native_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='answer_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_answers, migrations.RunPython.noop),
+    ]
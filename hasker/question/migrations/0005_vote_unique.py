@@ -0,0 +1,35 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:05
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_votes(apps, schema_editor):
+    Vote = apps.get_model('question', 'Vote')
+    duplicates = (Vote.objects.values('user', 'content_type', 'object_id')
+                  .annotate(first_id=Min('id'), count=Count('id'))
+                  .filter(count__gt=1))
+    for duplicate in duplicates:
+        Vote.objects.filter(
+            user=duplicate['user'],
+            content_type=duplicate['content_type'],
+            object_id=duplicate['object_id'],
+        ).exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('question', '0004_question_answer_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_votes, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='vote',
+            unique_together={('user', 'content_type', 'object_id')},
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:14
+
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.timezone import utc
+
+# Hot score formula and settings at the time of this migration,
+# scores are moved to the current ones by `decay_hot_scores` command
+HOT_SCORE_GRAVITY = 1.8
+HOT_SCORE_DECAY_INTERVAL = 3600
+
+
+def compute_hot_scores(apps, schema_editor):
+    Question = apps.get_model('question', 'Question')
+    timestamp = timezone.now().timestamp()
+    now = datetime.fromtimestamp(timestamp - timestamp % HOT_SCORE_DECAY_INTERVAL, tz=utc)
+    for pk, rating, pub_date in Question.objects.values_list('pk', 'rating', 'pub_date').iterator():
+        age_hours = max((now - pub_date).total_seconds(), 0) / 3600
+        Question.objects.filter(pk=pk).update(
+            hot_score=rating / (age_hours + 2) ** HOT_SCORE_GRAVITY)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0005_vote_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(compute_hot_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-hot_score', '-pub_date'], name='question_hot_score_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0010_question_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='question',
+            name='question_hot_score_idx',
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-hot_score', '-pub_date', '-id'], name='question_hot_score_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0011_question_hot_score_idx_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingBufferState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('applied', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
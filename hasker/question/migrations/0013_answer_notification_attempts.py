@@ -0,0 +1,28 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0012_rating_buffer_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answernotification',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='answernotification',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='answernotification',
+            name='retry_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:10
+
+from django.db import migrations, models
+import hasker.question.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0013_answer_notification_attempts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='answer',
+            name='question',
+            field=models.ForeignKey(on_delete=hasker.question.models.delete_with_question, to='question.Question'),
+        ),
+    ]
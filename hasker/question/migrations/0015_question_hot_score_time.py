@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0014_answer_question_on_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='hot_score_time',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0016_tag_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answernotification',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.28 on 2026-10-18 03:31
+
+import math
+
+from django.db import migrations
+
+# Hot score formula and setting at the time of this migration
+HOT_SCORE_TIME_CONSTANT = 45000
+
+
+def compute_hot_scores(apps, schema_editor):
+    Question = apps.get_model('question', 'Question')
+    for pk, rating, pub_date in Question.objects.values_list('pk', 'rating', 'pub_date').iterator():
+        sign = (rating > 0) - (rating < 0)
+        Question.objects.filter(pk=pk).update(
+            hot_score=sign * math.log10(abs(rating) + 1)
+            + pub_date.timestamp() / HOT_SCORE_TIME_CONSTANT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('question', '0017_answer_notification_locked_until'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='question',
+            name='hot_score_time',
+        ),
+        migrations.RunPython(compute_hot_scores, migrations.RunPython.noop),
+    ]
@@ -1,48 +1,195 @@
-import itertools
+import math
+import re
 from urllib.parse import urlencode
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              IntegerField, OuterRef, Q, Subquery, Sum, Value, When)
+from django.db.models.functions import Abs, Coalesce, Greatest, Ln
+from django.db.models.query import ModelIterable
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 
-
-class QuestionManager(models.Manager):
+from . import pagecache, ratings, tagging, trending
+
+SLUG_SUFFIX_RE = re.compile(r'-(\d+)$')
+# Dash and up to 10 digits
+SLUG_SUFFIX_MAX_LENGTH = 11
+SLUG_SAVE_ATTEMPTS = 5
+
+
+class PendingRatingIterable(ModelIterable):
+    """
+    Load pending rating deltas of fetched objects in buffered rating mode.
+    """
+
+    def __iter__(self):
+        if not ratings.is_enabled():
+            yield from super().__iter__()
+            return
+        objects = list(super().__iter__())
+        ratings.load_pending_ratings(objects)
+        yield from objects
+
+
+class VotableQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._iterable_class = PendingRatingIterable
+
+    def with_vote_rating(self):
+        """
+        Annotate rating computed from votes as `vote_rating`.
+        """
+        votes = (Vote.objects
+                 .filter(content_type=ContentType.objects.get_for_model(self.model),
+                         object_id=OuterRef('pk'))
+                 .order_by().values('object_id')
+                 .annotate(rating=Sum(Case(When(vote=True, then=Value(1)), default=Value(-1),
+                                           output_field=IntegerField())))
+                 .values('rating'))
+        return self.annotate(vote_rating=Coalesce(
+            Subquery(votes, output_field=IntegerField()), 0))
+
+
+class QuestionQuerySet(VotableQuerySet):
     def new(self):
-        return self.all().order_by('-pub_date')
+        return self.order_by('-pub_date')
 
     def popular(self):
-        return self.all().order_by('-rating', '-pub_date')
+        return self.order_by('-hot_score', '-pub_date')
+
+    def feed(self, tags=True):
+        """
+        Load authors and tags of questions with constant number of queries.
+        """
+        queryset = self.select_related('author')
+        return queryset.prefetch_related('tags') if tags else queryset
+
+
+class QuestionManager(models.Manager.from_queryset(QuestionQuerySet)):
+    pass
 
 
-class AnswerManager(models.Manager):
+class AnswerQuerySet(VotableQuerySet):
     def popular(self):
-        return self.all().order_by('-rating', '-pub_date')
+        return self.order_by('-rating', '-pub_date')
+
+    def feed(self):
+        """
+        Load authors of answers within the same query.
+        """
+        return self.select_related('author')
+
+
+class AnswerManager(models.Manager.from_queryset(AnswerQuerySet)):
+    pass
+
+
+def get_hot_score(rating, pub_date):
+    """
+    Hot score: sign(rating) * log10(|rating| + 1) + pub_date / HOT_SCORE_TIME_CONSTANT.
+    Age is a fixed offset of the score, so scores never decay
+    and ten times more votes are worth the time constant.
+    """
+    sign = (rating > 0) - (rating < 0)
+    timestamp = (pub_date or timezone.now()).timestamp()
+    return sign * math.log10(abs(rating) + 1) + timestamp / settings.HOT_SCORE_TIME_CONSTANT
+
+
+def hot_score_rating_term(rating):
+    """
+    Rating part of hot score as SQL expression of rating expression.
+    """
+    sign = rating / Greatest(Abs(rating), Value(1))
+    return ExpressionWrapper(sign * Ln(Abs(rating) + 1) / Value(math.log(10)),
+                             output_field=FloatField())
+
+
+class VersionMixin:
+    """
+    Object with `version` increased on every change of its content,
+    used as key of cached fragments and API ETags.
+    """
+
+    @classmethod
+    def get_version_update(cls):
+        return {'version': F('version') + 1}
+
+    @classmethod
+    def bump_versions(cls, pks):
+        return cls.objects.filter(pk__in=pks).update(**cls.get_version_update())
+
+    def save(self, *args, **kwargs):
+        update = {} if self._state.adding else self.get_version_update()
+        for name, value in update.items():
+            setattr(self, name, value)
+        if update and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | set(update)
+        super().save(*args, **kwargs)
+        if update:
+            self.refresh_from_db(fields=list(update))
 
 
 class VoteMixin:
+    @property
+    def current_rating(self):
+        """
+        Rating with pending delta of buffered votes.
+        """
+        if not hasattr(self, '_pending_rating'):
+            ratings.load_pending_ratings([self])
+        return self.rating + self._pending_rating
+
     def vote(self, user, value=False):
-        if self.author == user:
+        """
+        Vote for object: cancel opposite vote of user or add new one.
+        Rating is changed in database with single UPDATE query
+        (or collected by rating buffer in buffered mode),
+        repeated vote is rejected by unique constraint of Vote.
+        """
+        if self.author_id == user.pk:
             return False
+        delta = 1 if value else -1
         with transaction.atomic():
-            try:
-                vote = self.votes.get(user=user)
-                if vote.vote != value:
-                    vote.delete()
-                else:
+            deleted, _ = self.votes.filter(user=user, vote=not value).delete()
+            if not deleted:
+                try:
+                    with transaction.atomic():
+                        self.votes.create(user=user, vote=value)
+                except IntegrityError:
                     return False
-            except ObjectDoesNotExist:
-                self.votes.create(user=user, vote=value)
-            self.rating += 1 if value else -1
-            self.save()
-            return True
+            if ratings.is_enabled():
+                transaction.on_commit(
+                    lambda: ratings.get_rating_buffer().add(self, delta))
+            else:
+                type(self).objects.filter(pk=self.pk).update(
+                    **self.get_rating_update(delta))
+        self.refresh_from_db(fields=self.rating_fields)
+        self.__dict__.pop('_pending_rating', None)
+        self.voted()
+        return True
 
+    rating_fields = ('rating', 'version')
 
-class Question(VoteMixin, models.Model):
+    @classmethod
+    def get_rating_update(cls, delta):
+        return cls.get_rating_set(F('rating') + delta)
+
+    @classmethod
+    def get_rating_set(cls, rating):
+        return {'rating': rating, **cls.get_version_update()}
+
+    def voted(self):
+        pass
+
+
+class Question(VersionMixin, VoteMixin, models.Model):
     title = models.CharField(_('Title'), max_length=255)
     text = models.TextField(_('Question'))
     author = models.ForeignKey(
@@ -53,6 +200,11 @@ class Question(VoteMixin, models.Model):
     tags = models.ManyToManyField('Tag', related_name='question_tags')
     votes = GenericRelation('Vote', related_query_name='questions')
     rating = models.IntegerField(default=0)
+    hot_score = models.FloatField(default=0)
+    answer_count = models.PositiveIntegerField(default=0)
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Time of the last change of question, its answers or votes
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
 
     correct_answer = models.ForeignKey(
         'Answer',
@@ -65,12 +217,40 @@ class Question(VoteMixin, models.Model):
     # Manager
     objects = QuestionManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-hot_score', '-pub_date', '-id'], name='question_hot_score_idx'),
+            models.Index(fields=['-pub_date', '-id'], name='question_pub_date_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
     @property
     def has_answer(self):
-        return self.correct_answer is not None
+        return self.correct_answer_id is not None
+
+    rating_fields = ('rating', 'hot_score', 'version', 'updated_at')
+
+    @classmethod
+    def get_version_update(cls):
+        return {**super().get_version_update(), 'updated_at': timezone.now()}
+
+    @classmethod
+    def get_rating_set(cls, rating):
+        # Time offset of the stored score is kept
+        return {
+            'hot_score': (F('hot_score') - hot_score_rating_term(F('rating'))
+                          + hot_score_rating_term(rating)),
+            **super().get_rating_set(rating),
+        }
+
+    def compute_hot_score(self):
+        return get_hot_score(self.rating, self.pub_date)
+
+    def voted(self):
+        trending.questions_changed([self])
+        pagecache.questions_changed([self.pk])
 
     def get_absolute_url(self):
         return reverse("question:question", kwargs={'slug': self.slug})
@@ -82,6 +262,25 @@ class Question(VoteMixin, models.Model):
     def url(self):
         return self.get_absolute_url()
 
+    @classmethod
+    def change_answer_count(cls, pk, delta):
+        cls.objects.filter(pk=pk).update(
+            answer_count=F('answer_count') + delta, **cls.get_version_update())
+
+    @classmethod
+    def recount_answers(cls, queryset=None):
+        """
+        Recompute denormalized answer_count for questions from queryset
+        with single UPDATE query.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        answers = (Answer.objects.filter(question=OuterRef('pk'))
+                   .order_by().values('question')
+                   .annotate(count=Count('pk')).values('count'))
+        return queryset.update(answer_count=Coalesce(Subquery(answers), 0),
+                               **cls.get_version_update())
+
     def get_slug_max_length(self):
         return self._meta.get_field('slug').max_length
 
@@ -90,38 +289,94 @@ class Question(VoteMixin, models.Model):
         return cls.objects.filter(slug=slug).exists()
 
     def slugify(self, string):
+        """
+        Return slug of string with the next free numeric suffix.
+        Only the taken slug with the highest suffix is fetched:
+        suffixes of the same length share the slug prefix and are
+        ordered as strings. Slug of a deleted question is not reused
+        while numbered slugs of its title exist.
+        """
         max_length = self.get_slug_max_length()
-        slug = orig = slugify(string)[:max_length]
-        for x in itertools.count(1):
-            if not self.is_slug_exists(slug):
-                break
-            slug = '{}-{}'.format(orig[:max_length - len(str(x)) - 1], x)
-        return slug
-
-    def save(self, tags=(), *args, **kwargs):
-        if not self.pk:
+        orig = slugify(string)[:max_length]
+
+        def make_slug(x):
+            if not x:
+                return orig
+            return '{}-{}'.format(orig[:max_length - len(str(x)) - 1], x)
+
+        # Numbered slugs grouped by suffix length
+        numbered = [
+            (length, Q(slug__regex=r'^{}-[1-9][0-9]{{{}}}$'.format(
+                re.escape(orig[:max_length - length - 1]), length - 1)))
+            for length in range(1, SLUG_SUFFIX_MAX_LENGTH)]
+        lookup = Q(slug=orig)
+        for length, condition in numbered:
+            lookup |= condition
+        suffix_length = Case(*[When(condition, then=Value(length)) for length, condition in numbered],
+                             default=Value(0), output_field=IntegerField())
+        last = (self.__class__.objects.filter(lookup)
+                .annotate(suffix_length=suffix_length)
+                .order_by('-suffix_length', '-slug')
+                .values_list('slug', flat=True).first())
+        if last is None:
+            return orig
+        x = 0 if last == orig else int(SLUG_SUFFIX_RE.findall(last)[0])
+        return make_slug(x + 1)
+
+    def save_with_slug(self, *args, **kwargs):
+        """
+        Insert question with a free slug. Slug taken by concurrent
+        insert violates unique constraint, then a new one is allocated.
+        """
+        for attempt in range(1, SLUG_SAVE_ATTEMPTS + 1):
             self.slug = self.slugify(self.title)
-        super().save(*args, **kwargs)
-        tag_objects = []
-        for tag in tags:
-            tag_object, _ = Tag.objects.get_or_create(name=tag)
-            tag_objects.append(tag_object)
-        self.tags.add(*tag_objects)
-
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_SAVE_ATTEMPTS or not self.is_slug_exists(self.slug):
+                    raise
 
-class Answer(VoteMixin, models.Model):
+    def save(self, tags=(), *args, **kwargs):
+        if not kwargs.get('update_fields'):
+            self.hot_score = self.compute_hot_score()
+        if self.pk:
+            super().save(*args, **kwargs)
+        else:
+            self.save_with_slug(*args, **kwargs)
+        tagging.add_question_tags(self, tags)
+
+
+def delete_with_question(collector, field, sub_objs, using):
+    """
+    Cascade deletion of question to its answers,
+    which do not update counters of the deleted question.
+    """
+    for answer in sub_objs:
+        answer.question_deleted = True
+    models.CASCADE(collector, field, sub_objs, using)
+
+
+class Answer(VersionMixin, VoteMixin, models.Model):
     text = models.TextField(_('Answer'))
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
     pub_date = models.DateTimeField(auto_now_add=True)
-    question = models.ForeignKey('Question', on_delete=models.CASCADE)
+    question = models.ForeignKey('Question', on_delete=delete_with_question)
     votes = GenericRelation('Vote', related_query_name='answers')
     rating = models.IntegerField(default=0)
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     # Manager
     objects = AnswerManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['question', '-rating', '-pub_date', '-id'],
+                         name='answer_rating_idx'),
+        ]
+
     def mark(self, user):
         with transaction.atomic():
             question = self.question
@@ -134,9 +389,14 @@ class Answer(VoteMixin, models.Model):
                     question.correct_answer = self
             else:
                 question.correct_answer = self
-            question.save()
+            question.save(update_fields=['correct_answer'])
             return True
 
+    def voted(self):
+        if not ratings.is_enabled():
+            Question.bump_versions([self.question_id])
+        pagecache.questions_changed([self.question_id])
+
     def get_vote_url(self):
         return reverse('question:answer-vote', kwargs={'pk': self.pk})
 
@@ -146,6 +406,8 @@ class Answer(VoteMixin, models.Model):
 
 class Tag(models.Model):
     name = models.CharField(_('Name'), max_length=50, unique=True)
+    # Time of the last change of tag, part of the tags list ETag
+    updated_at = models.DateTimeField(auto_now=True, editable=False)
 
     def __str__(self):
         return self.name
@@ -165,3 +427,53 @@ class Vote(models.Model):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
     content_object = GenericForeignKey('content_type', 'object_id')
+
+    class Meta:
+        unique_together = ('user', 'content_type', 'object_id')
+
+
+class SearchIndexEntry(models.Model):
+    """
+    Posting of a normalized search term to a question which contains it.
+    All entries with the same term form the posting list of that term.
+    """
+    term = models.CharField(max_length=50, db_index=True)
+    question = models.ForeignKey(
+        'Question', on_delete=models.CASCADE, related_name='search_entries'
+    )
+
+    class Meta:
+        unique_together = ('term', 'question')
+
+    def __str__(self):
+        return self.term
+
+
+class AnswerNotification(models.Model):
+    """
+    Outbox entry of a new answer email, sent by `send_notifications` command.
+    """
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    question = models.ForeignKey('Question', on_delete=models.CASCADE)
+    answer = models.ForeignKey('Answer', on_delete=models.CASCADE)
+    url = models.CharField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Failed sending attempts, the next one is made after `retry_at`
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    retry_at = models.DateTimeField(null=True, blank=True)
+    # Claimed by a sending worker until this time
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+
+class RatingBufferState(models.Model):
+    """
+    Sequence number of the last buffered vote applied to ratings, updated
+    in the same transaction as ratings, so no vote is applied twice.
+    """
+    applied = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def get(cls, lock=False):
+        queryset = cls.objects.select_for_update() if lock else cls.objects
+        return queryset.get_or_create(pk=1)[0]
@@ -0,0 +1,149 @@
+"""
+Outbox of new answer emails.
+
+Request only inserts an outbox row, `send_notifications` command sends
+queued emails over one mail connection. Pending answers to the same
+question are coalesced into one digest email per recipient.
+"""
+import logging
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+
+from .models import AnswerNotification
+
+logger = logging.getLogger(__name__)
+
+
+def queue_new_answer_notification(request, question, answer):
+    AnswerNotification.objects.create(
+        recipient_id=question.author_id,
+        question=question,
+        answer=answer,
+        url=request.build_absolute_uri(question.url),
+    )
+
+
+def make_message(notifications):
+    """
+    Build email about one or more new answers to the same question.
+    """
+    first = notifications[0]
+    question = first.question
+    if len(notifications) == 1:
+        subject = _('You have new answer for your question')
+        body = _('{} answered to your question `{}`.\nYou can read answer by link: {}').format(
+            first.answer.author.username, question.title, first.url)
+    else:
+        authors = ', '.join(OrderedDict.fromkeys(
+            notification.answer.author.username for notification in notifications))
+        subject = _('You have {} new answers for your question').format(len(notifications))
+        body = _('{} answered to your question `{}`.\nYou can read answers by link: {}').format(
+            authors, question.title, first.url)
+    return EmailMessage(subject, body, settings.EMAIL_HOST_USER, [first.recipient.email])
+
+
+def claim_notifications(batch_size, now):
+    """
+    Lease ready notifications for ANSWER_NOTIFICATION_LEASE seconds in a short
+    transaction, return them grouped by recipient and question. Groups older
+    than ANSWER_NOTIFICATION_DIGEST_DELAY are taken from the first `batch_size`
+    ready notifications and claimed whole, so a digest is never split.
+    """
+    cutoff = now - timedelta(seconds=settings.ANSWER_NOTIFICATION_DIGEST_DELAY)
+    ready = (AnswerNotification.objects
+             .filter(attempts__lt=settings.ANSWER_NOTIFICATION_MAX_ATTEMPTS)
+             .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+             .filter(Q(locked_until__isnull=True) | Q(locked_until__lte=now)))
+    with transaction.atomic():
+        first_dates = OrderedDict()
+        for recipient_id, question_id, created_at in (
+                ready.select_for_update(skip_locked=True).order_by('pk')
+                .values_list('recipient_id', 'question_id', 'created_at')[:batch_size]):
+            first_dates.setdefault((recipient_id, question_id), created_at)
+        lookup = Q()
+        for (recipient_id, question_id), created_at in first_dates.items():
+            if created_at <= cutoff:
+                lookup |= Q(recipient_id=recipient_id, question_id=question_id)
+        if not lookup:
+            return []
+        notifications = list(ready.filter(lookup)
+                             .select_for_update(skip_locked=True, of=('self',))
+                             .select_related('recipient', 'question', 'answer__author')
+                             .order_by('pk'))
+        AnswerNotification.objects.filter(
+            pk__in=[notification.pk for notification in notifications]).update(
+            locked_until=now + timedelta(seconds=settings.ANSWER_NOTIFICATION_LEASE))
+    groups = OrderedDict()
+    for notification in notifications:
+        key = notification.recipient_id, notification.question_id
+        groups.setdefault(key, []).append(notification)
+    return list(groups.values())
+
+
+def send_notifications(batch_size=100, connection=None):
+    """
+    Send queued notifications until no ready ones remain,
+    return number of sent emails.
+    Notifications are claimed and removed from outbox in short transactions,
+    emails are sent between them, so a slow mail server holds no locks.
+    Notification is removed only after its email is sent (email of worker
+    stopped in between is sent again after the lease expires).
+    Failed email is logged and retried later with exponential backoff,
+    other emails are sent anyway.
+    """
+    connection = connection or get_connection()
+    opened = False
+    sent = 0
+    try:
+        while True:
+            now = timezone.now()
+            groups = claim_notifications(batch_size, now)
+            if not groups:
+                break
+            if not opened:
+                try:
+                    connection.open()
+                except Exception:
+                    # Mail server is down, nothing is counted as attempt
+                    logger.exception('Can not connect to mail server')
+                    AnswerNotification.objects.filter(
+                        pk__in=[notification.pk for notifications in groups
+                                for notification in notifications]).update(locked_until=None)
+                    break
+                opened = True
+            sent_ids = []
+            for notifications in groups:
+                try:
+                    connection.send_messages([make_message(notifications)])
+                except Exception as e:
+                    notification_failed(notifications, e, now)
+                else:
+                    sent_ids += [notification.pk for notification in notifications]
+                    sent += 1
+            AnswerNotification.objects.filter(pk__in=sent_ids).delete()
+    finally:
+        if opened:
+            connection.close()
+    return sent
+
+
+def notification_failed(notifications, error, now):
+    attempts = max(notification.attempts for notification in notifications) + 1
+    if attempts < settings.ANSWER_NOTIFICATION_MAX_ATTEMPTS:
+        logger.warning('Sending of notifications %s failed (attempt %s): %r',
+                       [notification.pk for notification in notifications], attempts, error)
+    else:
+        logger.error('Sending of notifications %s failed %s times, giving up: %r',
+                     [notification.pk for notification in notifications], attempts, error)
+    delay = settings.ANSWER_NOTIFICATION_RETRY_DELAY * 2 ** (attempts - 1)
+    AnswerNotification.objects.filter(
+        pk__in=[notification.pk for notification in notifications]).update(
+        attempts=attempts, last_error=repr(error), retry_at=now + timedelta(seconds=delay),
+        locked_until=None)
@@ -0,0 +1,128 @@
+"""
+Full-page cache of anonymous GET requests.
+
+Key of a cached page contains path with query string and generations
+of its dependencies: all question lists or a single question.
+A change of question increases generations of the question and the lists,
+so only pages showing it are rendered again. Pages of authenticated users
+and pages with CSRF token are not cached.
+"""
+import hashlib
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+KEY_PREFIX = 'page_cache'
+LISTS = 'lists'
+
+
+def question_dependency(pk):
+    return 'question:{}'.format(pk)
+
+
+def get_slug_key(slug):
+    return '{}:slug:{}'.format(KEY_PREFIX, hashlib.md5(slug.encode()).hexdigest())
+
+
+def question_dependency_by_slug(slug):
+    """
+    Return dependency of question page by slug, slug is never changed
+    so its primary key is cached until the question is deleted.
+    """
+    key = get_slug_key(slug)
+    pk = cache.get(key)
+    if pk is None:
+        Question = apps.get_model('question', 'Question')
+        pk = Question.objects.filter(slug=slug).values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        cache.set(key, pk, timeout=None)
+    return question_dependency(pk)
+
+
+def question_deleted(question):
+    cache.delete(get_slug_key(question.slug))
+
+
+def get_generation_key(dependency):
+    return '{}:gen:{}'.format(KEY_PREFIX, dependency)
+
+
+def new_generation():
+    # Generation lost by cache eviction is restarted from unused value
+    return int(time.time() * 1000)
+
+
+def get_generations(dependencies):
+    keys = [get_generation_key(dependency) for dependency in dependencies]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, new_generation(), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def get_page_key(request, dependencies):
+    generations = get_generations([dependency for dependency in dependencies if dependency])
+    token = '{}:{}'.format(request.get_full_path(), generations)
+    return '{}:page:{}'.format(KEY_PREFIX, hashlib.md5(token.encode()).hexdigest())
+
+
+def invalidate(dependencies):
+    for key in [get_generation_key(dependency) for dependency in dependencies]:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_generation(), timeout=None)
+
+
+def questions_changed(pks):
+    """
+    Invalidate pages of questions and all question lists.
+    It is invalidated again after commit, so a page rendered
+    by concurrent request before commit is not kept.
+    """
+    dependencies = [LISTS] + [question_dependency(pk) for pk in set(pks)]
+    invalidate(dependencies)
+    transaction.on_commit(lambda: invalidate(dependencies))
+
+
+def is_cacheable(request, response):
+    return (response.status_code == 200
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED'))
+
+
+class AnonymousPageCacheMixin:
+    """
+    View mixin which caches pages of anonymous users.
+    """
+    page_cache_timeout = None
+
+    def get_page_dependencies(self):
+        return [LISTS]
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+
+        key = get_page_key(request, self.get_page_dependencies())
+        response = cache.get(key)
+        if response is not None:
+            return response
+
+        timeout = self.page_cache_timeout or settings.PAGE_CACHE_TIMEOUT
+        def store(response):
+            if is_cacheable(request, response):
+                cache.set(key, response, timeout)
+
+        response = super().dispatch(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
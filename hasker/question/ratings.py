@@ -0,0 +1,276 @@
+"""
+Write-behind buffer of rating deltas.
+
+In buffered mode (RATING_BUFFER_ENABLED setting) votes do not update rating
+column of a voted object. Every committed vote is appended to an event log
+in cache and added to pending up/down counters of the object, a periodic
+flusher (`flush_rating_buffer` command) applies the logged deltas
+to the database in batches. Sequence number of the last applied event is
+saved with ratings, so an interrupted flush never applies events twice.
+Event is written to its slot before it is added to counters, so a vote
+lost between them never stays in counters; flush recomputes ratings
+from votes when it skips a lost slot. Counters and slots expire after
+RATING_BUFFER_TIMEOUT seconds, so counters can't drift for long.
+
+Cache from RATING_BUFFER_CACHE must be shared between all workers
+(memcached, redis, database cache).
+"""
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+from . import trending
+
+KEY_PREFIX = 'rating_buffer'
+SEQ_KEY = KEY_PREFIX + ':seq'
+FLUSHED_KEY = KEY_PREFIX + ':flushed'
+MISSING_KEY = KEY_PREFIX + ':missing'
+LOCK_KEY = KEY_PREFIX + ':lock'
+LOCK_TIMEOUT = 300
+
+
+def is_enabled():
+    return settings.RATING_BUFFER_ENABLED
+
+
+class RatingBuffer:
+
+    def __init__(self, cache=None):
+        self.cache = cache or caches[settings.RATING_BUFFER_CACHE]
+
+    @staticmethod
+    def counter_keys(label, pk):
+        # Counters only grow between flushes, memcached can't store negative
+        key = '{}:{}:{}'.format(KEY_PREFIX, label, pk)
+        return key + ':up', key + ':down'
+
+    @staticmethod
+    def slot_key(seq):
+        return '{}:slot:{}'.format(KEY_PREFIX, seq)
+
+    def incr(self, key, delta=1, timeout=None):
+        self.cache.add(key, 0, timeout=timeout)
+        return self.cache.incr(key, delta)
+
+    def add(self, instance, delta):
+        label = instance._meta.label_lower
+        timeout = settings.RATING_BUFFER_TIMEOUT
+        seq = self.incr(SEQ_KEY)
+        self.cache.set(self.slot_key(seq), (label, instance.pk, delta), timeout=timeout)
+        up_key, down_key = self.counter_keys(label, instance.pk)
+        self.incr(up_key if delta > 0 else down_key, abs(delta), timeout)
+
+    def get_pending(self, instances):
+        """
+        Return dict {pk: pending rating delta} for instances of the same model.
+        """
+        if not instances:
+            return {}
+        label = instances[0]._meta.label_lower
+        keys = {instance.pk: self.counter_keys(label, instance.pk) for instance in instances}
+        values = self.cache.get_many([key for pair in keys.values() for key in pair])
+        return {pk: values.get(up_key, 0) - values.get(down_key, 0)
+                for pk, (up_key, down_key) in keys.items()}
+
+    def read_events(self, first, last):
+        """
+        Return contiguous events from slots `first`..`last`, their keys
+        and number of skipped slots. Reading stops on a missing slot
+        (its vote may still be writing it), slot which is missing
+        on two flushes in a row is skipped.
+        """
+        slot_keys = [self.slot_key(seq) for seq in range(first, last + 1)]
+        events = self.cache.get_many(slot_keys)
+        consumed = []
+        for key in slot_keys:
+            if key not in events:
+                if self.cache.get(MISSING_KEY) != key:
+                    self.cache.set(MISSING_KEY, key, timeout=None)
+                    break
+            consumed.append(key)
+        return ([events[key] for key in consumed if key in events], consumed,
+                len(consumed) - len([key for key in consumed if key in events]))
+
+    def apply(self, events, applied):
+        """
+        Apply rating deltas to database grouping objects with equal delta
+        into single UPDATE query and save sequence number `applied`
+        of the last event in the same transaction.
+        """
+        totals = self.get_totals(events)
+        updates = defaultdict(list)
+        for (label, pk), (up, down) in totals.items():
+            if up != down:
+                updates[label, up - down].append(pk)
+        with transaction.atomic():
+            state = apps.get_model('question', 'RatingBufferState').get(lock=True)
+            for (label, delta), pks in updates.items():
+                model = apps.get_model(label)
+                model.objects.filter(pk__in=pks).update(**model.get_rating_update(delta))
+            self.ratings_changed(updates)
+            state.applied = applied
+            state.save()
+
+    @staticmethod
+    def get_totals(events):
+        totals = defaultdict(lambda: [0, 0])
+        for label, pk, delta in events:
+            totals[label, pk][0 if delta > 0 else 1] += abs(delta)
+        return totals
+
+    @staticmethod
+    def ratings_changed(updates):
+        """
+        Invalidate trending questions and update versions of answer questions
+        after ratings of objects from dict {(label, delta): pks} are changed.
+        """
+        question_pks = [pk for (label, _), pks in updates.items()
+                        if label == 'question.question' for pk in pks]
+        answer_pks = [pk for (label, _), pks in updates.items()
+                      if label == 'question.answer' for pk in pks]
+        Question = apps.get_model('question', 'Question')
+        if question_pks:
+            transaction.on_commit(trending.invalidate)
+        if answer_pks:
+            Answer = apps.get_model('question', 'Answer')
+            Question.bump_versions(Answer.objects.filter(pk__in=answer_pks)
+                                   .values('question_id'))
+
+    def release(self, events, consumed, applied):
+        """
+        Remove applied events from pending counters and the log.
+        """
+        for (label, pk), (up, down) in self.get_totals(events).items():
+            for key, value in zip(self.counter_keys(label, pk), (up, down)):
+                if value:
+                    try:
+                        self.cache.decr(key, value)
+                    except ValueError:
+                        # Counter expired or its vote has not added to it yet
+                        pass
+        self.cache.set(FLUSHED_KEY, applied, timeout=None)
+        self.cache.delete_many(consumed)
+
+    def flush(self, batch_size=1000):
+        """
+        Apply all logged events to database, return number of processed events.
+
+        Events up to the sequence number saved with ratings are never applied
+        again. If the flusher stopped after ratings were committed, their
+        events are only released from counters and log by the next flush.
+        """
+        if not self.cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+            return 0
+        try:
+            processed, skipped = self._flush(batch_size)
+            if skipped:
+                # Objects of lost events are unknown
+                self.fix_ratings(subtract_pending=True)
+            return processed
+        finally:
+            self.cache.delete(LOCK_KEY)
+
+    def _flush(self, batch_size):
+        """
+        Return numbers of processed events and skipped slots.
+        """
+        processed = skipped = 0
+        applied = apps.get_model('question', 'RatingBufferState').get().applied
+        released = self.cache.get(FLUSHED_KEY, 0)
+        seq = self.cache.get(SEQ_KEY, 0)
+        if seq < applied:
+            # The cache was cleared: its events are lost, `reconcile` restores ratings
+            applied = released = 0
+            apps.get_model('question', 'RatingBufferState').objects.update(applied=0)
+        if released < applied:
+            slot_keys = [self.slot_key(seq) for seq in range(released + 1, applied + 1)]
+            self.release(self.cache.get_many(slot_keys).values(), slot_keys, applied)
+        while applied < seq:
+            last = min(seq, applied + batch_size)
+            events, consumed, missing = self.read_events(applied + 1, last)
+            if not consumed:
+                break
+            applied += len(consumed)
+            self.apply(events, applied)
+            self.release(events, consumed, applied)
+            processed += len(events)
+            skipped += missing
+            if applied < last:
+                # Missing slot is read again by the next flush
+                break
+        return processed, skipped
+
+    def fix_ratings(self, subtract_pending=False):
+        """
+        Set ratings of questions and answers which differ from their votes,
+        return number of fixed ratings. With `subtract_pending` votes
+        still pending in counters are not counted.
+        """
+        fixed = 0
+        updates = defaultdict(list)
+        for model in (apps.get_model('question', 'Question'), apps.get_model('question', 'Answer')):
+            label = model._meta.label_lower
+            rows = list(model.objects.with_vote_rating().exclude(rating=F('vote_rating'))
+                        .values_list('pk', 'rating', 'vote_rating'))
+            pending = {}
+            if subtract_pending and rows:
+                pending = self.get_pending([model(pk=pk) for pk, _, _ in rows])
+            for pk, rating, vote_rating in rows:
+                if vote_rating - pending.get(pk, 0) != rating:
+                    updates[label, vote_rating - pending.get(pk, 0)].append(pk)
+        with transaction.atomic():
+            for (label, rating), pks in updates.items():
+                model = apps.get_model(label)
+                fixed += model.objects.filter(pk__in=pks).update(**model.get_rating_set(rating))
+            self.ratings_changed(updates)
+        return fixed
+
+    def reconcile(self, batch_size=1000):
+        """
+        Flush the log, recompute ratings of questions and answers from votes
+        and reset pending counters, return number of fixed ratings.
+
+        Repairs ratings and counters after a cleared cache. Votes made
+        while it runs may be counted twice until the next reconcile.
+        """
+        if not self.cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+            return 0
+        try:
+            self._flush(batch_size)
+            seq = self.cache.get(SEQ_KEY, 0)
+            models = [apps.get_model('question', 'Question'), apps.get_model('question', 'Answer')]
+            with transaction.atomic():
+                state = apps.get_model('question', 'RatingBufferState').get(lock=True)
+                applied = state.applied
+                fixed = self.fix_ratings()
+                state.applied = max(applied, seq)
+                state.save()
+
+            for model in models:
+                pks = list(model.objects.values_list('pk', flat=True))
+                for i in range(0, len(pks), batch_size):
+                    self.cache.delete_many([key for pk in pks[i:i + batch_size] for key in
+                                            self.counter_keys(model._meta.label_lower, pk)])
+            self.cache.set(FLUSHED_KEY, max(applied, seq), timeout=None)
+            self.cache.delete_many([self.slot_key(seq) for seq in range(applied + 1, seq + 1)])
+            return fixed
+        finally:
+            self.cache.delete(LOCK_KEY)
+
+
+def get_rating_buffer():
+    return RatingBuffer()
+
+
+def load_pending_ratings(instances):
+    """
+    Set pending rating delta to instances with single cache request.
+    """
+    instances = list(instances)
+    pending = get_rating_buffer().get_pending(instances) if is_enabled() else {}
+    for instance in instances:
+        instance._pending_rating = pending.get(instance.pk, 0)
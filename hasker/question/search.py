@@ -0,0 +1,210 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Question, SearchIndexEntry
+
+SEARCH_QUERY_MAX_LENGTH = 255
+TAG_QUERY_PREFIX = 'tag:'
+TERM_MAX_LENGTH = SearchIndexEntry._meta.get_field('term').max_length
+
+_word_re = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """
+    Split text into unique normalized (lowercased) terms keeping their order.
+    """
+    terms = []
+    for word in _word_re.findall(text.lower()):
+        term = word[:TERM_MAX_LENGTH]
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def question_terms(question):
+    return tokenize('{} {}'.format(question.title, question.text))
+
+
+class BaseSearchBackend:
+    """
+    Base class for search backends.
+    Subclasses must implement `search_terms` and may implement index hooks.
+    """
+
+    def search(self, query):
+        if not query:
+            return Question.objects.none()
+        query = query[:SEARCH_QUERY_MAX_LENGTH]
+
+        if query.startswith(TAG_QUERY_PREFIX):
+            tag_query = query[len(TAG_QUERY_PREFIX):]
+            if not tag_query:
+                return Question.objects.none()
+            queryset = Question.objects.filter(tags__name__icontains=tag_query).distinct()
+        else:
+            terms = tokenize(query)
+            if not terms:
+                return Question.objects.none()
+            queryset = self.search_terms(terms)
+        return queryset.order_by('-rating', '-pub_date')
+
+    def search_terms(self, terms):
+        raise NotImplementedError('Subclasses of BaseSearchBackend must provide a search_terms() method')
+
+    def index_question(self, question):
+        pass
+
+    def remove_question(self, question):
+        pass
+
+    def index_questions(self, pks):
+        for question in Question.objects.filter(pk__in=pks):
+            self.index_question(question)
+
+    def rebuild(self, chunk_size=500):
+        """
+        Reindex all questions in chunks of `chunk_size` rows.
+        Yields the number of questions indexed after every chunk.
+        """
+        total = 0
+        last_pk = 0
+        while True:
+            pks = list(Question.objects.filter(pk__gt=last_pk).order_by('pk')
+                       .values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            self.index_questions(pks)
+            total += len(pks)
+            last_pk = pks[-1]
+            yield total
+
+
+class InvertedIndexSearchBackend(BaseSearchBackend):
+    """
+    Search over posting lists stored in SearchIndexEntry.
+    Every query term matches all index terms which start with it.
+    """
+
+    def search_terms(self, terms):
+        term_query = Q()
+        for term in terms:
+            term_query |= Q(term__startswith=term)
+        question_ids = SearchIndexEntry.objects.filter(term_query).values('question_id')
+        return Question.objects.filter(pk__in=question_ids)
+
+    def index_question(self, question):
+        terms = set(question_terms(question))
+        entries = question.search_entries.all()
+        existing = set(entries.values_list('term', flat=True))
+        if existing - terms:
+            entries.filter(term__in=existing - terms).delete()
+        SearchIndexEntry.objects.bulk_create([
+            SearchIndexEntry(term=term, question=question)
+            for term in terms - existing
+        ])
+
+    def index_questions(self, pks):
+        SearchIndexEntry.objects.filter(question_id__in=pks).delete()
+        entries = []
+        for question in Question.objects.filter(pk__in=pks).only('title', 'text'):
+            entries.extend(SearchIndexEntry(term=term, question=question)
+                           for term in question_terms(question))
+        SearchIndexEntry.objects.bulk_create(entries)
+
+    def remove_question(self, question):
+        # Entries are removed by cascade with the question
+        pass
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Search over the `search_vector` tsvector column of the question table
+    (covered by a GIN index, see migration 0003_native_search).
+    """
+    config = 'english'
+    vector_sql = (
+        "setweight(to_tsvector(%s, title), 'A') || "
+        "setweight(to_tsvector(%s, text), 'B')"
+    )
+
+    def search_terms(self, terms):
+        tsquery = ' | '.join('{}:*'.format(term) for term in terms)
+        match = RawSQL('{}.search_vector @@ to_tsquery(%s, %s)'.format(Question._meta.db_table),
+                       [self.config, tsquery], output_field=BooleanField())
+        return Question.objects.annotate(search_match=match).filter(search_match=True)
+
+    def index_questions(self, pks):
+        sql = 'UPDATE {} SET search_vector = {} WHERE id = ANY(%s)'.format(
+            Question._meta.db_table, self.vector_sql)
+        with connections['default'].cursor() as cursor:
+            cursor.execute(sql, [self.config, self.config, list(pks)])
+
+    def index_question(self, question):
+        self.index_questions([question.pk])
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """
+    Search over the FTS5 shadow table of questions
+    (created by migration 0003_native_search), rowid is the question id.
+    """
+    fts_table = 'question_question_fts'
+
+    def search_terms(self, terms):
+        match = ' OR '.join('"{}"*'.format(term) for term in terms)
+        where = '{0}.id IN (SELECT rowid FROM {1} WHERE {1} MATCH %s)'.format(
+            Question._meta.db_table, self.fts_table)
+        return Question.objects.extra(where=[where], params=[match])
+
+    def index_questions(self, pks):
+        pks = list(pks)
+        connection = connections['default']
+        # One parameter per question, chunks fit the limit of SQLite
+        chunk_size = connection.features.max_query_params
+        with connection.cursor() as cursor:
+            for i in range(0, len(pks), chunk_size):
+                chunk = pks[i:i + chunk_size]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute('DELETE FROM {} WHERE rowid IN ({})'.format(
+                    self.fts_table, placeholders), chunk)
+                cursor.execute(
+                    'INSERT INTO {} (rowid, title, text) SELECT id, title, text '
+                    'FROM {} WHERE id IN ({})'.format(
+                        self.fts_table, Question._meta.db_table, placeholders), chunk)
+
+    def index_question(self, question):
+        self.index_questions([question.pk])
+
+    def remove_question(self, question):
+        with connections['default'].cursor() as cursor:
+            cursor.execute('DELETE FROM {} WHERE rowid = %s'.format(self.fts_table),
+                           [question.pk])
+
+
+DATABASE_SEARCH_BACKENDS = {
+    'postgresql': 'hasker.question.search.PostgresSearchBackend',
+    'sqlite': 'hasker.question.search.SQLiteFTSSearchBackend',
+}
+DEFAULT_SEARCH_BACKEND = 'hasker.question.search.InvertedIndexSearchBackend'
+
+
+def get_search_backend():
+    """
+    Return backend from SEARCH_BACKEND setting or,
+    if it is not set, select it by the default database engine.
+    """
+    backend = settings.SEARCH_BACKEND
+    if not backend:
+        vendor = connections['default'].vendor
+        backend = DATABASE_SEARCH_BACKENDS.get(vendor, DEFAULT_SEARCH_BACKEND)
+    return import_string(backend)()
+
+
+def search_questions(query):
+    return get_search_backend().search(query)
@@ -0,0 +1,73 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Answer, Question, Tag
+from . import pagecache, tagging, trending
+from .search import get_search_backend
+
+
+SEARCH_INDEX_FIELDS = {'title', 'text'}
+
+
+@receiver(post_save, sender=Question)
+def update_question_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and not SEARCH_INDEX_FIELDS & set(update_fields)):
+        return
+    get_search_backend().index_question(instance)
+
+
+@receiver(post_delete, sender=Question)
+def remove_question_search_index(sender, instance, **kwargs):
+    get_search_backend().remove_question(instance)
+
+
+@receiver(post_save, sender=Answer)
+def increase_question_answer_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Question.change_answer_count(instance.question_id, 1)
+
+
+@receiver(post_save, sender=Answer)
+def update_question_version(sender, instance, created, raw=False, **kwargs):
+    # New answer changes version with answer_count
+    if not created and not raw:
+        Question.bump_versions([instance.question_id])
+
+
+@receiver(post_delete, sender=Answer)
+def decrease_question_answer_count(sender, instance, **kwargs):
+    if not getattr(instance, 'question_deleted', False):
+        Question.change_answer_count(instance.question_id, -1)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_trending_questions(sender, instance, raw=False, **kwargs):
+    if not raw:
+        trending.questions_changed([instance])
+
+
+@receiver(post_save, sender=Question)
+def invalidate_question_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        pagecache.questions_changed([instance.pk])
+
+
+@receiver(post_delete, sender=Question)
+def invalidate_deleted_question_pages(sender, instance, **kwargs):
+    pagecache.question_deleted(instance)
+    pagecache.questions_changed([instance.pk])
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def invalidate_answer_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        pagecache.questions_changed([instance.question_id])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_fragments(sender, instance, raw=False, **kwargs):
+    if not raw:
+        tagging.tags_changed()
@@ -0,0 +1,60 @@
+"""
+Resolution of tag names to Tag objects with a constant number of queries.
+"""
+from django.apps import apps
+from django.core.cache import cache
+
+from . import pagecache
+
+VERSION_KEY = 'tags:version'
+
+
+def get_tags_version():
+    """
+    Version of all tag names, part of keys of fragments showing tags.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = pagecache.new_generation()
+        cache.add(VERSION_KEY, version, timeout=None)
+    return version
+
+
+def tags_changed():
+    cache.set(VERSION_KEY, pagecache.new_generation(), timeout=None)
+    pagecache.invalidate([pagecache.LISTS])
+
+
+def get_or_create_tags(names):
+    """
+    Return tags with given names in the same order without duplicates.
+    Existing tags are fetched with one query, missing ones are created
+    with one bulk insert which ignores tags created concurrently.
+    """
+    Tag = apps.get_model('question', 'Tag')
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tags.update((tag.name, tag) for tag in Tag.objects.filter(name__in=missing))
+    return [tags[name] for name in names]
+
+
+def add_question_tags(question, names):
+    """
+    Add tags with given names to question, relations are inserted in bulk
+    and version of the question is increased.
+    """
+    tags = get_or_create_tags(names)
+    if not tags:
+        return []
+    Through = question.tags.through
+    Through.objects.bulk_create([
+        Through(question_id=question.pk, tag_id=tag.pk) for tag in tags
+    ], ignore_conflicts=True)
+    type(question).bump_versions([question.pk])
+    pagecache.questions_changed([question.pk])
+    return tags
@@ -1,20 +1,19 @@
 from datetime import timedelta
 
 from django import template
-from django.conf import settings
 from django.utils import timezone
+from django.utils.safestring import mark_safe
 from django.utils.timesince import timesince
 from django.utils.translation import ugettext_lazy as _
 
-from ..models import Question
+from .. import trending
 
 register = template.Library()
 
 
-@register.inclusion_tag('question/partials/trending_list.html')
+@register.simple_tag
 def trending_questions_block():
-    questions = Question.objects.popular()[:settings.TRENDING_QUESTIONS_LIMIT]
-    return {'questions': questions}
+    return mark_safe(trending.render_trending_questions())
 
 
 @register.filter
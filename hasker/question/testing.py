@@ -0,0 +1,40 @@
+"""
+Data of query budget tests of question, API and account views.
+"""
+from django.contrib.auth import get_user_model
+
+from hasker.core.testing import QueryBudgetTestCase
+
+from .models import Answer, Question, Tag
+
+User = get_user_model()
+
+
+class QuestionRowsTestCase(QueryBudgetTestCase):
+    """
+    `create_rows(size)` adds users, each with own question tagged with
+    common and own tags, answer to the main question and votes.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username='author', email='author@example.com')
+        self.question = Question.objects.create(title='Main question', author=self.user)
+        self.tags = [Tag.objects.create(name='tag{}'.format(i)) for i in range(3)]
+        self.users = []
+        self.questions = []
+        self.answers = []
+
+    def create_rows(self, size):
+        for i in range(len(self.questions), size):
+            user = User.objects.create(username='user{}'.format(i),
+                                       email='user{}@example.com'.format(i))
+            question = Question.objects.create(title='Question {}'.format(i), author=user)
+            question.tags.add(*self.tags[:3], Tag.objects.create(name='extra{}'.format(i)))
+            answer = Answer.objects.create(text='Answer', author=user, question=self.question)
+            self.question.vote(user, True)
+            answer.vote(self.user, True)
+            self.users.append(user)
+            self.questions.append(question)
+            self.answers.append(answer)
+        # Every run marks the last answer of the main question
+        Question.objects.filter(pk=self.question.pk).update(correct_answer=None)
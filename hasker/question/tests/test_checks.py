@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..checks import check_shared_cache
+
+LOCMEM = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+MEMCACHED = {'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+             'LOCATION': '127.0.0.1:11211'}
+
+
+class TestSharedCacheCheck(SimpleTestCase):
+
+    @override_settings(CACHES={'default': LOCMEM})
+    def test_local_cache(self):
+        errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['question.E001'])
+
+    @override_settings(CACHES={'default': MEMCACHED, 'votes': LOCMEM},
+                       RATING_BUFFER_ENABLED=True, RATING_BUFFER_CACHE='votes')
+    def test_local_rating_buffer_cache(self):
+        errors = check_shared_cache(None)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("'votes'", errors[0].msg)
+
+    @override_settings(CACHES={'default': MEMCACHED})
+    def test_shared_cache(self):
+        self.assertEqual(check_shared_cache(None), [])
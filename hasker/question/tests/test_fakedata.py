@@ -0,0 +1,81 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, F, Q, Sum
+from django.test import TestCase
+
+from ..fakedata import FakeDataGenerator
+from ..models import Answer, Question, Tag, Vote
+from ..search import search_questions
+
+User = get_user_model()
+
+
+class TestFakeDataGenerator(TestCase):
+
+    def setUp(self):
+        self.generator = FakeDataGenerator(users=20, tags=10, questions=30, answers=100,
+                                           votes=400, batch_size=7)
+        list(self.generator.generate())
+
+    def assert_ratings_match_votes(self, model):
+        for obj in model.objects.all():
+            votes = obj.votes.aggregate(up=Count('pk', filter=Q(vote=True)),
+                                        down=Count('pk', filter=Q(vote=False)))
+            self.assertEqual(obj.rating, votes['up'] - votes['down'])
+
+    def test_rows_are_created(self):
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Tag.objects.count(), 10)
+        self.assertEqual(Question.objects.count(), 30)
+        self.assertEqual(Answer.objects.count(), 100)
+        self.assertEqual(Vote.objects.count(), self.generator.counts['votes'])
+        self.assertGreater(self.generator.counts['votes'], 200)
+
+    def test_denormalized_fields_are_consistent(self):
+        self.assert_ratings_match_votes(Question)
+        self.assert_ratings_match_votes(Answer)
+        for question in Question.objects.annotate(answers=Count('answer')):
+            self.assertEqual(question.answer_count, question.answers)
+            self.assertTrue(1 <= question.tags.count() <= 3)
+            if question.correct_answer_id:
+                answer = question.correct_answer
+                self.assertEqual(answer.question_id, question.pk)
+                self.assertNotEqual(answer.author_id, question.author_id)
+        self.assertEqual(Question.objects.aggregate(total=Sum('answer_count'))['total'], 100)
+
+    def test_votes_are_not_own(self):
+        for model in (Question, Answer):
+            self.assertFalse(model.objects.filter(votes__user=F('author')).exists())
+
+    def test_questions_are_indexed_and_dated(self):
+        question = Question.objects.order_by('?').first()
+        self.assertIn(question, search_questions(question.title.split()[0]))
+        pub_dates = list(Question.objects.order_by('pk').values_list('pub_date', flat=True))
+        self.assertEqual(pub_dates, sorted(pub_dates))
+        self.assertGreater(pub_dates[-1] - pub_dates[0], timedelta(days=300))
+        self.assertTrue(Question._meta.get_field('pub_date').auto_now_add)
+
+    def test_answers_are_dated_after_questions(self):
+        self.assertFalse(Answer.objects.filter(pub_date__lt=F('question__pub_date')).exists())
+        self.assertFalse(Answer.objects.exclude(version=1).exists())
+        for question in Question.objects.filter(answer_count__gt=0):
+            self.assertEqual(question.updated_at,
+                             question.answer_set.order_by('-pub_date')[0].pub_date)
+
+    def test_usernames_continue_after_deleted_users(self):
+        User.objects.filter(username=self.generator.username_prefix + '3').delete()
+        generator = FakeDataGenerator(users=5, tags=0, questions=0, answers=0, votes=0)
+        list(generator.generate())
+        self.assertEqual(User.objects.count(), 24)
+        self.assertTrue(User.objects.filter(
+            username=self.generator.username_prefix + '24').exists())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('generate_fake_data', users=2, tags=2, questions=3, answers=3,
+                     votes=3, seed=1, stdout=out)
+        self.assertEqual(Question.objects.count(), 33)
+        self.assertIn('3 questions', out.getvalue())
@@ -1,10 +1,20 @@
+import threading
+import time
 from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 
-from ..models import Question, Answer
+from ..models import Question, Answer, Tag, Vote, get_hot_score
+from ..ratings import RatingBuffer
+from ..tagging import add_question_tags
 
 User = get_user_model()
 
@@ -35,6 +45,43 @@ class TestQuestionModel(TestCase):
         self.assertNotEqual(question1.get_absolute_url(),
                             question2.get_absolute_url())
 
+    def test_slug_gets_next_free_suffix_with_one_query(self):
+        for i in range(5):
+            Question.objects.create(title='To be or not to be?', author=self.user)
+        Question.objects.get(slug='to-be-or-not-to-be-2').delete()
+        Question.objects.create(title='To be or not to be, again?', author=self.user)
+
+        question = Question(title='To be or not to be?', author=self.user)
+        with self.assertNumQueries(1):
+            slug = question.slugify(question.title)
+        self.assertEqual(slug, 'to-be-or-not-to-be-5')
+
+    def test_long_slug_is_truncated_to_fit_suffix(self):
+        title = 'a' * 100
+        question1 = Question.objects.create(title=title, author=self.user)
+        question2 = Question.objects.create(title=title, author=self.user)
+        max_length = Question._meta.get_field('slug').max_length
+        self.assertEqual(question1.slug, 'a' * max_length)
+        self.assertEqual(question2.slug, 'a' * (max_length - 2) + '-1')
+
+    def test_long_slug_suffix_grows_past_nine(self):
+        title = 'a' * 100
+        for i in range(11):
+            Question.objects.create(title=title, author=self.user)
+        max_length = Question._meta.get_field('slug').max_length
+        question = Question(title=title, author=self.user)
+        with self.assertNumQueries(1):
+            slug = question.slugify(question.title)
+        self.assertEqual(slug, 'a' * (max_length - 3) + '-11')
+
+    def test_save_retries_slug_taken_by_concurrent_insert(self):
+        Question.objects.create(title='To be or not to be?', author=self.user)
+        question = Question(title='To be or not to be?', author=self.user)
+        slugs = iter(['to-be-or-not-to-be', 'to-be-or-not-to-be-1'])
+        question.slugify = lambda string: next(slugs)
+        question.save()
+        self.assertEqual(question.slug, 'to-be-or-not-to-be-1')
+
     def test_author_cannot_vote_for_own_question(self):
         question = Question.objects.create(
             title='To be or not to be?',
@@ -94,6 +141,105 @@ class TestQuestionModel(TestCase):
         )
 
 
+class TestQuestionHotScore(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='test1')
+        self.other_user = User.objects.create(username='test2')
+
+    def test_vote_updates_hot_score(self):
+        question = Question.objects.create(title='Question', author=self.user)
+        # Score of a new question is computed just before its pub_date is set
+        self.assertAlmostEqual(question.hot_score, get_hot_score(0, question.pub_date), places=4)
+        question.vote(self.other_user, True)
+        self.assertAlmostEqual(question.hot_score, get_hot_score(1, question.pub_date), places=4)
+        self.assertEqual(Question.objects.get(pk=question.pk).hot_score,
+                         question.hot_score)
+
+    def test_hot_score_of_rating_update_keeps_time_offset(self):
+        question = Question.objects.create(title='Question', author=self.user, rating=3)
+        for delta in (-1, -2, -1, -5, 4, 12):
+            Question.objects.filter(pk=question.pk).update(**Question.get_rating_update(delta))
+            question.refresh_from_db()
+            self.assertAlmostEqual(question.hot_score,
+                                   get_hot_score(question.rating, question.pub_date), places=4)
+        self.assertEqual(question.rating, 10)
+
+    def test_old_questions_rank_below_new_ones_without_decay(self):
+        old = Question.objects.create(title='Old', author=self.user, rating=10)
+        new = Question.objects.create(title='New', author=self.user, rating=2)
+        self.assertEqual(list(Question.objects.popular()), [old, new])
+
+        old.pub_date = timezone.now() - timedelta(days=3)
+        old.save()
+        self.assertEqual(list(Question.objects.popular()), [new, old])
+
+
+class TestQuestionAnswerCount(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username='test1',
+            email='test1@example.com',
+            password='secret'
+        )
+        self.question = Question.objects.create(
+            title='To be or not to be?',
+            author=self.user)
+
+    def get_answer_count(self):
+        return Question.objects.get(pk=self.question.pk).answer_count
+
+    def test_answer_count_follows_answers_create_and_delete(self):
+        answer1 = Answer.objects.create(
+            text='Answer 1', question=self.question, author=self.user)
+        Answer.objects.create(
+            text='Answer 2', question=self.question, author=self.user)
+        self.assertEqual(self.get_answer_count(), 2)
+
+        answer1.delete()
+        self.assertEqual(self.get_answer_count(), 1)
+
+    def test_stale_question_save_keeps_answer_count(self):
+        Answer.objects.create(
+            text='Answer', question=self.question, author=self.user)
+        self.question.vote(User.objects.create(username='test2'), True)
+        self.assertEqual(self.get_answer_count(), 1)
+
+    def test_recount_answers_command(self):
+        Answer.objects.create(
+            text='Answer', question=self.question, author=self.user)
+        Question.objects.update(answer_count=10)
+
+        call_command('recount_answers', stdout=StringIO())
+        self.assertEqual(self.get_answer_count(), 1)
+
+
+class TestQuestionTags(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username='test1',
+            email='test1@example.com',
+            password='secret'
+        )
+        Tag.objects.create(name='python')
+
+    def test_save_reuses_existing_and_creates_missing_tags(self):
+        question = Question(title='To be or not to be?', author=self.user)
+        question.save(tags=['python', 'django', 'python'])
+        self.assertEqual(sorted(question.tags.values_list('name', flat=True)),
+                         ['django', 'python'])
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_tags_are_saved_with_constant_number_of_queries(self):
+        question = Question.objects.create(title='To be or not to be?', author=self.user)
+        # Fetch existing, create missing, fetch created, insert relations, bump version
+        with self.assertNumQueries(5):
+            add_question_tags(question, ['python', 'django', 'orm'])
+        self.assertEqual(question.tags.count(), 3)
+
+
 class TestAnswerModel(TestCase):
 
     def setUp(self):
@@ -194,3 +340,160 @@ class TestAnswerModel(TestCase):
         answer.vote(self.other_user, False)
         rating_new = answer.rating
         self.assertNotEqual(rating_old, rating_new)
+
+
+class TestConcurrentVotes(TransactionTestCase):
+    threads_count = 8
+    votes_per_thread = 9
+    retries = 100
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.voters = [User.objects.create(username='voter{}'.format(i))
+                       for i in range(self.threads_count)]
+        self.question = Question.objects.create(title='Question', author=self.author)
+
+    def retry(self, func):
+        for attempt in range(self.retries):
+            try:
+                return func()
+            except DatabaseError as e:
+                # Query is not committed (e.g. SQLite table lock)
+                error = e
+                time.sleep(0.001)
+        raise error
+
+    def vote_many_times(self, user, errors):
+        try:
+            question = self.retry(lambda: Question.objects.get(pk=self.question.pk))
+            for i in range(self.votes_per_thread):
+                self.retry(lambda: question.vote(user, bool(i % 3)))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    def test_rating_equals_net_of_committed_votes(self):
+        errors = []
+        threads = [threading.Thread(target=self.vote_many_times, args=(user, errors))
+                   for user in self.voters]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        votes = Vote.objects.filter(questions=self.question)
+        net = votes.filter(vote=True).count() - votes.filter(vote=False).count()
+        self.assertEqual(Question.objects.get(pk=self.question.pk).rating, net)
+        self.assertLessEqual(votes.count(), self.threads_count)
+
+
+@override_settings(RATING_BUFFER_ENABLED=True)
+class TestRatingBuffer(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='test1')
+        self.other_user = User.objects.create(username='test2')
+        self.third_user = User.objects.create(username='test3')
+        self.question = Question.objects.create(title='Question', author=self.user)
+        self.answer = Answer.objects.create(
+            text='Answer', question=self.question, author=self.user)
+
+    def test_vote_is_recorded_and_rating_is_buffered(self):
+        self.assertTrue(self.question.vote(self.other_user, True))
+        self.assertTrue(self.question.vote(self.third_user, True))
+
+        self.assertEqual(Vote.objects.count(), 2)
+        question = Question.objects.get(pk=self.question.pk)
+        self.assertEqual(question.rating, 0)
+        self.assertEqual(question.current_rating, 2)
+        self.assertEqual(self.question.current_rating, 2)
+
+    def test_flush_applies_buffered_deltas(self):
+        self.question.vote(self.other_user, True)
+        self.question.vote(self.third_user, False)
+        self.question.vote(self.third_user, True)
+        self.answer.vote(self.other_user, False)
+
+        call_command('flush_rating_buffer', stdout=StringIO())
+
+        question = Question.objects.get(pk=self.question.pk)
+        answer = Answer.objects.get(pk=self.answer.pk)
+        self.assertEqual((question.rating, question.current_rating), (1, 1))
+        self.assertEqual((answer.rating, answer.current_rating), (-1, -1))
+
+        # Nothing is applied twice
+        call_command('flush_rating_buffer', stdout=StringIO())
+        self.assertEqual(Question.objects.get(pk=self.question.pk).rating, 1)
+
+    def test_flush_stopped_after_commit_does_not_apply_votes_twice(self):
+        self.question.vote(self.other_user, True)
+        self.answer.vote(self.other_user, False)
+
+        buffer = RatingBuffer()
+        with mock.patch.object(buffer.cache, 'decr', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                buffer.flush()
+        question = Question.objects.get(pk=self.question.pk)
+        self.assertEqual((question.rating, question.current_rating), (1, 2))
+
+        call_command('flush_rating_buffer', stdout=StringIO())
+        question = Question.objects.get(pk=self.question.pk)
+        answer = Answer.objects.get(pk=self.answer.pk)
+        self.assertEqual((question.rating, question.current_rating), (1, 1))
+        self.assertEqual((answer.rating, answer.current_rating), (-1, -1))
+
+    def test_vote_lost_before_its_slot_is_written_does_not_stay_pending(self):
+        self.question.vote(self.other_user, True)
+        buffer_cache = RatingBuffer().cache
+        # Worker stops after the slot number is taken
+        with mock.patch.object(buffer_cache, 'set', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.question.vote(self.third_user, True)
+        self.assertEqual(Vote.objects.count(), 2)
+        self.assertEqual(Question.objects.get(pk=self.question.pk).current_rating, 1)
+
+        call_command('flush_rating_buffer', stdout=StringIO())
+        question = Question.objects.get(pk=self.question.pk)
+        self.assertEqual((question.rating, question.current_rating), (1, 1))
+        # The missing slot is skipped and ratings are recomputed from votes
+        self.answer.vote(self.other_user, True)
+        call_command('flush_rating_buffer', stdout=StringIO())
+        question = Question.objects.get(pk=self.question.pk)
+        answer = Answer.objects.get(pk=self.answer.pk)
+        self.assertEqual((question.rating, question.current_rating), (2, 2))
+        self.assertEqual((answer.rating, answer.current_rating), (1, 1))
+
+    def test_expired_counter_is_not_decremented(self):
+        self.question.vote(self.other_user, True)
+        cache.delete_many(RatingBuffer.counter_keys('question.question', self.question.pk))
+        call_command('flush_rating_buffer', stdout=StringIO())
+        question = Question.objects.get(pk=self.question.pk)
+        self.assertEqual((question.rating, question.current_rating), (1, 1))
+
+    def test_reconcile_recomputes_ratings_from_votes(self):
+        self.question.vote(self.other_user, True)
+        self.question.vote(self.third_user, True)
+        self.answer.vote(self.other_user, True)
+        call_command('flush_rating_buffer', stdout=StringIO())
+        Answer.objects.filter(pk=self.answer.pk).update(rating=10)
+        Question.objects.filter(pk=self.question.pk).update(rating=0)
+        # Counter left from lost events
+        cache.set(RatingBuffer.counter_keys('question.question', self.question.pk)[0], 5)
+
+        out = StringIO()
+        call_command('flush_rating_buffer', '--reconcile', stdout=out)
+        self.assertIn('2 ratings fixed', out.getvalue())
+        question = Question.objects.get(pk=self.question.pk)
+        answer = Answer.objects.get(pk=self.answer.pk)
+        self.assertEqual((question.rating, question.current_rating), (2, 2))
+        self.assertEqual((answer.rating, answer.current_rating), (1, 1))
+        self.assertGreater(question.hot_score, 0)
+
+        # Cancelled vote
+        self.question.vote(self.third_user, False)
+        call_command('flush_rating_buffer', stdout=StringIO())
+        question = Question.objects.get(pk=self.question.pk)
+        self.assertEqual((question.rating, question.current_rating), (1, 1))
@@ -0,0 +1,176 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Answer, AnswerNotification, Question
+from ..notifications import send_notifications
+
+User = get_user_model()
+
+
+class FailingEmailBackend(EmailBackend):
+    """
+    Send the first message and fail on the next ones.
+    """
+
+    def send_messages(self, messages):
+        if mail.outbox:
+            raise ConnectionError('SMTP is down')
+        return super().send_messages(messages)
+
+
+class RejectingEmailBackend(EmailBackend):
+    """
+    Reject messages to rejected@example.com.
+    """
+
+    def send_messages(self, messages):
+        if any('rejected@example.com' in message.to for message in messages):
+            raise SMTPRecipientsRefused({'rejected@example.com': (550, b'Rejected')})
+        return super().send_messages(messages)
+
+
+class RecordingEmailBackend(EmailBackend):
+    """
+    Record the depth of open savepoints on sending.
+    """
+    atomic_depths = []
+
+    def send_messages(self, messages):
+        self.atomic_depths.append(len(connection.savepoint_ids))
+        return super().send_messages(messages)
+
+
+class TestAnswerNotifications(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create(username='author', email='author@example.com')
+        self.users = [User.objects.create(username='user{}'.format(i),
+                                          email='user{}@example.com'.format(i))
+                      for i in range(2)]
+        self.question = Question.objects.create(title='Question 1', author=self.author)
+        self.other_question = Question.objects.create(title='Question 2', author=self.author)
+
+    def post_answer(self, user, question):
+        self.client.force_login(user)
+        self.client.post(question.get_absolute_url(), {'text': 'Answer'})
+
+    def test_answer_is_queued_without_sending_email(self):
+        self.post_answer(self.users[0], self.question)
+        self.assertEqual(len(mail.outbox), 0)
+        notification = AnswerNotification.objects.get()
+        self.assertEqual(notification.recipient, self.author)
+        self.assertEqual(notification.url, 'http://testserver' + self.question.url)
+
+    def test_own_answer_is_not_queued(self):
+        self.post_answer(self.author, self.question)
+        self.assertFalse(AnswerNotification.objects.exists())
+
+    def test_answers_to_the_same_question_are_sent_in_one_email(self):
+        self.post_answer(self.users[0], self.question)
+        self.post_answer(self.users[1], self.question)
+        self.post_answer(self.users[0], self.other_question)
+
+        call_command('send_notifications', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        digest, single = mail.outbox
+        self.assertEqual(digest.to, ['author@example.com'])
+        self.assertIn('2 new answers', digest.subject)
+        self.assertIn('user0, user1', digest.body)
+        self.assertIn('Question 2', single.body)
+        self.assertFalse(AnswerNotification.objects.exists())
+
+    def test_outbox_is_drained_without_splitting_digests(self):
+        for question in [self.question, self.other_question]:
+            for user in self.users:
+                self.post_answer(user, question)
+
+        self.assertEqual(send_notifications(batch_size=1), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertTrue(all('2 new answers' in message.subject for message in mail.outbox))
+        self.assertFalse(AnswerNotification.objects.exists())
+
+    @override_settings(EMAIL_BACKEND='hasker.question.tests.test_notifications.RecordingEmailBackend')
+    def test_emails_are_sent_outside_of_transaction(self):
+        self.post_answer(self.users[0], self.question)
+        self.post_answer(self.users[0], self.other_question)
+        RecordingEmailBackend.atomic_depths = []
+        depth = len(connection.savepoint_ids)
+        self.assertEqual(send_notifications(), 2)
+        self.assertEqual(RecordingEmailBackend.atomic_depths, [depth, depth])
+
+    def test_claimed_notifications_are_not_sent_by_other_worker(self):
+        self.post_answer(self.users[0], self.question)
+        AnswerNotification.objects.update(
+            locked_until=timezone.now() + timedelta(seconds=60))
+        self.assertEqual(send_notifications(), 0)
+        AnswerNotification.objects.update(locked_until=timezone.now())
+        self.assertEqual(send_notifications(), 1)
+
+    @override_settings(ANSWER_NOTIFICATION_DIGEST_DELAY=600)
+    def test_recent_notifications_wait_for_digest_delay(self):
+        self.post_answer(self.users[0], self.question)
+        self.assertEqual(send_notifications(), 0)
+        self.assertEqual(AnswerNotification.objects.count(), 1)
+
+    @override_settings(EMAIL_BACKEND='hasker.question.tests.test_notifications.FailingEmailBackend')
+    def test_failed_emails_stay_in_outbox(self):
+        self.post_answer(self.users[0], self.question)
+        self.post_answer(self.users[0], self.other_question)
+        answer = Answer.objects.get(question=self.other_question)
+
+        with self.assertLogs('hasker.question.notifications', 'WARNING'):
+            self.assertEqual(send_notifications(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        notification = AnswerNotification.objects.get()
+        self.assertEqual(notification.answer, answer)
+        self.assertEqual(notification.attempts, 1)
+        self.assertIn('SMTP is down', notification.last_error)
+        self.assertGreater(notification.retry_at, timezone.now())
+
+    @override_settings(EMAIL_BACKEND='hasker.question.tests.test_notifications.RejectingEmailBackend',
+                       ANSWER_NOTIFICATION_MAX_ATTEMPTS=2)
+    def test_failed_email_does_not_block_others(self):
+        self.users[0].email = 'rejected@example.com'
+        self.users[0].save()
+        self.question.author = self.users[0]
+        self.question.save()
+        self.post_answer(self.users[1], self.question)
+        self.post_answer(self.users[1], self.other_question)
+        self.post_answer(self.users[0], self.other_question)
+
+        with self.assertLogs('hasker.question.notifications', 'WARNING'):
+            self.assertEqual(send_notifications(), 1)
+        self.assertEqual([message.to for message in mail.outbox], [['author@example.com']])
+        failed = AnswerNotification.objects.get()
+        self.assertEqual(failed.recipient, self.users[0])
+
+        # Backoff delays the retry, after the last attempt it is given up
+        self.assertEqual(send_notifications(), 0)
+        AnswerNotification.objects.update(retry_at=timezone.now())
+        with self.assertLogs('hasker.question.notifications', 'ERROR'):
+            self.assertEqual(send_notifications(), 0)
+        AnswerNotification.objects.update(retry_at=timezone.now())
+        self.assertEqual(send_notifications(), 0)
+        self.assertEqual(AnswerNotification.objects.get().attempts, 2)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_worker_keeps_running_on_errors(self):
+        with mock.patch('hasker.question.management.commands.send_notifications.time.sleep',
+                        side_effect=[None, KeyboardInterrupt]), \
+                mock.patch('hasker.question.management.commands.send_notifications.send_notifications',
+                           side_effect=[DatabaseError('database is locked'), 2]):
+            out, err = StringIO(), StringIO()
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('send_notifications', '--interval', '1', stdout=out, stderr=err)
+        self.assertIn('database is locked', err.getvalue())
+        self.assertIn('2 emails sent', out.getvalue())
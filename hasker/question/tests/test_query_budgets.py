@@ -0,0 +1,84 @@
+from django.urls import reverse
+
+from hasker.core.testing import query_budget
+from ..testing import QuestionRowsTestCase
+
+
+class TestQuestionViewsQueryBudget(QuestionRowsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    @query_budget(6)
+    def test_index(self):
+        self.get(reverse('question:index'))
+
+    @query_budget(6)
+    def test_popular(self):
+        self.get(reverse('question:index') + '?sort=popular')
+
+    @query_budget(5)
+    def test_index_cursor(self):
+        self.get(reverse('question:index') + '?cursor=')
+
+    @query_budget(6)
+    def test_search(self):
+        self.get(reverse('question:search') + '?q=question')
+
+    @query_budget(6)
+    def test_tag(self):
+        self.get(self.tags[0].get_search_url())
+
+    @query_budget(7)
+    def test_question(self):
+        self.get(self.question.get_absolute_url())
+
+    @query_budget(3)
+    def test_ask(self):
+        self.get(reverse('question:ask'))
+
+    @query_budget(13)
+    def test_ask_post(self):
+        self.asked = getattr(self, 'asked', 0) + 1
+        response = self.client.post(reverse('question:ask'), {
+            'title': 'Asked question {}'.format(self.asked),
+            'text': 'Text',
+            'tags': 'tag0, new{}'.format(self.asked),
+        })
+        self.assertEqual(response.status_code, 302)
+
+    @query_budget(7)
+    def test_answer_post(self):
+        response = self.client.post(self.questions[-1].get_absolute_url(), {'text': 'Answer'})
+        self.assertEqual(response.status_code, 302)
+
+    @query_budget(11)
+    def test_question_vote(self):
+        response = self.client.post(self.questions[-1].get_vote_url(), {'value': 'true'})
+        self.assertEqual(response.status_code, 200)
+
+    @query_budget(9)
+    def test_answer_vote(self):
+        response = self.client.post(self.answers[-1].get_vote_url(), {'value': 'false'})
+        self.assertEqual(response.status_code, 200)
+
+    @query_budget(10)
+    def test_answer_mark(self):
+        response = self.client.post(self.answers[-1].get_mark_url())
+        self.assertTrue(response.json()['success'])
+
+
+class TestAnonymousQuestionViewsQueryBudget(QuestionRowsTestCase):
+
+    @query_budget(4)
+    def test_index(self):
+        self.assertEqual(self.client.get(reverse('question:index')).status_code, 200)
+
+    @query_budget(6)
+    def test_question(self):
+        self.assertEqual(self.client.get(self.question.get_absolute_url()).status_code, 200)
@@ -0,0 +1,155 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+
+from ..models import Question, SearchIndexEntry
+from ..search import (PostgresSearchBackend, SQLiteFTSSearchBackend, get_search_backend,
+                      search_questions, tokenize)
+
+User = get_user_model()
+
+
+class TestTokenize(TestCase):
+
+    def test_terms_are_normalized_and_unique(self):
+        self.assertEqual(tokenize('Why is SNOW white? Snow!'),
+                         ['why', 'is', 'snow', 'white'])
+
+
+@override_settings(SEARCH_BACKEND='hasker.question.search.InvertedIndexSearchBackend')
+class TestInvertedIndexSearchBackend(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username='test1',
+            email='test1@example.com',
+            password='secret'
+        )
+        self.question = Question.objects.create(
+            title='Snow',
+            text='Why is snow white?',
+            author=self.user)
+
+    def get_terms(self, question):
+        return set(SearchIndexEntry.objects.filter(
+            question=question).values_list('term', flat=True))
+
+    def test_question_is_indexed_on_create(self):
+        self.assertEqual(self.get_terms(self.question),
+                         {'snow', 'why', 'is', 'white'})
+
+    def test_question_is_reindexed_on_change(self):
+        self.question.text = 'Why is snow cold?'
+        self.question.save()
+        self.assertEqual(self.get_terms(self.question),
+                         {'snow', 'why', 'is', 'cold'})
+
+    def test_index_entries_are_removed_with_question(self):
+        self.question.delete()
+        self.assertFalse(SearchIndexEntry.objects.exists())
+
+    def test_search_matches_term_prefix(self):
+        other = Question.objects.create(
+            title='Whiteboard', text='', author=self.user)
+        Question.objects.create(title='Rain', text='', author=self.user)
+        self.assertEqual(set(search_questions('WHITE')), {self.question, other})
+        self.assertEqual(set(search_questions('rain snow')),
+                         set(Question.objects.exclude(pk=other.pk)))
+
+    def test_search_without_terms_returns_nothing(self):
+        self.assertFalse(search_questions('?!'))
+        self.assertFalse(search_questions('tag:'))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite specific backend')
+@override_settings(SEARCH_BACKEND=None)
+class TestSQLiteFTSSearchBackend(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username='test1',
+            email='test1@example.com',
+            password='secret'
+        )
+        self.question = Question.objects.create(
+            title='Snow',
+            text='Why is snow white?',
+            author=self.user)
+
+    def test_backend_is_selected_by_database_engine(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTSSearchBackend)
+
+    def test_search_uses_maintained_index(self):
+        self.assertEqual(list(search_questions('whi')), [self.question])
+
+        self.question.text = 'Why is snow cold?'
+        self.question.save()
+        self.assertFalse(search_questions('white'))
+        self.assertEqual(list(search_questions('cold')), [self.question])
+
+        self.question.delete()
+        self.assertFalse(search_questions('snow'))
+
+    def test_rebuild_search_index_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM {}'.format(SQLiteFTSSearchBackend.fts_table))
+        self.assertFalse(search_questions('snow'))
+
+        out = StringIO()
+        call_command('rebuild_search_index', chunk_size=1, stdout=out)
+        self.assertIn('1 questions', out.getvalue())
+        self.assertEqual(list(search_questions('snow')), [self.question])
+
+    def test_rebuild_chunks_fit_query_parameters_limit(self):
+        for i in range(4):
+            Question.objects.create(title='Snow {}'.format(i), author=self.user)
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM {}'.format(SQLiteFTSSearchBackend.fts_table))
+
+        with mock.patch.object(connection.features, 'max_query_params', 2), \
+                CaptureQueriesContext(connection) as queries:
+            call_command('rebuild_search_index', chunk_size=1000, stdout=StringIO())
+        inserts = [query for query in queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(search_questions('snow').count(), 5)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL specific backend')
+@override_settings(SEARCH_BACKEND=None)
+class TestPostgresSearchBackend(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(
+            username='test1',
+            email='test1@example.com',
+            password='secret'
+        )
+        self.question = Question.objects.create(
+            title='Snow',
+            text='Why is snow white?',
+            author=self.user)
+
+    def test_backend_is_selected_by_database_engine(self):
+        self.assertIsInstance(get_search_backend(), PostgresSearchBackend)
+
+    def test_search_uses_maintained_index(self):
+        other = Question.objects.create(title='Whiteboard', text='', author=self.user)
+        self.assertEqual(set(search_questions('whi')), {self.question, other})
+
+        self.question.text = 'Why is snow cold?'
+        self.question.save()
+        self.assertEqual(list(search_questions('cold')), [self.question])
+        self.assertEqual(list(search_questions('rain snow')), [self.question])
+
+    def test_rebuild_search_index_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE {} SET search_vector = NULL'.format(Question._meta.db_table))
+        self.assertFalse(search_questions('snow'))
+
+        call_command('rebuild_search_index', chunk_size=1, stdout=StringIO())
+        self.assertEqual(list(search_questions('snow')), [self.question])
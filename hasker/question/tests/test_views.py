@@ -1,11 +1,17 @@
 from datetime import datetime, timedelta
 
-from django.test import TestCase
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.urls import reverse
+from django.utils import timezone
 
 from ..models import Question, Answer, Tag
+from .. import pagecache, trending
 
 User = get_user_model()
 
@@ -55,6 +61,23 @@ class TestIndexView(TestCase):
             if questions[i].rating == questions[i+1].rating:
                 self.assertGreater(questions[i].pub_date, questions[i+1].pub_date)
 
+    def test_paginate_question_by_cursor(self):
+        response = self.client.get(reverse('question:index') + '?sort=popular&cursor=')
+        first = list(response.context['questions'])
+        page = response.context['page_obj']
+        self.assertEqual(len(first), settings.PAGINATE_QUESTIONS)
+        self.assertFalse(page.has_previous())
+        self.assertContains(response, 'cursor={}'.format(page.next_cursor))
+
+        response = self.client.get(reverse('question:index'),
+                                   {'sort': 'popular', 'cursor': page.next_cursor})
+        second = list(response.context['questions'])
+        self.assertEqual(first + second, list(Question.objects.popular()))
+
+    def test_invalid_cursor_return_404(self):
+        response = self.client.get(reverse('question:index') + '?cursor=invalid')
+        self.assertEqual(response.status_code, 404)
+
 
 class TestSearchView(TestCase):
 
@@ -201,6 +224,215 @@ class TestQuestionView(TestCase):
         self.assertEqual(last_answer.text, data['text'])
 
 
+class TestAskView(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='test1', email='test1@example.com')
+        self.client.force_login(self.user)
+
+    def test_question_is_saved_with_unique_tags(self):
+        response = self.client.post(reverse('question:ask'), {
+            'title': 'Title', 'text': 'Text', 'tags': 'python, django, django'})
+        question = Question.objects.get()
+        self.assertRedirects(response, question.url)
+        self.assertEqual(question.author, self.user)
+        self.assertEqual(sorted(question.tags.values_list('name', flat=True)),
+                         ['django', 'python'])
+
+
+class TestListViewsQueries(TestCase):
+
+    def setUp(self):
+        self.tag = Tag.objects.create(name='foo')
+        self.question = None
+        self.create_rows(0)
+
+    def create_rows(self, i):
+        # Each question and answer has own author
+        user = User.objects.create(username='user{}'.format(i),
+                                   email='user{}@example.com'.format(i))
+        question = Question.objects.create(
+            title='Question {}'.format(i), author=user)
+        question.tags.add(self.tag)
+        self.question = self.question or question
+        Answer.objects.create(text='Answer', author=user, question=self.question)
+
+    def count_queries(self, url):
+        # Queries of page rendering, not of page cache
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_number_of_queries_does_not_depend_on_rows_count(self):
+        urls = [
+            reverse('question:index'),
+            reverse('question:index') + '?sort=popular',
+            reverse('question:search') + '?q=question',
+            self.question.get_absolute_url(),
+        ]
+        counts = [self.count_queries(url) for url in urls]
+        for i in range(1, max(settings.PAGINATE_QUESTIONS, settings.PAGINATE_ANSWERS)):
+            self.create_rows(i)
+        for url, count in zip(urls, counts):
+            self.assertEqual(self.count_queries(url), count, url)
+
+
+class TestTrendingQuestionsBlock(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='test1', email='test1@example.com')
+        self.other_user = User.objects.create(username='test2', email='test2@example.com')
+        for i in range(settings.TRENDING_QUESTIONS_LIMIT):
+            Question.objects.create(title='Trending {}'.format(i),
+                                    author=self.user, rating=1)
+        self.question = Question.objects.create(title='Newcomer', author=self.user)
+
+    def get_trending_titles(self):
+        response = self.client.get(reverse('question:index'))
+        return [q.title for q in trending.get_trending_questions()], response
+
+    def test_trending_block_is_cached(self):
+        titles, response = self.get_trending_titles()
+        self.assertNotIn(self.question.title, titles)
+        self.assertContains(response, 'Trending 0')
+        with self.assertNumQueries(0):
+            token, _ = trending.get_trending_list()
+            self.assertEqual(trending.render_trending_questions(),
+                             cache.get(trending.get_html_cache_key(token)))
+
+    def test_evicted_list_is_not_shown_with_old_block(self):
+        self.get_trending_titles()
+        # List is evicted, the rendered block is still cached
+        cache.delete(trending.CACHE_KEY)
+        self.question.vote(self.other_user, True)
+        self.get_trending_titles()
+        self.assertIn(self.question.title, trending.render_trending_questions())
+
+    def test_vote_over_threshold_refreshes_trending_block(self):
+        self.get_trending_titles()
+        self.question.vote(self.other_user, True)
+        titles, response = self.get_trending_titles()
+        self.assertEqual(titles[0], self.question.title)
+        self.assertContains(response, self.question.title)
+
+    def test_vote_below_threshold_keeps_cached_block(self):
+        self.get_trending_titles()
+        self.question.vote(self.other_user, False)
+        self.assertIsNotNone(cache.get(trending.CACHE_KEY))
+
+
+class TestFragmentCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='test1', email='test1@example.com')
+        self.other_user = User.objects.create(username='test2', email='test2@example.com')
+        self.question = Question.objects.create(title='Cached question', author=self.user)
+        self.answer = Answer.objects.create(text='Cached answer', author=self.other_user,
+                                            question=self.question)
+
+    def test_list_item_is_cached_until_question_changes(self):
+        self.client.get(reverse('question:index'))
+        Question.objects.filter(pk=self.question.pk).update(title='Stale title')
+        self.assertContains(self.client.get(reverse('question:index')), 'Cached Question')
+
+        question = Question.objects.get(pk=self.question.pk)
+        question.vote(self.other_user, True)
+        response = self.client.get(reverse('question:index'))
+        self.assertContains(response, 'Stale Title')
+
+        question.save(tags=['python'])
+        self.assertContains(self.client.get(reverse('question:index')), 'python')
+
+    def test_list_item_is_cached_until_tag_is_renamed(self):
+        self.question.save(tags=['python'])
+        self.client.get(reverse('question:index'))
+        tag = Tag.objects.get(name='python')
+        tag.name = 'python3'
+        tag.save()
+        self.assertContains(self.client.get(reverse('question:index')), 'python3')
+
+    def test_publication_date_is_not_cached(self):
+        self.client.force_login(self.other_user)
+        self.client.get(reverse('question:index'))
+        Question.objects.filter(pk=self.question.pk).update(
+            pub_date=timezone.now() - timedelta(days=3))
+        self.assertContains(self.client.get(reverse('question:index')), 'asked 3\xa0days ago')
+
+    def test_tags_of_cached_list_items_are_not_loaded(self):
+        self.question.save(tags=['python'])
+        self.client.force_login(self.user)
+        self.client.get(reverse('question:index'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('question:index'))
+        self.assertContains(response, 'python')
+        self.assertFalse([query for query in queries
+                          if 'question_question_tags' in query['sql']])
+
+    def test_answer_is_cached_until_answer_changes(self):
+        self.client.get(self.question.url)
+        Answer.objects.filter(pk=self.answer.pk).update(text='Stale text')
+        self.assertContains(self.client.get(self.question.url), 'Cached answer')
+
+        self.answer.text = 'Edited answer'
+        self.answer.save()
+        self.assertContains(self.client.get(self.question.url), 'Edited answer')
+
+    def test_correct_answer_mark_is_not_cached(self):
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(self.question.url), 'answer-mark')
+        self.client.force_login(self.other_user)
+        self.assertNotContains(self.client.get(self.question.url), 'answer-mark')
+
+
+class TestAnonymousPageCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='test1', email='test1@example.com')
+        self.other_user = User.objects.create(username='test2', email='test2@example.com')
+        self.question = Question.objects.create(title='First question', author=self.user)
+        self.other_question = Question.objects.create(title='Second question', author=self.user)
+
+    def test_anonymous_page_is_served_from_cache(self):
+        for url in (reverse('question:index'), reverse('question:search') + '?q=question',
+                    self.question.url):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_pages_are_invalidated_by_question_changes(self):
+        self.client.get(self.question.url)
+        self.client.get(self.other_question.url)
+        self.client.get(reverse('question:index'))
+
+        Answer.objects.create(text='New answer', author=self.other_user, question=self.question)
+        self.assertContains(self.client.get(self.question.url), 'New answer')
+        with self.assertNumQueries(0):
+            self.client.get(self.other_question.url)
+
+        Question.objects.filter(pk=self.other_question.pk).update(title='Stale title')
+        self.question.vote(self.other_user, True)
+        self.assertContains(self.client.get(reverse('question:index')), 'Stale Title')
+
+    def test_authenticated_user_bypasses_cache(self):
+        self.client.get(self.question.url)
+        Question.objects.filter(pk=self.question.pk).update(text='Stale text')
+        self.assertNotContains(self.client.get(self.question.url), 'Stale text')
+
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(self.question.url), 'Stale text')
+
+    def test_page_with_csrf_token_is_not_cacheable(self):
+        request = RequestFactory().get('/')
+        self.assertTrue(pagecache.is_cacheable(request, HttpResponse()))
+        request.META['CSRF_COOKIE_USED'] = True
+        self.assertFalse(pagecache.is_cacheable(request, HttpResponse()))
+
+
 class TestVoteViews(TestCase):
 
     def setUp(self):
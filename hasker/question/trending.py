@@ -0,0 +1,90 @@
+"""
+Cached list of trending questions shared by the sidebar block and the API.
+
+The list is rebuilt after TRENDING_QUESTIONS_CACHE_TIMEOUT seconds or
+when a change can affect it: vote for a listed question or a vote which
+pushes a question over the hot score of the last listed one,
+edit or delete of a listed question. Key of the rendered block contains
+token of the list it was rendered from, so the block is never older
+than the cached list.
+"""
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+
+CACHE_KEY = 'trending_questions'
+HTML_CACHE_KEY = 'trending_questions_html'
+TEMPLATE_NAME = 'question/partials/trending_list.html'
+
+
+def get_trending_list():
+    """
+    Return cached (token, questions), the token is new for every built list.
+    """
+    entry = cache.get(CACHE_KEY)
+    if entry is None:
+        Question = apps.get_model('question', 'Question')
+        questions = list(Question.objects.popular().defer('text')
+                         [:settings.TRENDING_QUESTIONS_LIMIT])
+        entry = uuid.uuid4().hex, questions
+        cache.set(CACHE_KEY, entry, settings.TRENDING_QUESTIONS_CACHE_TIMEOUT)
+    return entry
+
+
+def get_trending_questions():
+    return get_trending_list()[1]
+
+
+def get_html_cache_key(token):
+    return '{}:{}'.format(HTML_CACHE_KEY, token)
+
+
+def render_trending_questions():
+    token, questions = get_trending_list()
+    key = get_html_cache_key(token)
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(TEMPLATE_NAME, {'questions': questions})
+        cache.set(key, html, settings.TRENDING_QUESTIONS_CACHE_TIMEOUT)
+    return html
+
+
+def invalidate():
+    # Rendered block of the deleted list is not used anymore
+    cache.delete(CACHE_KEY)
+
+
+def is_affected(questions):
+    """
+    Check if changed questions are listed or can get into the list.
+    """
+    entry = cache.get(CACHE_KEY)
+    if entry is None:
+        return False
+    listed = entry[1]
+    listed_pks = {question.pk for question in listed}
+    if len(listed) < settings.TRENDING_QUESTIONS_LIMIT:
+        threshold = None
+    else:
+        threshold = listed[-1].hot_score
+    for question in questions:
+        if question.pk in listed_pks:
+            return True
+        if threshold is None or question.hot_score >= threshold:
+            return True
+    return False
+
+
+def questions_changed(questions):
+    """
+    Invalidate cached list if changed questions affect it.
+    It is invalidated again after commit, so the list rebuilt
+    by concurrent request before commit is not kept.
+    """
+    if is_affected(questions):
+        invalidate()
+        transaction.on_commit(invalidate)
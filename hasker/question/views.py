@@ -2,7 +2,9 @@ from itertools import chain
 from urllib.parse import urlencode
 
 from django.conf import settings
-from django.db.models import Q
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import prefetch_related_objects
 from django.views import generic, View
 from django.views.generic.list import MultipleObjectMixin
 from django.urls import reverse, reverse_lazy
@@ -15,9 +17,15 @@ from django.http import JsonResponse, Http404, HttpResponseForbidden
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 
+from hasker.account import avatars
+from hasker.core.pagination import KeysetPaginationMixin
+
 from .models import Question, Answer, Tag
 from .forms import QuestionCreateForm, AnswerForm
-from .utils import new_answer_email_notify
+from .search import search_questions
+from .notifications import queue_new_answer_notification
+from .pagecache import AnonymousPageCacheMixin, question_dependency_by_slug
+from .tagging import get_tags_version
 
 
 class AskView(LoginRequiredMixin, generic.CreateView):
@@ -34,7 +42,7 @@ class AskView(LoginRequiredMixin, generic.CreateView):
         return redirect(question.url)
 
 
-class QuestionView(MultipleObjectMixin, View):
+class QuestionView(AnonymousPageCacheMixin, KeysetPaginationMixin, MultipleObjectMixin, View):
     model = Question
     form_class = AnswerForm
     context_object_name = 'answers'
@@ -42,27 +50,30 @@ class QuestionView(MultipleObjectMixin, View):
     template_name = 'question/question_detail.html'
     form = None
 
+    def get_page_dependencies(self):
+        return [question_dependency_by_slug(self.kwargs['slug'])]
+
     def get(self, request, slug):
         self.form = self.form_class()
-        self.question = get_object_or_404(self.model, slug=slug)
+        self.question = get_object_or_404(self.model.objects.feed(), slug=slug)
         return self.render_to_response(self.get_context_data())
 
     @method_decorator(login_required)
     def post(self, request, slug):
         self.form = form = self.form_class(request.POST)
-        self.question = question = get_object_or_404(self.model, slug=slug)
+        self.question = question = get_object_or_404(self.model.objects.feed(), slug=slug)
         if form.is_valid():
             answer = form.save(commit=False)
             answer.question = question
             answer.author = request.user
             answer.save()
             if request.user.pk != question.author.pk:
-                new_answer_email_notify(request, question, answer)
+                queue_new_answer_notification(request, question, answer)
             return redirect(question.url)
         return self.render_to_response(self.get_context_data())
 
     def get_queryset(self):
-        return self.question.answer_set.popular()
+        return self.question.answer_set.popular().feed()
 
     def get_context_data(self, **kwargs):
         object_list = self.get_queryset()
@@ -71,6 +82,9 @@ class QuestionView(MultipleObjectMixin, View):
             'question': self.question,
             'form': self.form,
         })
+        # Avatars of the page are checked with single cache request
+        avatars.load_exists([self.question.author] + [answer.author for answer in context['answers']],
+                            sizes=(100, 150))
         return context
 
     def render_to_response(self, context, **response_kwargs):
@@ -78,7 +92,36 @@ class QuestionView(MultipleObjectMixin, View):
                       context, **response_kwargs)
 
 
-class IndexView(generic.ListView):
+class QuestionListItemsMixin:
+    """
+    Load tags only of questions whose list item fragment is not cached.
+    """
+
+    @staticmethod
+    def get_fragment_cache():
+        # The same cache as of {% cache %} tag
+        try:
+            return caches['template_fragments']
+        except InvalidCacheBackendError:
+            return caches['default']
+
+    def prefetch_uncached_items(self, questions, tags_version):
+        keys = {make_template_fragment_key('question_list_item', [
+            question.pk, question.version, question.current_rating, tags_version,
+        ]): question for question in questions}
+        cached = self.get_fragment_cache().get_many(list(keys))
+        prefetch_related_objects(
+            [question for key, question in keys.items() if key not in cached], 'tags')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        questions = context[self.context_object_name] = list(context[self.context_object_name])
+        context['tags_version'] = get_tags_version()
+        self.prefetch_uncached_items(questions, context['tags_version'])
+        return context
+
+
+class IndexView(QuestionListItemsMixin, AnonymousPageCacheMixin, KeysetPaginationMixin, generic.ListView):
     context_object_name = 'questions'
     paginate_by = settings.PAGINATE_QUESTIONS
     template_name = 'question/question_list.html'
@@ -87,8 +130,8 @@ class IndexView(generic.ListView):
     def get_queryset(self):
         sort = self.request.GET.get('sort')
         if sort == 'popular':
-            return Question.objects.popular()
-        return Question.objects.new()
+            return Question.objects.popular().feed(tags=False)
+        return Question.objects.new().feed(tags=False)
 
     def get_context_data(self):
         title = 'New Questions'
@@ -103,31 +146,14 @@ class IndexView(generic.ListView):
         return context
 
 
-class SearchView(generic.ListView):
+class SearchView(QuestionListItemsMixin, AnonymousPageCacheMixin, generic.ListView):
     context_object_name = 'questions'
     paginate_by = settings.PAGINATE_QUESTIONS
     template_name = 'question/question_search.html'
     extra_context = {'title': 'Search result'}
 
     def get_queryset(self):
-        search_query = self.request.GET.get('q')
-        if not search_query:
-            return Question.objects.none()
-        search_query = search_query[:255]
-
-        if search_query.startswith('tag:'):
-            # search tags
-            search_tag_query = search_query[len('tag:'):]
-            if not search_tag_query:
-                return Question.objects.none()
-            query = Q(tags__name__icontains=search_tag_query)
-        else:
-            query = Q(title__icontains=search_query) | Q(text__icontains=search_query)
-            words = search_query.split()
-            if words:
-                for word in words:
-                    query |= Q(title__icontains=word) | Q(text__icontains=word)
-        return Question.objects.filter(query).distinct().order_by('-rating', '-pub_date')
+        return search_questions(self.request.GET.get('q')).feed(tags=False)
 
 
 class AnswerMarkView(View):
@@ -153,7 +179,7 @@ class BaseVoteView(View):
             value = True if request.POST.get('value') == 'true' else False
             instance = get_object_or_404(model, pk=pk)
             instance.vote(request.user, value)
-            return JsonResponse({'rating': instance.rating})
+            return JsonResponse({'rating': instance.current_rating})
         return HttpResponseForbidden()
 
 
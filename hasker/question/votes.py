@@ -0,0 +1,134 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+
+from . import pagecache, ratings, trending
+from .models import Answer, Question, Vote
+
+VOTE_MODELS = {
+    'question': Question,
+    'answer': Answer,
+}
+
+
+class VoteItem:
+    """
+    Single vote of batch and its result.
+    """
+
+    def __init__(self, model, pk, value):
+        self.model = model
+        self.pk = pk
+        self.value = value
+        self.instance = None
+        self.voted = False
+        self.rating = None
+
+
+def vote_batch(user, items, retries=2):
+    """
+    Apply votes of user with the same rules as VoteMixin.vote in one transaction:
+    existing votes are fetched with one query per model,
+    votes are deleted and created in bulk and ratings are updated
+    with one UPDATE per model and delta.
+    `items` is list of (type, pk, value), where type is key of VOTE_MODELS.
+    Return list of VoteItem.
+    """
+    for attempt in range(retries):
+        vote_items = [VoteItem(VOTE_MODELS[type_], pk, value)
+                      for type_, pk, value in items]
+        try:
+            with transaction.atomic():
+                _apply_votes(user, vote_items)
+            return vote_items
+        except IntegrityError:
+            # Concurrent vote of the same user, read votes again
+            if attempt == retries - 1:
+                raise
+
+
+def _apply_votes(user, items):
+    pks = defaultdict(set)
+    for item in items:
+        pks[item.model].add(item.pk)
+
+    instances = {}
+    votes = {}
+    for model, model_pks in pks.items():
+        content_type = ContentType.objects.get_for_model(model)
+        for instance in model.objects.filter(pk__in=model_pks):
+            instances[model, instance.pk] = instance
+        existing = Vote.objects.filter(
+            user=user, content_type=content_type, object_id__in=model_pks)
+        for vote in existing:
+            votes[model, vote.object_id] = vote
+
+    # Replay votes in memory
+    state = {key: vote.vote for key, vote in votes.items()}
+    current_ratings = {key: instance.current_rating for key, instance in instances.items()}
+    deltas = defaultdict(int)
+    for item in items:
+        key = item.model, item.pk
+        item.instance = instances.get(key)
+        if item.instance is None:
+            continue
+        if item.instance.author_id != user.pk:
+            value = state.get(key)
+            if value is None:
+                state[key] = item.value
+                item.voted = True
+            elif value != item.value:
+                state[key] = None
+                item.voted = True
+            if item.voted:
+                delta = 1 if item.value else -1
+                deltas[key] += delta
+                current_ratings[key] += delta
+        item.rating = current_ratings[key]
+
+    # Write final state of votes
+    delete_ids = []
+    new_votes = []
+    for key, value in state.items():
+        vote = votes.get(key)
+        if vote is not None and vote.vote == value:
+            continue
+        if vote is not None:
+            delete_ids.append(vote.pk)
+        if value is not None:
+            new_votes.append(Vote(user=user, content_object=instances[key], vote=value))
+    Vote.objects.filter(pk__in=delete_ids).delete()
+    Vote.objects.bulk_create(new_votes)
+
+    # Apply rating deltas
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if ratings.is_enabled():
+        buffered = [(instances[key], delta) for key, delta in deltas.items()]
+        transaction.on_commit(lambda: _buffer_deltas(buffered))
+        for key, delta in deltas.items():
+            instances[key]._pending_rating += delta
+    else:
+        updates = defaultdict(list)
+        for (model, pk), delta in deltas.items():
+            updates[model, delta].append(pk)
+            instances[model, pk].rating += delta
+        for (model, delta), model_pks in updates.items():
+            model.objects.filter(pk__in=model_pks).update(**model.get_rating_update(delta))
+        Question.bump_versions({instances[model, pk].question_id
+                                for model, pk in deltas if model is Answer})
+
+    questions = [instances[key] for key in deltas if key[0] is Question]
+    if not ratings.is_enabled():
+        for question in questions:
+            question.hot_score = question.compute_hot_score()
+    trending.questions_changed(questions)
+    pagecache.questions_changed(
+        [pk if model is Question else instances[model, pk].question_id
+         for model, pk in deltas])
+
+
+def _buffer_deltas(deltas):
+    buffer = ratings.get_rating_buffer()
+    for instance, delta in deltas:
+        buffer.add(instance, delta)